@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from utils.path_util import get_path
 
 test_plan = {
     'smoke': [
@@ -9,5 +10,55 @@ test_plan = {
         'query_order.json',
         'login_test_data.json',
         'login_invalid_user.json',
+    ],
+    'data_driven': [
+        'login_dataset.json',
     ]
 }
+
+# 执行方式配置
+# mode: sync 逐个顺序执行用例；async 基于asyncio并发执行用例，每个用例使用独立上下文
+# concurrency: async模式下最大并发执行的用例数
+# step_concurrency: 用例内最大并发步骤数，大于1时互不依赖（无extract→${var}关联）的步骤并发执行
+# dataset_concurrency: 数据驱动用例（_dataset）中每批数据行的最大并发数
+# pool: 连接池配置；pool_connections 缓存的连接池（host）个数，pool_maxsize 每个host保留的最大连接数，
+#       pool_block 连接数达到上限时是否阻塞等待，keep_alive 是否保持长连接
+# warm_up: 执行前预先建立的长连接数，0表示不预建
+# bundle: 是否使用测试计划预编译包（python core/plan_bundle.py编译），默认关闭；开启后源文件内容变化时自动重新编译
+# cassette: 请求录制/回放；mode为record时真实发送请求并录制到path，replay时只从录制文件返回响应、不产生网络请求，
+#           auto时已录制的请求回放、未录制的请求发送并录制，为None时不录制；按请求方法、URL与请求体匹配
+run_config = {
+    'mode': 'sync',
+    'concurrency': 10,
+    'step_concurrency': 1,
+    'dataset_concurrency': 1,
+    'pool': {
+        'pool_connections': 10,
+        'pool_maxsize': 10,
+        'pool_block': False,
+        'keep_alive': True,
+    },
+    'warm_up': 0,
+    'bundle': False,
+    'cassette': {
+        'mode': None,
+        'path': get_path('reports', 'cassettes', 'api_cassette.sqlite'),
+    },
+}
+
+
+# 压测配置（python core/api_load_runner.py <测试计划名>），命令行参数优先
+# users: 虚拟用户数；ramp_up: 爬坡时间（秒），虚拟用户在此时间内均匀启动
+# duration: 爬坡结束后的持续时间（秒）；iterations: 每个虚拟用户执行计划的轮数，两者同时配置时先达到者结束
+# think_time: 步骤之间的等待时间（秒）；pool: 连接池配置，未配置pool_maxsize时等于虚拟用户数
+load_config = {
+    'base_url': 'http://127.0.0.1:5000',
+    'users': 10,
+    'ramp_up': 5,
+    'duration': 60,
+    'iterations': None,
+    'think_time': 0,
+    'pool': {
+        'keep_alive': True,
+    },
+}
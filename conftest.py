@@ -3,8 +3,11 @@ import logging
 import os.path
 import pytest
 import datetime
-from utils.logger import log_record
-from utils.path_util import get_path
+from utils.logger import log_record, stop_log_record
+from core.request_timing import HISTOGRAM_BUCKETS
+from core.shard_runner import ShardWorker, ShardController, is_shard_worker, RUN_TIMESTAMP_ENV
+from core.run_history import RunHistory, ORDERS
+from utils.path_util import report_path
 
 
 @pytest.fixture(scope="function")
@@ -17,24 +20,35 @@ def test_logger(request):
     logger.info(f"----- 结束测试: {test_name} -----")
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        '--shards', type=int, default=0,
+        help='将选中的用例按历史耗时均衡分配到N个工作进程并行执行，0或1表示不分片'
+    )
+    parser.addoption(
+        '--order', choices=ORDERS, default=None,
+        help='按执行历史排序用例：longest按平均耗时从长到短，fail-fast最近失败的用例优先，未指定时按测试计划中的顺序'
+    )
+
+
 def pytest_configure(config):
     """配置测试环境"""
-    # 设置报告目录
-    reports_dir = get_path('reports')
+    # 设置报告目录，分片工作进程的日志、截图与报告位于各自的分片目录
+    reports_dir = report_path()
     if os.path.exists(reports_dir):
         os.makedirs(os.path.dirname(reports_dir), exist_ok=True)
 
     # 创建截图和日志目录
-    screenshots_dir = get_path('reports', 'screenshots')
+    screenshots_dir = report_path('screenshots')
     os.makedirs(screenshots_dir, exist_ok=True)
-    logs_dir = get_path('reports', 'logs')
+    logs_dir = report_path('logs')
     os.makedirs(logs_dir, exist_ok=True)
 
     # 设置资源目录为 screenshots 的父目录
     config.option.assetpath = screenshots_dir
 
-    # 带时间戳的报告文件名
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    # 带时间戳的报告文件名，分片工作进程使用主进程的时间戳
+    timestamp = os.getenv(RUN_TIMESTAMP_ENV) or datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     html_report = f"{reports_dir}/report_{timestamp}.html"
 
     # 动态设置报告路径
@@ -43,9 +57,78 @@ def pytest_configure(config):
 
     # 初始化统计字典
     pytest.stats = {"passed": 0, "failed": 0, "skipped": 0, "total": 0}
+    # 运行概述（连接池统计等），由各测试入口的夹具写入
+    pytest.run_summary = {}
+    # 本次执行的标识，执行历史按此记录
+    pytest.run_timestamp = timestamp
+    # 各用例本次执行的 [耗时（秒）, 结果]，执行结束后写入执行历史
+    pytest.case_results = {}
+    # 由执行器记录的用例耗时（秒），存在时代替pytest统计的耗时，见tests/API/conftest.py
+    pytest.case_durations = {}
 
     # 初始化日志系统
-    log_record(timestamp)
+    log_record(timestamp, log_dir=logs_dir)
+
+    # 分片执行：工作进程只执行分配的用例；主进程将用例分配给工作进程并合并结果
+    if is_shard_worker():
+        config.pluginmanager.register(ShardWorker(config), 'shard_worker')
+    elif config.getoption('shards') > 1:
+        config.pluginmanager.register(ShardController(config, config.getoption('shards'), timestamp), 'shard_controller')
+
+
+def pytest_collection_modifyitems(config, items):
+    """按执行历史排序用例，分片执行时各工作进程在排序后的用例中选取分配给自己的用例"""
+    order = config.getoption('order')
+    if not order or not items:
+        return
+    history = RunHistory()
+    ordered = history.order_cases([item.nodeid for item in items], order)
+    history.close()
+    position = {nodeid: index for index, nodeid in enumerate(ordered)}
+    items.sort(key=lambda item: position[item.nodeid])
+
+
+def pytest_sessionfinish(session):
+    """将用例耗时与结果写入执行历史，分片执行时由主进程根据回放的结果写入"""
+    if is_shard_worker() or not pytest.case_results:
+        return
+    history = RunHistory()
+    history.record_cases(
+        pytest.run_timestamp,
+        [(nodeid, outcome, pytest.case_durations.get(nodeid, duration))
+         for nodeid, (duration, outcome) in pytest.case_results.items()]
+    )
+    history.close()
+
+
+def pytest_unconfigure(config):
+    """写完队列中剩余的日志"""
+    stop_log_record()
+
+
+def pytest_runtest_logreport(report):
+    """统计测试结果与用例耗时；分片执行时主进程回放各分片的结果，统计覆盖所有分片"""
+    # 用例耗时为准备、执行、清理阶段之和，任一阶段失败即为失败
+    case_result = pytest.case_results.setdefault(report.nodeid, [0.0, 'passed'])
+    case_result[0] += report.duration
+    # 通过user_properties传递，分片执行时随报告序列化回放到主进程
+    case_duration = dict(report.user_properties).get('case_duration')
+    if case_duration is not None:
+        pytest.case_durations[report.nodeid] = case_duration
+    if report.failed:
+        case_result[1] = 'failed'
+    elif report.skipped and case_result[1] == 'passed':
+        case_result[1] = 'skipped'
+
+    # 只统计测试函数调用阶段
+    if report.when == "call":
+        pytest.stats["total"] += 1
+        if report.outcome == "passed":
+            pytest.stats["passed"] += 1
+        elif report.outcome == "failed":
+            pytest.stats["failed"] += 1
+        elif report.outcome == "skipped":
+            pytest.stats["skipped"] += 1
 
 
 @pytest.hookimpl(hookwrapper=True)
@@ -56,14 +139,6 @@ def pytest_runtest_makereport(item, call):
 
     # 只在测试函数调用阶段处理
     if report.when == "call":
-        pytest.stats["total"] += 1
-        if report.outcome == "passed":
-            pytest.stats["passed"] += 1
-        elif report.outcome == "failed":
-            pytest.stats["failed"] += 1
-        elif report.outcome == "skipped":
-            pytest.stats["skipped"] += 1
-
         report_extras = getattr(report, "extras", [])
 
         # 优化日志部分
@@ -95,4 +170,40 @@ def pytest_html_results_summary(summary):
     # 添加中文概述 - 使用原始HTML
     summary.append(f'<p>通过率: {pass_rate:.2f}%</p>')
 
+    # 连接池复用统计
+    pool_stats = getattr(pytest, 'run_summary', {}).get('pool_stats')
+    if pool_stats:
+        rows = ''.join(
+            f"<tr><td>{address}</td><td>{stats['requests']}</td><td>{stats['new_connections']}</td>"
+            f"<td>{stats['warmed_connections']}</td><td>{stats['reused_connections']}</td></tr>"
+            for address, stats in pool_stats.items()
+        )
+        summary.append(
+            '<p>连接池统计:</p><table><tr><th>地址</th><th>请求数</th><th>新建连接</th><th>预建连接</th>'
+            f'<th>复用连接请求</th></tr>{rows}</table>'
+        )
+
+    # 各接口请求耗时直方图
+    timings = getattr(pytest, 'run_summary', {}).get('timings')
+    if timings:
+        bucket_headers = ''.join(
+            f"<th>≤{upper}ms</th>" if upper != float('inf') else f"<th>>{HISTOGRAM_BUCKETS[-2]}ms</th>"
+            for upper in HISTOGRAM_BUCKETS
+        )
+        rows = []
+        for interface, histogram in timings.items():
+            count = histogram['count'] or 1
+            buckets = ''.join(f"<td>{value}</td>" for value in histogram['buckets'])
+            rows.append(
+                f"<tr><td>{interface}</td><td>{histogram['count']}</td><td>{histogram['new_connections']}</td>"
+                f"<td>{histogram['connect_ms'] / count:.1f}</td><td>{histogram['ttfb_ms'] / count:.1f}</td>"
+                f"<td>{histogram['transfer_ms'] / count:.1f}</td><td>{histogram['total_ms'] / count:.1f}</td>"
+                f"<td>{histogram['max_ms']:.1f}</td><td>{histogram['response_bytes'] // count}</td>{buckets}</tr>"
+            )
+        summary.append(
+            '<p>接口耗时分布:</p><table><tr><th>接口</th><th>请求数</th><th>新建连接</th><th>平均建连(ms)</th>'
+            '<th>平均首字节(ms)</th><th>平均传输(ms)</th><th>平均总耗时(ms)</th><th>最大耗时(ms)</th>'
+            f'<th>平均响应字节</th>{bucket_headers}</tr>{"".join(rows)}</table>'
+        )
+
 
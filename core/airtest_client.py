@@ -5,7 +5,7 @@ import time
 import subprocess
 import pyautogui
 from airtest.core.cv import Template
-from utils.path_util import get_path
+from utils.path_util import get_path, report_path
 from airtest.core.api import touch, text, swipe, snapshot, wait, exists, ST, keyevent, set_clipboard, paste
 from airtest.core.api import assert_exists, assert_not_exists, start_app, stop_app, connect_device
 
@@ -28,7 +28,7 @@ class AirtestClient:
         self.app_path = app_path
         self.app_feature_dir = None
         self.assert_feature_dir = None
-        self.fail_img = get_path('reports', 'screenshots')
+        self.fail_img = report_path('screenshots')
         self.resolution = (1920, 1080)
         self.fail_img_quality = 10
         self.find_timeout = 10
@@ -3,7 +3,7 @@ import os
 import time
 import logging
 import subprocess
-from utils.path_util import get_path
+from utils.path_util import report_path
 from appium import webdriver
 from appium.options.android import UiAutomator2Options
 from selenium.webdriver.support.ui import WebDriverWait
@@ -542,7 +542,7 @@ class AndroidAutomationTool:
                 filename = f"screenshot_{int(time.time())}.png"
 
             # 截图
-            screenshot_path = get_path('reports', 'screenshots', filename)
+            screenshot_path = report_path('screenshots', filename)
             self.driver.get_screenshot_as_file(screenshot_path)
 
             return screenshot_path
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any
+from core.api_test_executor import TestCaseExecutor
+
+logger = logging.getLogger('api_test_executor')
+
+
+class AsyncTestCaseExecutor:
+    def __init__(self, base_url='', timeout=10, concurrency=10, step_concurrency=1, pool_config=None,
+                 cassette_config=None, dataset_concurrency=1):
+        """
+        初始化异步测试用例执行器，基于asyncio并发执行多个测试用例
+        :param base_url: 基础URL
+        :param timeout: 默认超时时间
+        :param concurrency: 最大并发执行的用例数
+        :param step_concurrency: 用例内最大并发步骤数
+        :param pool_config: 连接池配置，见APITestClient
+        :param cassette_config: 录制/回放配置，见APITestClient
+        :param dataset_concurrency: 数据驱动用例中每批数据行的最大并发数
+        """
+        self.base_url = base_url
+        self.timeout = timeout
+        self.concurrency = max(1, int(concurrency))
+        # 所有用例共用一个执行器及其无状态HTTP客户端，响应与上下文只在用例内部传递
+        self.executor = TestCaseExecutor(
+            base_url=base_url, timeout=timeout, step_concurrency=step_concurrency, pool_config=pool_config,
+            cassette_config=cassette_config, dataset_concurrency=dataset_concurrency
+        )
+        self.test_results = {}  # 用例文件名 -> test_case_result
+
+    async def _execute_limited(self, json_file_path, semaphore, thread_pool):
+        """
+        在并发数限制内执行单个测试用例
+        :param json_file_path: 测试用例文件名
+        :param semaphore: 控制并发数的信号量
+        :param thread_pool: 执行阻塞请求的线程池
+        :return: test_case_result
+        """
+        async with semaphore:
+            try:
+                # 每个用例使用独立的上下文
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    thread_pool, self.executor.execute_test_case, json_file_path, {}
+                )
+            except Exception as e:
+                logger.error(f"异步执行测试用例{json_file_path}时发生异常: {str(e)}")
+                logger.error(traceback.format_exc())
+                return {
+                    'test_case': json_file_path,
+                    'total_steps': 0,
+                    'passed_steps': 0,
+                    'failed_steps': 0,
+                    'blocked_steps': 0,
+                    'step_results': [],
+                    'overall_success': False,
+                    'timings': {},
+                    'duration': 0.0,
+                    'error': str(e)
+                }
+
+    async def execute_test_cases_async(self, case_files: List[str]) -> List[Dict[str, Any]]:
+        """
+        并发执行多个测试用例，并发数不超过self.concurrency
+        :param case_files: 测试用例文件名列表
+        :return: 与case_files顺序一致的test_case_result列表
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as thread_pool:
+            tasks = [self._execute_limited(case, semaphore, thread_pool) for case in case_files]
+            return await asyncio.gather(*tasks)
+
+    def execute_test_plan(self, case_files: List[str]) -> List[Dict[str, Any]]:
+        """
+        并发执行测试计划中的所有用例，结果缓存到self.test_results中
+        :param case_files: 测试用例文件名列表，重复的用例只执行一次
+        :return: test_case_result列表
+        """
+        unique_cases = list(dict.fromkeys(case_files))
+        if not unique_cases:
+            return []
+
+        logger.info(f"异步模式开始执行{len(unique_cases)}个测试用例，最大并发数{self.concurrency}")
+        results = asyncio.run(self.execute_test_cases_async(unique_cases))
+        for case, result in zip(unique_cases, results):
+            self.test_results[case] = result
+
+        return results
+
+    def execute_test_case(self, json_file_path: str) -> Dict[str, Any]:
+        """
+        获取测试用例执行结果，已通过execute_test_plan执行过的用例直接返回缓存结果
+        :param json_file_path: 测试用例文件名
+        :return: test_case_result
+        """
+        if json_file_path not in self.test_results:
+            self.execute_test_plan([json_file_path])
+
+        return self.test_results[json_file_path]
+
+    def use_bundle(self, bundle):
+        """使用测试计划预编译包，见TestCaseExecutor.use_bundle"""
+        self.executor.use_bundle(bundle)
+
+    def use_history(self, history, run_id):
+        """记录步骤执行历史，见TestCaseExecutor.use_history"""
+        self.executor.use_history(history, run_id)
+
+    def warm_up(self, connections=None):
+        """预先建立长连接，见APITestClient.warm_up"""
+        return self.executor.warm_up(connections)
+
+    def pool_stats(self):
+        """连接池复用统计，见APITestClient.pool_stats"""
+        return self.executor.pool_stats()
+
+    def timing_stats(self):
+        """按接口汇总的耗时直方图，见TestCaseExecutor.timing_stats"""
+        return self.executor.timing_stats()
+
+    def close(self):
+        """关闭HTTP客户端"""
+        self.executor.close()
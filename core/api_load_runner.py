@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+接口压测：将接口测试计划中的用例作为虚拟用户场景执行
+每个虚拟用户按顺序循环执行计划中的用例，每轮使用新的变量上下文；
+数据驱动用例每次执行绑定数据集的下一行（所有虚拟用户共享，读完后从头开始）；
+用例的加载、变量替换、数据提取与断言均复用TestCaseExecutor
+"""
+import sys
+import math
+import time
+import logging
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+# 添加项目根目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.api_test_executor import TestCaseExecutor
+from core.dataset import dataset_path, iter_rows
+
+logger = logging.getLogger('api_load_runner')
+
+PERCENTILES = (50, 95, 99)
+# 静默模式下只输出WARNING及以上日志的模块：执行器（含接口注册表、预编译包）与HTTP客户端（含连接池）
+QUIET_LOGGERS = ('api_test_executor', 'http_client')
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """
+    最近秩法计算百分位数
+    :param sorted_values: 升序排列的数值列表
+    :param percent: 百分位，如95
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class DatasetFeeder:
+    def __init__(self, path: str):
+        """
+        数据驱动用例的数据行分发，所有虚拟用户共享，每次取下一行，读完后从头开始
+        :param path: 数据集文件路径
+        """
+        self.path = path
+        self._rows = None
+        self._lock = threading.Lock()
+        if next(iter_rows(path), None) is None:
+            raise ValueError(f"数据集为空: {path}")
+
+    def next_row(self) -> Dict[str, Any]:
+        with self._lock:
+            row = next(self._rows, None) if self._rows is not None else None
+            if row is None:
+                self._rows = iter_rows(self.path)
+                row = next(self._rows)
+            return row
+
+
+class LoadTestRunner:
+    def __init__(self, base_url='', users=10, ramp_up=0, duration=None, iterations=None,
+                 timeout=10, think_time=0, pool_config=None, quiet=True):
+        """
+        初始化压测执行器
+        :param base_url: 基础URL
+        :param users: 虚拟用户数
+        :param ramp_up: 爬坡时间（秒），虚拟用户在此时间内均匀启动
+        :param duration: 爬坡结束后的持续时间（秒），与iterations同时配置时先达到者结束
+        :param iterations: 每个虚拟用户执行计划的轮数，duration与iterations都未配置时执行1轮
+        :param timeout: 请求超时时间（秒）
+        :param think_time: 每个步骤之间的等待时间（秒）
+        :param pool_config: 连接池配置，未配置pool_maxsize时按虚拟用户数设置
+        :param quiet: 压测期间执行器与HTTP客户端只输出WARNING及以上的日志，避免日志开销影响压测结果
+        """
+        self.users = max(1, int(users))
+        self.ramp_up = max(0.0, float(ramp_up))
+        self.duration = duration
+        self.iterations = iterations if iterations or duration else 1
+        self.think_time = think_time
+        self.quiet = quiet
+        pool_config = dict(pool_config or {})
+        pool_config.setdefault('pool_maxsize', self.users)
+        # 所有虚拟用户共用一个执行器及其无状态HTTP客户端，上下文按用户隔离
+        self.executor = TestCaseExecutor(base_url=base_url, timeout=timeout, pool_config=pool_config)
+        self._samples = {}  # 接口名 -> [(请求耗时（毫秒）, 是否成功), ...]，未发出请求的步骤耗时为None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _record(self, interface, latency_ms, success):
+        with self._lock:
+            self._samples.setdefault(interface, []).append((latency_ms, success))
+
+    def _virtual_user(self, user_id: int, scenarios: List[Tuple[List[Dict[str, Any]], Optional[DatasetFeeder]]],
+                      start_delay: float, deadline):
+        """
+        单个虚拟用户：按顺序循环执行所有场景
+        :param user_id: 虚拟用户编号
+        :param scenarios: [(已加载的用例步骤列表, 数据驱动用例的数据行分发或None), ...]
+        :param start_delay: 启动延迟（秒）
+        :param deadline: 结束时间点（time.perf_counter），为空时只按轮数结束
+        """
+        if self._stop.wait(start_delay):
+            return
+        iteration = 0
+        while not self._stop.is_set():
+            if self.iterations and iteration >= self.iterations:
+                break
+            # 每轮使用新的变量上下文，同一轮内的用例间共享（同顺序执行测试计划）
+            context = {}
+            for steps, feeder in scenarios:
+                # 数据驱动用例绑定一行数据，行数据覆盖用例上下文（同execute_dataset）
+                case_context = {**context, **feeder.next_row()} if feeder is not None else context
+                unavailable = {}  # 用例内不可用的变量名 -> 根因
+                for step_number, step in enumerate(steps, start=1):
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        return
+                    step_result = self.executor.execute_step(step, step_number, case_context, unavailable)
+                    # 耗时只取请求本身（见core.request_timing），不含变量替换、提取与断言
+                    timing = step_result.get('timing')
+                    success = step_result['action_success'] and all(step_result['assertions'])
+                    self._record(step.get('_interface_name'), timing['total_ms'] if timing else None, success)
+                    if self.think_time:
+                        self._stop.wait(self.think_time)
+            iteration += 1
+        logger.debug(f"虚拟用户{user_id}执行结束，共{iteration}轮")
+
+    def run(self, case_files: List[str]) -> Dict[str, Any]:
+        """
+        执行压测
+        :param case_files: 测试计划中的用例文件名列表
+        :return: 压测报告，见report()
+        """
+        # 用例只加载、预编译一次，所有虚拟用户共用
+        scenarios = []
+        for case in case_files:
+            dataset, steps = self.executor.load_case(case)
+            scenarios.append((steps, DatasetFeeder(dataset_path(dataset['file'])) if dataset else None))
+        quiet_loggers = [logging.getLogger(name) for name in QUIET_LOGGERS] if self.quiet else []
+        levels = [quiet_logger.level for quiet_logger in quiet_loggers]
+        for quiet_logger in quiet_loggers:
+            quiet_logger.setLevel(logging.WARNING)
+
+        self._samples = {}
+        self._stop.clear()
+        logger.info(f"开始压测: {self.users}个虚拟用户，爬坡{self.ramp_up}秒，"
+                    f"持续{self.duration}秒，每用户{self.iterations}轮")
+        started = time.perf_counter()
+        deadline = started + self.ramp_up + self.duration if self.duration else None
+        interval = self.ramp_up / self.users
+        threads = [
+            threading.Thread(target=self._virtual_user, args=(user_id, scenarios, user_id * interval, deadline),
+                             name=f'virtual-user-{user_id}', daemon=True)
+            for user_id in range(self.users)
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+        finally:
+            for quiet_logger, level in zip(quiet_loggers, levels):
+                quiet_logger.setLevel(level)
+
+        return self.report(time.perf_counter() - started)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        """
+        汇总压测结果
+        :param elapsed: 压测总耗时（秒）
+        :return: {'elapsed', 'total': 汇总统计, 'interfaces': {接口名: 统计}}，
+                 统计包含requests、errors、throughput（请求/秒，按压测总耗时计算）、
+                 平均及p50/p95/p99请求耗时（毫秒，不含未发出请求的步骤）
+        """
+        def summarize(samples):
+            latencies = sorted(sample[0] for sample in samples if sample[0] is not None)
+            stats = {
+                'requests': len(samples),
+                'errors': sum(1 for sample in samples if not sample[1]),
+                'throughput': len(samples) / elapsed if elapsed else 0.0,
+                'avg': sum(latencies) / len(latencies) if latencies else 0.0,
+            }
+            for percent in PERCENTILES:
+                stats[f'p{percent}'] = percentile(latencies, percent)
+            return stats
+
+        with self._lock:
+            samples = {interface: list(items) for interface, items in self._samples.items()}
+        return {
+            'elapsed': elapsed,
+            'total': summarize([sample for items in samples.values() for sample in items]),
+            'interfaces': {interface: summarize(items) for interface, items in sorted(samples.items())},
+        }
+
+    def close(self):
+        """关闭HTTP客户端"""
+        self.executor.close()
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """将压测报告格式化为文本表格"""
+    header = f"{'接口':<40}{'请求数':>8}{'失败':>8}{'吞吐(/s)':>10}{'平均(ms)':>10}" + \
+             ''.join(f"{f'p{percent}(ms)':>10}" for percent in PERCENTILES)
+    lines = [f"压测耗时: {report['elapsed']:.2f}秒", header]
+    rows = list(report['interfaces'].items()) + [('合计', report['total'])]
+    for interface, stats in rows:
+        lines.append(
+            f"{str(interface):<40}{stats['requests']:>8}{stats['errors']:>8}{stats['throughput']:>10.2f}"
+            f"{stats['avg']:>10.2f}" + ''.join(f"{stats[f'p{percent}']:>10.2f}" for percent in PERCENTILES)
+        )
+    return '\n'.join(lines)
+
+
+def main():
+    from config.api_test_plan import test_plan, load_config
+
+    parser = argparse.ArgumentParser(description='以接口测试计划为场景执行压测')
+    parser.add_argument('plan', help='测试计划名称（config/api_test_plan.py中test_plan的键）')
+    parser.add_argument('--base-url', default=load_config.get('base_url'), help='基础URL')
+    parser.add_argument('--users', type=int, default=load_config.get('users'), help='虚拟用户数')
+    parser.add_argument('--ramp-up', type=float, default=load_config.get('ramp_up'), help='爬坡时间（秒）')
+    parser.add_argument('--duration', type=float, default=load_config.get('duration'), help='持续时间（秒）')
+    parser.add_argument('--iterations', type=int, default=load_config.get('iterations'), help='每个虚拟用户执行的轮数')
+    parser.add_argument('--think-time', type=float, default=load_config.get('think_time'), help='步骤间等待时间（秒）')
+
+    args = parser.parse_args()
+    if args.plan not in test_plan:
+        print(f"✗ 测试计划不存在: {args.plan}")
+        sys.exit(1)
+
+    runner = LoadTestRunner(
+        base_url=args.base_url,
+        users=args.users,
+        ramp_up=args.ramp_up,
+        duration=args.duration,
+        iterations=args.iterations,
+        think_time=args.think_time,
+        pool_config=load_config.get('pool'),
+    )
+    try:
+        print(format_report(runner.run(test_plan[args.plan])))
+    finally:
+        runner.close()
+
+
+if __name__ == '__main__':
+    main()
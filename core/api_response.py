@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import tempfile
+from core.json_stream import parse_pruned, ijson
+
+logger = logging.getLogger('http_client')
+
+_UNSET = object()
+
+
+class APIResponse:
+    def __init__(self, response):
+        """
+        响应对象包装：响应文本惰性解码、JSON惰性解析，且均最多执行一次，
+        提取数据、各类断言与日志共用同一份解析结果
+        :param response: requests.Response 对象
+        """
+        self.raw_response = response
+        self.streamed = False
+        # 请求耗时分解，由APITestClient在请求结束后写入
+        self.timing = None
+        self._text = _UNSET
+        self._json = _UNSET
+        self._json_error = None
+
+    @property
+    def status_code(self):
+        return self.raw_response.status_code
+
+    @property
+    def headers(self):
+        return self.raw_response.headers
+
+    @property
+    def content(self):
+        return self.raw_response.content
+
+    @property
+    def text(self):
+        """响应文本，首次访问时解码"""
+        if self._text is _UNSET:
+            response = self.raw_response
+            if response.encoding is None and 'json' in response.headers.get('content-type', ''):
+                # JSON默认为UTF-8，避免对大响应体做编码探测
+                self._text = response.content.decode('utf-8', errors='replace')
+            else:
+                self._text = response.text
+        return self._text
+
+    def json(self):
+        """解析后的JSON数据，首次调用时解析，解析失败时每次调用抛出同一异常"""
+        if self._json is _UNSET and self._json_error is None:
+            try:
+                self._json = json.loads(self.text)
+            except ValueError as e:
+                self._json_error = e
+        if self._json_error is not None:
+            raise self._json_error
+        return self._json
+
+    def json_subset(self, spec):
+        """获取断言或提取所需的JSON数据，非流式响应直接返回完整的解析结果"""
+        return self.json()
+
+    def contains(self, expectation: str) -> bool:
+        """响应文本是否包含期望字符串"""
+        return expectation in self.text
+
+    @property
+    def text_for_log(self):
+        """写入日志的响应内容"""
+        return self.text
+
+    def __bool__(self):
+        return self.raw_response.ok
+
+    def __getattr__(self, name):
+        # 其余属性（url、elapsed、cookies等）直接读取原始响应对象
+        return getattr(self.raw_response, name)
+
+    def __repr__(self):
+        return f'<APIResponse [{self.status_code}]>'
+
+
+class StreamingResponse(APIResponse):
+    def __init__(self, response, chunk_size=64 * 1024, memory_limit=10 * 1024 * 1024):
+        """
+        流式响应：响应体分块读取到SpooledTemporaryFile，超过memory_limit的部分写入磁盘，
+        内存占用不随响应体大小增长；包含断言分块查找，键值与结构断言使用增量JSON解析
+        :param response: 以stream=True发送请求得到的requests.Response
+        :param chunk_size: 分块大小（字节）
+        :param memory_limit: 内存中缓存响应体的上限（字节）
+        """
+        super().__init__(response)
+        self.streamed = True
+        self.chunk_size = chunk_size
+        self.memory_limit = memory_limit
+        self.size = 0
+        self._body = tempfile.SpooledTemporaryFile(max_size=memory_limit)
+        try:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                self._body.write(chunk)
+                self.size += len(chunk)
+        finally:
+            response.close()
+
+    def iter_chunks(self):
+        """从头按块读取响应体"""
+        self._body.seek(0)
+        while True:
+            chunk = self._body.read(self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def _ensure_within_limit(self):
+        if self.size > self.memory_limit:
+            raise ValueError(f"响应体大小{self.size}字节超过内存上限{self.memory_limit}字节，流式模式下不能整体读取")
+
+    @property
+    def content(self):
+        self._ensure_within_limit()
+        return b''.join(self.iter_chunks())
+
+    @property
+    def text(self):
+        if self._text is _UNSET:
+            self._ensure_within_limit()
+            encoding = self.raw_response.encoding or 'utf-8'
+            self._text = self.content.decode(encoding, errors='replace')
+        return self._text
+
+    def contains(self, expectation: str) -> bool:
+        """分块查找期望字符串，保留上一块末尾len-1个字节，跨块边界的匹配也能找到"""
+        needle = expectation.encode(self.raw_response.encoding or 'utf-8')
+        if not needle:
+            return True
+        overlap = len(needle) - 1
+        tail = b''
+        for chunk in self.iter_chunks():
+            window = tail + chunk
+            if needle in window:
+                return True
+            tail = window[-overlap:] if overlap else b''
+        return False
+
+    def json_subset(self, spec):
+        """
+        增量解析JSON，只构建spec需要的部分；未安装ijson时在内存上限内整体解析
+        :param spec: 裁剪规则，见core.json_stream
+        """
+        if ijson is None:
+            if self.size > self.memory_limit:
+                logger.warning(f"未安装ijson，无法增量解析{self.size}字节的流式响应体（内存上限{self.memory_limit}字节），"
+                               f"键值与结构断言将失败，请执行 pip install ijson")
+            return self.json()
+        self._body.seek(0)
+        return parse_pruned(self._body, spec)
+
+    @property
+    def text_for_log(self):
+        return f"<流式响应，响应体{self.size}字节>"
+
+    def close(self):
+        """释放缓存的响应体"""
+        self._body.close()
+
+    def __repr__(self):
+        return f'<StreamingResponse [{self.status_code}] {self.size} bytes>'
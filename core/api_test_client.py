@@ -1,25 +1,117 @@
 # -*- coding: utf-8 -*-
-import re
+import os
 import requests
 import logging
+import threading
+from core.template import compile_template, render_string
+from core.json_path import extract_values, MISSING
+from core.api_response import APIResponse, StreamingResponse
+from core.json_stream import paths_spec
+from core.structure_validator import StructureValidator, compare_structure
+from core.http_pool import PooledHTTPAdapter, DEFAULT_POOL_CONFIG
+from core.http_cassette import Cassette, CassetteAdapter, REPLAY
+from core.request_timing import start_timing, finish_timing
+from utils.logger import LazyPayload
 
 
 logger = logging.getLogger('http_client')
 
 
 class APITestClient:
-    def __init__(self, base_url='', default_headers=None, timeout=10):
+    def __init__(self, base_url='', default_headers=None, timeout=10,
+                 stream=False, chunk_size=64 * 1024, memory_limit=10 * 1024 * 1024, pool_config=None,
+                 cassette_config=None):
         """
         初始化 HTTP 客户端
         :param base_url: 基础URL（所有请求会基于此URL）
         :param default_headers: 默认请求头
         :param timeout: 默认超时时间（秒）
+        :param stream: 是否默认使用流式模式读取响应体，适用于大响应体接口
+        :param chunk_size: 流式模式下的分块大小（字节）
+        :param memory_limit: 流式模式下内存中缓存响应体的上限（字节），超出部分写入临时文件
+        :param pool_config: 连接池配置，键见core.http_pool.DEFAULT_POOL_CONFIG；
+                            也可按基础URL分别配置，如 {'http://host-a': {...}, 'http://host-b': {...}}
+        :param cassette_config: 录制/回放配置 {'mode': 'record'/'replay'/'auto', 'path': 录制文件路径}，
+                                mode为空时直接发送请求
         """
         self.base_url = base_url.rstrip('/')  # 移除末尾斜杠
         self.default_headers = default_headers or {'Content-Type': 'application/json'}
         self.timeout = timeout
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.memory_limit = memory_limit
         self.session = requests.Session()  # 创建会话保持连接
         self.response = None
+        self._local = threading.local()  # 各线程最近一次请求的耗时分解
+        self.adapters = {}  # 基础URL -> PooledHTTPAdapter
+        self._mount_pools(pool_config or {})
+        self.cassette = None
+        self.cassette_mode = None
+        cassette_config = cassette_config or {}
+        if cassette_config.get('mode'):
+            self.use_cassette(cassette_config['path'], cassette_config['mode'])
+
+    def _mount_pools(self, pool_config):
+        """按基础URL挂载连接池，未单独配置的URL使用默认配置"""
+        if pool_config and all(isinstance(value, dict) for value in pool_config.values()):
+            per_url = pool_config
+        else:
+            per_url = {self.base_url: pool_config} if self.base_url else {}
+        for prefix in ('http://', 'https://'):
+            self.mount_pool(prefix)
+        for url, config in per_url.items():
+            self.mount_pool(url, **config)
+
+    def mount_pool(self, url_prefix, **config):
+        """
+        为指定URL前缀挂载独立的连接池
+        :param url_prefix: URL前缀，如 http://127.0.0.1:5000
+        :param config: 连接池配置，见core.http_pool.DEFAULT_POOL_CONFIG
+        :return: PooledHTTPAdapter
+        """
+        adapter = PooledHTTPAdapter(**{**DEFAULT_POOL_CONFIG, **config})
+        self.session.mount(url_prefix, adapter)
+        self.adapters[url_prefix] = adapter
+        return adapter
+
+    def use_cassette(self, path, mode=REPLAY):
+        """
+        开启录制/回放：所有已挂载的适配器由CassetteAdapter包装
+        :param path: sqlite录制文件路径
+        :param mode: record 录制；replay 回放，不产生网络请求；auto 已录制的回放，未录制的发送并录制
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.cassette = Cassette(path)
+        self.cassette_mode = mode
+        for prefix, adapter in list(self.session.adapters.items()):
+            self.session.mount(prefix, CassetteAdapter(self.cassette, mode, adapter))
+        logger.info(f"录制/回放模式: {mode}，录制文件: {path}")
+
+    def warm_up(self, connections=None, url=None):
+        """
+        预先建立长连接，在计时开始前完成TCP/TLS建连
+        :param connections: 预建连接数，默认为连接池的pool_maxsize
+        :param url: 目标地址，默认为base_url
+        :return: 成功建立的连接数
+        """
+        url = url or self.base_url
+        if not url or self.cassette_mode == REPLAY:
+            return 0
+        # 与发送请求时一样合并环境变量中的证书配置，保证预建连接进入请求实际使用的连接池
+        verify = self.session.merge_environment_settings(url, {}, None, None, None)['verify']
+        count = self.session.get_adapter(url).warm_up(url, connections, timeout=self.timeout, verify=verify)
+        logger.info(f"预建连接 {url}: {count}个")
+        return count
+
+    def pool_stats(self):
+        """
+        各连接池的连接复用统计
+        :return: {地址: {'requests', 'new_connections', 'warmed_connections', 'reused_connections', 'idle_connections'}}
+        """
+        stats = {}
+        for adapter in self.adapters.values():
+            stats.update(adapter.pool_stats())
+        return stats
 
     def _send_request(self, method, url_path, **kwargs):
         """
@@ -27,7 +119,7 @@ class APITestClient:
         :param method: HTTP 方法 ('GET', 'POST')
         :param url_path: url路径
         :param kwargs: requests 支持的参数（params, data, json, headers等）
-        :return: 响应对象或 None（请求失败时）
+        :return: APIResponse 响应对象或 None（请求失败时）
         """
         # 构建完整URL
         url = f"{self.base_url}/{url_path.lstrip('/')}" if self.base_url else url_path
@@ -38,56 +130,120 @@ class APITestClient:
         # 设置超时（优先使用调用时指定的超时）
         timeout = kwargs.pop('timeout', self.timeout)
 
+        # 流式模式（优先使用调用时指定的模式）
+        stream = kwargs.pop('stream', None)
+        stream = self.stream if stream is None else stream
+
+        start_timing()
+        response = None
+        result = None
         try:
             response = self.session.request(
                 method=method,
                 url=url,
                 headers=headers,
                 timeout=timeout,
+                stream=stream,
                 **kwargs
             )
             response.raise_for_status()  # 检查HTTP错误状态
             # logger.info(f"{method} {url} - Status {response.status_code}")
-            return response
+            if stream:
+                result = StreamingResponse(response, self.chunk_size, self.memory_limit)
+            else:
+                # 包装响应，文本与JSON只解析一次
+                result = APIResponse(response)
+            return result
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Request failed: {method} {url} - Error: {str(e)}")
             return None
 
-    def get(self, url_path, params=None, **kwargs):
+        finally:
+            # 响应体读取完毕后结束计时，失败的请求同样记录耗时
+            timing = finish_timing(self._request_size(response), self._response_size(response))
+            self._local.timing = timing
+            if result is not None:
+                result.timing = timing
+
+    @staticmethod
+    def _request_size(response):
+        """请求大小（字节）：请求行、请求头与请求体"""
+        if response is None or response.request is None:
+            return 0
+        prepared = response.request
+        size = len(f"{prepared.method} {prepared.path_url} HTTP/1.1\r\n\r\n")
+        size += sum(len(key) + len(value) + 4 for key, value in prepared.headers.items())
+        body = prepared.body
+        if isinstance(body, (bytes, str)):
+            size += len(body)
+        return size
+
+    @staticmethod
+    def _response_size(response):
+        """响应体传输的原始字节数（压缩响应按压缩后的大小计）"""
+        if response is None:
+            return 0
+        raw = getattr(response, 'raw', None)
+        try:
+            return raw.tell()
+        except Exception:
+            return len(response.content) if response._content_consumed else 0
+
+    @property
+    def last_timing(self):
         """
-        GET 请求
-        :param url_path: url路径
-        :param params: 查询参数字典
-        :return: 响应对象或 None
+        当前线程最近一次请求的耗时分解，请求失败时同样可用
+        :return: 见core.request_timing.finish_timing
         """
-        self.response = self._send_request('GET', url_path, params=params, **kwargs)
+        return getattr(self._local, 'timing', None)
 
-    def post(self, url_path, data=None, json_data=None, **kwargs):
+    def send(self, method, url_path, params=None, data=None, json_data=None, **kwargs):
         """
-        POST 请求
+        无状态请求方法：不修改self.response，直接返回本次请求的响应对象，可在多线程中共用同一个客户端
+        :param method: HTTP 方法 ('GET', 'POST')
         :param url_path: url路径
+        :param params: 查询参数字典
         :param data: 表单数据（字典或字节）
         :param json_data: JSON 可序列化对象
+        :param kwargs: 其他requests参数，stream=True/False 可覆盖客户端默认的流式模式
         :return: 响应对象或 None
         """
+        if params is not None:
+            kwargs['params'] = params
         # 根据参数类型自动设置Content-Type
         if json_data is not None:
             kwargs['json'] = json_data
         elif data is not None:
             kwargs['data'] = data
-        self.response = self._send_request('POST', url_path, **kwargs)
+        return self._send_request(method.upper(), url_path, **kwargs)
+
+    def get(self, url_path, params=None, **kwargs):
+        """
+        GET 请求，响应保存到self.response
+        :param url_path: url路径
+        :param params: 查询参数字典
+        :return: 响应对象或 None
+        """
+        self.response = self.send('GET', url_path, params=params, **kwargs)
+        return self.response
+
+    def post(self, url_path, data=None, json_data=None, **kwargs):
+        """
+        POST 请求，响应保存到self.response
+        :param url_path: url路径
+        :param data: 表单数据（字典或字节）
+        :param json_data: JSON 可序列化对象
+        :return: 响应对象或 None
+        """
+        self.response = self.send('POST', url_path, data=data, json_data=json_data, **kwargs)
+        return self.response
 
     def _replace_dict_placeholders(self, data, context):
-        """递归替换字典中的占位符"""
-        if isinstance(data, dict):
-            return {k: self._replace_dict_placeholders(v, context) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [self._replace_dict_placeholders(item, context) for item in data]
-        elif isinstance(data, str):
-            return _replace_placeholders(data, context)
-        else:
+        """替换字典、列表中的占位符"""
+        if not context:
             return data
+        return compile_template(data).render(context)
 
     def request_with_params(self, method, url_path, context=None, **kwargs):
         """支持动态参数替换的请求方法"""
@@ -106,14 +262,23 @@ class APITestClient:
 
         return self._send_request(method, url_path, **kwargs)
 
+    def _resolve_response(self, response):
+        """断言方法优先使用传入的响应对象，兼容读取self.response的旧用法"""
+        response = self.response if response is None else response
+        if isinstance(response, requests.Response):
+            response = APIResponse(response)
+        return response
+
     def close(self):
         """关闭会话连接"""
         self.session.close()
+        if self.cassette is not None:
+            self.cassette.close()
 
-    def response_status_equal(self, expectation=200):
-        """断言响应状态码等于期望值"""
+    def response_status_equal(self, expectation=200, response=None):
+        """断言响应状态码等于期望值，response为空时使用self.response"""
         try:
-            actuality = self.response.status_code
+            actuality = self._resolve_response(response).status_code
             if actuality == expectation:
                 # logger.info('通过')
                 logger.info('<span style="color: green; font-weight: bold;">通过</span>')
@@ -130,11 +295,11 @@ class APITestClient:
 
         return assert_result
 
-    def response_text_contents(self, expectation: str):
-        """断言响应内容包含期望值"""
+    def response_text_contents(self, expectation: str, response=None):
+        """断言响应内容包含期望值，response为空时使用self.response"""
         try:
-            actuality = self.response.text
-            if expectation in actuality:
+            # 流式响应分块查找，不整体读取响应体
+            if self._resolve_response(response).contains(expectation):
                 # logger.info('通过')
                 logger.info('<span style="color: green; font-weight: bold;">通过</span>')
                 assert_result = True
@@ -150,11 +315,16 @@ class APITestClient:
 
         return assert_result
 
-    def response_json_structure(self, expectation: dict):
-        """断言响应json中的数据结构与期望json数据结构一致"""
+    def response_json_structure(self, expectation: dict, response=None, validator: StructureValidator = None):
+        """
+        断言响应json中的数据结构与期望json数据结构一致，response为空时使用self.response
+        validator为加载用例时预编译的结构校验器，为空时按expectation临时编译
+        """
         try:
-            actuality = self.response.json()
-            match, differences = compare_structure(actuality, expectation)
+            validator = validator or StructureValidator(expectation)
+            # 流式响应只增量解析期望结构涉及的部分
+            actuality = self._resolve_response(response).json_subset(validator.spec)
+            match, differences = validator.validate(actuality)
             if match:
                 # logger.info('通过')
                 logger.info('<span style="color: green; font-weight: bold;">通过</span>')
@@ -162,7 +332,7 @@ class APITestClient:
             else:
                 # logger.info('失败')
                 logger.info('<span style="color: red; font-weight: bold;">失败</span>')
-                logger.info(f'{differences}')
+                logger.info('%s', LazyPayload(differences))
                 assert_result = False
         except Exception as e:
             # logger.info('失败')
@@ -172,42 +342,29 @@ class APITestClient:
 
         return assert_result
 
-    def equals_key_value(self, expectation: dict):
-        """断言响应json中键值对与期望结果中的键值对一致"""
+    def equals_key_value(self, expectation: dict, response=None):
+        """断言响应json中键值对与期望结果中的键值对一致，response为空时使用self.response"""
         try:
-            actuality = self.response.json()
+            actuality = self._resolve_response(response).json_subset(paths_spec(expectation.keys()))
 
             results = []
 
+            # 预编译的路径在一次遍历中求出所有期望键的实际值
+            actual_values = extract_values(actuality, {key_path: key_path for key_path in expectation}, MISSING)
+
             for key_path, expected_value in expectation.items():
-                # 分割key路径
-                keys = key_path.split('.')
-
-                # 在response中查找对应的值
-                current_data = actuality
-
-                try:
-                    for key in keys:
-                        # 处理列表索引的情况（如list_data.0）
-                        if key.isdigit():
-                            key = int(key)
-                        current_data = current_data[key]
-
-                    # 找到对应值，进行比较
-                    actual_value = current_data
-                    if actual_value == expected_value:
-                        continue  # 相等，不做任何记录
-                    else:
-                        results.append(
-                            f"期望结果中的{key_path}值{expected_value}与响应内容对应值{actual_value}不相等"
-                        )
-                except (KeyError, IndexError, TypeError):
+                actual_value = actual_values[key_path]
+                if actual_value is MISSING:
                     # 路径不存在的情况
                     results.append(f"期望结果中的{key_path}在响应内容中没有对应关系")
+                elif actual_value != expected_value:
+                    results.append(
+                        f"期望结果中的{key_path}值{expected_value}与响应内容对应值{actual_value}不相等"
+                    )
 
             if results:
                 # logger.info('失败')
-                logger.info(f'{results}')
+                logger.info('%s', LazyPayload(results))
                 logger.info('<span style="color: red; font-weight: bold;">失败</span>')
                 assert_result = False
             else:
@@ -250,68 +407,4 @@ class APITestClient:
 
 def _replace_placeholders(text, context):
     """替换文本中的占位符 ${key}"""
-    if not context or not text:
-        return text
-
-    pattern = r'\$\{([^}]+)\}'
-    return re.sub(pattern, lambda match: str(context.get(match.group(1), match.group(0))), text)
-
-
-def compare_structure(actuality, expectation, path=""):
-    """
-    比较两个JSON结构是否一致
-    expectation: 标准JSON
-    actuality: 要比较的JSON
-    path: 当前路径（用于定位差异）
-    返回: (是否一致, 差异描述)
-    """
-    # 检查类型是否一致
-    if type(expectation) is not type(actuality):
-        error = f"在 {path} 处类型不一致。期望类型 {type(expectation).__name__}，实际类型 {type(actuality).__name__}"
-        return False, error
-
-    if isinstance(expectation, dict):
-        # 检查字典的键集合是否一致
-        expectation_keys = set(expectation.keys())
-        actuality_keys = set(actuality.keys())
-
-        if expectation_keys != actuality_keys:
-            missing = expectation_keys - actuality_keys
-            extra = actuality_keys - expectation_keys
-            error = f"在 {path} 处键不一致。"
-            if missing:
-                error += f"缺失键: {missing}"
-            if extra:
-                error += f"多余键: {extra}"
-            return False, error
-
-        # 递归检查每个键对应的值结构是否一致
-        for key in expectation:
-            new_path = f"{path}['{key}']"
-            is_match, error_msg = compare_structure(expectation[key], actuality[key], new_path)
-            if not is_match:
-                return False, error_msg
-        return True, "结构一致"
-
-    elif isinstance(expectation, list):
-        # 处理空列表
-        if len(expectation) == 0 and len(actuality) == 0:
-            return True, "结构一致"
-
-        # 标准列表非空但比较列表为空
-        if len(expectation) > 0 and len(actuality) == 0:
-            return False, f"在 {path} 处：期望非空列表，但实际为空"
-
-        # 比较列表元素结构
-        for i, (expectation_item, actuality_item) in enumerate(zip(expectation, actuality)):
-            new_path = f"{path}[{i}]"
-            is_match, error_msg = compare_structure(expectation_item, actuality_item, new_path)
-            if not is_match:
-                return False, error_msg
-
-        return True, "结构一致"
-
-    else:
-        # 基础类型（str, int, float, bool等）直接返回成功
-        return True, "结构一致"
-
+    return render_string(text, context)
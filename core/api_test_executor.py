@@ -1,64 +1,125 @@
 # -*- coding: utf-8 -*-
-import re
+import os
 import json
+import time
 import logging
+import datetime
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import Dict, List, Any
-from utils.path_util import get_path
+from utils.path_util import get_path, report_path
 from core.reference_step import handel_references
+from core.step_graph import build_step_graph, consumed_variables, produced_variables
+from core.template import compile_template, Constant
+from core.interface_registry import interface_registry, thaw
+from core.json_path import extract_values, extract_path
+from core.json_stream import paths_spec
+from core.structure_validator import StructureValidator
+from core.dataset import split_dataset, dataset_path, iter_rows, batched, DEFAULT_BATCH_SIZE
 from core.api_test_client import APITestClient
+from core.request_timing import new_histogram, add_timing, merge_histograms
+from core.run_history import step_outcomes
+from utils.logger import LazyPayload
 
 logger = logging.getLogger('api_test_executor')
 
+# 数据驱动用例在结果中保留的失败行数上限，全部行的结果见逐行结果文件
+MAX_ROW_FAILURES = 100
+
 
 class TestCaseExecutor:
-    def __init__(self, base_url='', timeout=10):
+    def __init__(self, base_url='', timeout=10, step_concurrency=1, pool_config=None, cassette_config=None,
+                 dataset_concurrency=1):
         """
         初始化测试用例执行器
         :param base_url: 基础URL
         :param timeout: 默认超时时间
+        :param step_concurrency: 用例内最大并发步骤数，大于1时按步骤依赖图并发执行互不依赖的步骤
+        :param pool_config: 连接池配置，见APITestClient
+        :param cassette_config: 录制/回放配置，见APITestClient
+        :param dataset_concurrency: 数据驱动用例中每批数据行的最大并发数
         """
-        self.test_client = APITestClient(base_url=base_url, timeout=timeout)
+        self.test_client = APITestClient(
+            base_url=base_url, timeout=timeout, pool_config=pool_config, cassette_config=cassette_config
+        )
         self.test_results = []
         self.context = {}  # 用于存储提取的变量
-
-    def replace_variables(self, data):
+        self.step_concurrency = max(1, int(step_concurrency))
+        self.dataset_concurrency = max(1, int(dataset_concurrency))
+        self._bundled_cases = {}  # 用例文件名 -> 预编译包中的(数据集配置, 测试步骤列表)
+        self.timing_summary = {}  # 接口名 -> 所有已执行用例的耗时直方图
+        self._timing_lock = threading.Lock()
+        self.history = None  # 执行历史，见use_history
+        self.run_id = None
+
+    def replace_variables(self, data, context=None):
         """
         替换数据中的变量占位符
         :param data: 需要替换的数据
+        :param context: 变量上下文，为空时使用self.context
         :return: 替换后的数据
         """
-        if isinstance(data, dict):
-            return {key: self.replace_variables(value) for key, value in data.items()}
-        elif isinstance(data, list):
-            return [self.replace_variables(item) for item in data]
-        elif isinstance(data, str):
-            # 使用正则表达式匹配 ${variable} 格式的变量
-            pattern = r'\$\{(\w+)\}'
-            matches = re.findall(pattern, data)
-            for var_name in matches:
-                if var_name in self.context:
-                    data = data.replace(f'${{{var_name}}}', str(self.context[var_name]))
-            return data
-        else:
-            return data
+        if context is None:
+            context = self.context
+        return compile_template(data).render(context)
+
+    @staticmethod
+    def compile_step(step: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        将步骤中的url_path、headers、data、params及期望结果assert_data预编译为变量模板，执行时一次渲染完成替换；
+        响应体结构一致断言的期望结构预编译为结构校验器；同时记录步骤消费与写入的上下文变量，用于前置变量不可用时提前跳过
+        :param step: 已加载接口定义的测试步骤
+        :return: 字段名 -> 渲染对象/校验器/变量名集合
+        """
+        actions = step.get('actions', {})
+        interface = actions.get('_interface') or {}
+        templates = {
+            'url_path': compile_template(interface.get('url_path', '')),
+            'headers': compile_template(thaw(interface.get('headers', {}))),
+            'data': compile_template(actions.get('data', None)),
+            'params': compile_template(actions.get('params', None)),
+            'assert_data': None,
+            'structure': None,
+            'consumes': frozenset(consumed_variables(step)),
+            'produces': frozenset(produced_variables(step)),
+        }
 
-    def extract_data(self, response, extract_rules):
+        expected_results = step.get('expected_results', {})
+        if expected_results.get('assert_form') != '响应体结构一致':
+            assert_data = compile_template(expected_results.get('assert_data'))
+            # 不含变量的期望结果直接使用原值
+            templates['assert_data'] = None if isinstance(assert_data, Constant) else assert_data
+        else:
+            # assert_options: collect_all 收集全部差异；max_list_items 校验实际列表的前K个元素
+            options = expected_results.get('assert_options', {})
+            templates['structure'] = StructureValidator(
+                expected_results.get('assert_data'),
+                collect_all=options.get('collect_all', False),
+                max_list_items=options.get('max_list_items', None)
+            )
+        return templates
+
+    def extract_data(self, response, extract_rules, context=None):
         """
-        从响应中提取数据并存储到上下文self.context字典中
+        从响应中提取数据并存储到上下文字典中
         :param response: 响应对象
         :param extract_rules: 提取规则字典
+        :param context: 变量上下文，为空时使用self.context
         """
         if not extract_rules:
             return
+        if context is None:
+            context = self.context
 
         try:
-            response_data = response.json()
-
+            # 收集所有规则的路径，一次遍历响应数据完成提取
+            paths = {}
+            convert_types = {}
             for target_key, rule in extract_rules.items():
                 # 支持直接设置值到context
                 if target_key.startswith('$$'):
-                    self.context[target_key[2:]] = rule
+                    context[target_key[2:]] = rule
                     continue
                 # 解析规则
                 if isinstance(rule, str):
@@ -81,14 +142,19 @@ class TestCaseExecutor:
                     logger.warning(f"{target_key} 的提取路径为空，跳过该项")
                     continue
 
-                # 提取值
-                value = extract_value(response_data, path)
+                paths[target_key] = path
+                convert_types[target_key] = convert_type
+
+            if not paths:
+                return
 
-                # 类型转换
-                value = convert_value(value, convert_type)
+            # 提取值，流式响应只增量解析提取路径涉及的部分
+            response_data = response.json_subset(paths_spec(paths.values()))
+            values = extract_values(response_data, paths)
 
-                # 存储到context
-                self.context[target_key] = value
+            for target_key, value in values.items():
+                # 类型转换并存储到context
+                context[target_key] = convert_value(value, convert_types[target_key])
 
         except Exception as e:
             logger.warning(f"提取数据时发生错误: {str(e)}")
@@ -97,14 +163,27 @@ class TestCaseExecutor:
         """
         加载测试用例JSON文件，支持引用其他JSON文件
         :param json_file_path: JSON文件路径
-        :return: 测试用例步骤列表
+        :return: 测试用例步骤列表（不含数据集声明）
+        """
+        return self.load_case(json_file_path)[1]
+
+    def load_case(self, json_file_path: str):
         """
+        加载测试用例JSON文件，并分离数据集声明
+        :param json_file_path: JSON文件路径
+        :return: (数据集配置或None, 测试步骤列表)
+        """
+        bundled = self._bundled_cases.get(json_file_path)
+        if bundled is not None:
+            # 预编译包中的步骤只读共享，执行时不修改
+            return bundled
+
         try:
             # 获取完整路径
             case_path = get_path('tests_data', 'API', json_file_path)
 
             # 处理引用并加载测试用例
-            test_case = handel_references(case_path)
+            dataset, test_case = split_dataset(handel_references(case_path))
 
             # 替换_interface字段为接口参数
             for i in range(len(test_case)):
@@ -115,82 +194,146 @@ class TestCaseExecutor:
                     logger.error(f"测试用例第{i+1}步缺少_interface字段。")
                     raise ValueError(f"测试用例第{i+1}步缺少_interface字段。")
 
-                with open(get_path('resources', 'api_interface', interface), 'r', encoding='utf-8') as f:
-                    test_case[i]['actions']['_interface'] = json.load(f)
+                # 接口定义由进程级注册表缓存，同一接口只解析一次
+                test_case[i]['actions']['_interface'] = interface_registry.get(interface)
+                # 保留接口名，用于按接口统计耗时
+                test_case[i]['_interface_name'] = interface
 
-            return test_case
+                # 加载时预编译变量模板
+                test_case[i]['_templates'] = self.compile_step(test_case[i])
+
+            return dataset, test_case
         except Exception as e:
             logger.error(f"加载测试用例失败: {str(e)}")
             raise
 
-    def execute_step(self, step: Dict[str, Any], step_number: int = 0) -> Dict[str, Any]:
+    @staticmethod
+    def missing_inputs(templates: Dict[str, Any], context: Dict[str, Any], unavailable: Dict[str, str]) -> Dict[str, str]:
+        """
+        检查步骤所需的上下文变量是否可用
+        :param templates: compile_step的返回值
+        :param context: 变量上下文
+        :param unavailable: 变量名 -> 不可用的根因，由之前请求失败、提取为空或被阻塞的步骤写入
+        :return: 不可用的变量名 -> 根因，全部可用时为空
+        """
+        missing = {}
+        for var_name in templates['consumes']:
+            if var_name in unavailable:
+                missing[var_name] = unavailable[var_name]
+            elif var_name in context and context[var_name] is None:
+                missing[var_name] = f"变量{var_name}的值为None"
+        return missing
+
+    def execute_step(self, step: Dict[str, Any], step_number: int = 0, context: Dict[str, Any] = None,
+                     unavailable: Dict[str, str] = None) -> Dict[str, Any]:
         """
         执行单个测试步骤，有断言则执行断言，最后返回step_result
+        所需变量因之前的步骤请求失败或提取为空而不可用时，不发送请求，步骤标记为阻塞（blocked_by为根因）
         :param step: 接口动作配置
         :param step_number: 接口动作配置
+        :param context: 变量上下文，为空时使用self.context
+        :param unavailable: 用例内不可用的变量名 -> 根因，本步骤失败时写入本步骤应产生的变量
         :return: step_result
         """
+        if context is None:
+            context = self.context
+        if unavailable is None:
+            unavailable = {}
         step_result = {
             'step_number': step_number,
             'action_info': step.get('actions', {}),
             'action_success': False,
             'assertions': [],
-            'error': None
+            'error': None,
+            'blocked_by': None,
+            'timing': None
         }
         method = step_result['action_info'].get('_interface').get('method', '').upper()
-        url_path = step_result['action_info'].get('_interface').get('url_path', '')
-        headers = step_result['action_info'].get('_interface').get('headers', {})
-        data = step_result['action_info'].get('data', None)
-        params = step_result['action_info'].get('params', None)
+        # 接口定义中"stream": true 时以流式模式读取响应体，未配置时使用客户端默认模式
+        stream = step_result['action_info'].get('_interface').get('stream', None)
         extract_rules = step_result['action_info'].get('extract', None)
 
-        # 替换变量：不为空且字典中的values中存在"$"时替换变量
-        if headers and [v for v in headers.values() if '$' in v]:
-            headers = self.replace_variables(headers)
-        if data and [v for v in data.values() if '$' in v]:
-            data = self.replace_variables(data)
-        if params and [v for v in params.values() if '$' in v]:
-            params = self.replace_variables(params)
+        # 使用加载时预编译的变量模板替换变量
+        templates = step.get('_templates') or self.compile_step(step)
+        step['_templates'] = templates
+
+        # 所需变量不可用时直接跳过，本步骤应产生的变量沿用同一根因，后续依赖的步骤同样跳过
+        missing = self.missing_inputs(templates, context, unavailable)
+        if missing:
+            root_cause = '；'.join(f"{var_name}: {cause}" for var_name, cause in sorted(missing.items()))
+            step_result['blocked_by'] = root_cause
+            step_result['error'] = f"前置变量不可用，未执行: {root_cause}"
+            # 本步骤应产生的变量记录最初的根因，不逐级嵌套
+            self._mark_unavailable(templates['produces'], unavailable, '；'.join(sorted(set(missing.values()))))
+            logger.warning("第%s步已阻塞，%s", step_number, step_result['error'])
+            return step_result
+        url_path = templates['url_path'].render(context)
+        headers = templates['headers'].render(context)
+        data = templates['data'].render(context)
+        params = templates['params'].render(context)
 
-        logger.info(f"开始执行第{step_result['step_number']}步")
-        logger.info(f"请求方法为{method}，请求路径为{url_path}")
+        # 请求与响应内容只在日志写入时格式化，超过长度上限时截断
+        logger.info("开始执行第%s步", step_result['step_number'])
+        logger.info("请求方法为%s，请求路径为%s", method, url_path)
 
         if data:
-            logger.info(f"请求头headers为{headers}，请求数据data为{data}")
+            logger.info("请求头headers为%s，请求数据data为%s", LazyPayload(headers), LazyPayload(data))
         if params:
-            logger.info(f"请求头headers为{headers}，请求数据params为{params}")
+            logger.info("请求头headers为%s，请求数据params为%s", LazyPayload(headers), LazyPayload(params))
 
-        # 发送请求
+        # 发送请求，使用无状态请求方法，响应只在本步骤内传递
+        response = None
         try:
             if method == 'GET':
-                self.test_client.get(url_path, params=params, headers=headers)
+                response = self.test_client.send('GET', url_path, params=params, headers=headers, stream=stream)
             elif method == 'POST':
                 content_type = headers.get('content-type', 'application/json')
                 if 'application/json' in content_type:
-                    self.test_client.post(url_path, json_data=data, headers=headers)
+                    response = self.test_client.send('POST', url_path, json_data=data, headers=headers, stream=stream)
                 else:
-                    self.test_client.post(url_path, data=data, headers=headers)
+                    response = self.test_client.send('POST', url_path, data=data, headers=headers, stream=stream)
             else:
                 logger.error(f"不支持的HTTP方法: {method}")
+                self._mark_unavailable(templates['produces'], unavailable, f"第{step_number}步不支持的HTTP方法{method}")
 
-            if self.test_client.response:
-                logger.info(f"响应内容为: {self.test_client.response.text}")
+            if method in ('GET', 'POST'):
+                # 记录本次请求的耗时分解（建连、首字节、传输、总耗时与字节数）
+                step_result['timing'] = self.test_client.last_timing
+                if step_result['timing']:
+                    logger.info("请求耗时: %s", _TimingText(step_result['timing']))
+
+            if response:
+                logger.info("响应内容为: %s", LazyPayload(response.text_for_log))
                 step_result['action_success'] = True
 
-                # 提取数据
+                # 提取数据，提取结果为None的变量记为不可用
                 if extract_rules:
-                    self.extract_data(self.test_client.response, extract_rules)
+                    self.extract_data(response, extract_rules, context)
+                    for var_name in templates['produces']:
+                        if context.get(var_name) is None:
+                            unavailable[var_name] = f"第{step_number}步提取{var_name}的结果为None"
+                        else:
+                            unavailable.pop(var_name, None)
+            elif method in ('GET', 'POST'):
+                cause = f"第{step_number}步请求失败" if response is None else \
+                    f"第{step_number}步响应状态码为{response.status_code}"
+                self._mark_unavailable(templates['produces'], unavailable, cause)
 
         except Exception as e:
             logger.warning(f"请求执行失败: {str(e)}")
             step_result['action_success'] = False
+            self._mark_unavailable(templates['produces'], unavailable, f"第{step_number}步请求失败: {str(e)}")
             return step_result
 
         try:
             # 执行断言
             expected_results = step.get('expected_results', {})
+            if expected_results and templates.get('assert_data') is not None:
+                expected_results = {**expected_results, 'assert_data': templates['assert_data'].render(context)}
             if expected_results:
-                step_result['assertions'].append(self.perform_assertion(expected_results))
+                step_result['assertions'].append(
+                    self.perform_assertion(expected_results, response, templates['structure'])
+                )
         except Exception as e:
             step_result['error'] = str(e)
             logger.error(f"第{step_result['step_number']}步执行断言时发生异常: {str(e)}")
@@ -198,29 +341,70 @@ class TestCaseExecutor:
 
         return step_result
 
-    def perform_assertion(self, expected_results):
+    @staticmethod
+    def _mark_unavailable(var_names, unavailable: Dict[str, str], cause: str):
+        """步骤失败时，将其应产生的变量记为不可用"""
+        for var_name in var_names:
+            unavailable[var_name] = cause
+
+    def execute_steps_parallel(self, test_steps: List[Dict[str, Any]], context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        按步骤依赖图并发执行步骤：通过extract→${var}关联的步骤按顺序执行，其余步骤并发执行
+        :param test_steps: 测试步骤列表
+        :param context: 用例的变量上下文
+        :return: 与test_steps顺序一致的step_result列表
+        """
+        dependencies = build_step_graph(test_steps)
+        unavailable = {}  # 变量名 -> 不可用的根因，依赖该变量的步骤在生产步骤完成后才提交，读取时已写入
+        step_results = [None] * len(test_steps)
+        pending = set(range(len(test_steps)))
+        finished = set()
+        running = {}  # future -> 步骤下标
+
+        with ThreadPoolExecutor(max_workers=self.step_concurrency) as pool:
+            while pending or running:
+                # 提交所有依赖已完成的步骤
+                ready = sorted(index for index in pending if dependencies[index] <= finished)
+                for index in ready:
+                    pending.remove(index)
+                    future = pool.submit(self.execute_step, test_steps[index], index + 1, context, unavailable)
+                    running[future] = index
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    step_results[index] = future.result()
+                    finished.add(index)
+
+        return step_results
+
+    def perform_assertion(self, expected_results, response=None, structure_validator=None):
         """
         执行断言
         :param expected_results: 期望结果配置
+        :param response: 响应对象，为空时使用self.test_client.response
+        :param structure_validator: 预编译的结构校验器，用于响应体结构一致断言
         """
-        if not self.test_client.response:
+        if response is None:
+            response = self.test_client.response
+        if not response:
             logger.error("无法执行断言: 响应对象为空")
             return
         assert_form = expected_results.get('assert_form')
         assert_data = expected_results.get('assert_data')
 
-        logger.info(f"断言方式: {assert_form}")
-        logger.info(f"期望结果: {assert_data}")
+        logger.info("断言方式: %s", assert_form)
+        logger.info("期望结果: %s", LazyPayload(assert_data))
 
         # 根据断言形式选择对应的断言方法
         if assert_form == '响应状态码等于':
-            assert_result = self.test_client.response_status_equal(assert_data)
+            assert_result = self.test_client.response_status_equal(assert_data, response)
         elif assert_form == '响应体结构一致':
-            assert_result = self.test_client.response_json_structure(assert_data)
+            assert_result = self.test_client.response_json_structure(assert_data, response, structure_validator)
         elif assert_form == '响应体内容包含':
-            assert_result = self.test_client.response_text_contents(assert_data)
+            assert_result = self.test_client.response_text_contents(assert_data, response)
         elif assert_form == '响应体有键值对':
-            assert_result = self.test_client.equals_key_value(assert_data)
+            assert_result = self.test_client.equals_key_value(assert_data, response)
         elif assert_form == 'databases_equal':
             assert_result = self.test_client.databases_equal()
         elif assert_form == 'databases_contents':
@@ -235,12 +419,16 @@ class TestCaseExecutor:
 
         return assert_result
 
-    def execute_test_case(self, json_file_path: str):
+    def execute_test_case(self, json_file_path: str, context: Dict[str, Any] = None):
         """
         执行测试用例
         :param json_file_path: 测试用例数据
+        :param context: 用例的变量上下文，为空时使用self.context（顺序执行时用例间共享）
         """
+        if context is None:
+            context = self.context
         case_name = json_file_path[:-5]
+        started = time.perf_counter()
 
         logger.info(f"{'=' * 50}")
         logger.info(f"开始执行测试用例: {case_name}")
@@ -251,29 +439,34 @@ class TestCaseExecutor:
             'total_steps': 0,
             'passed_steps': 0,
             'failed_steps': 0,
+            'blocked_steps': 0,
             'step_results': [],
-            'overall_success': False
+            'overall_success': False,
+            'timings': {},
+            'duration': 0.0
         }
 
         try:
             # 加载测试用例
-            test_steps = self.load_test_case(json_file_path)
-            test_case_result['total_steps'] = len(test_steps)
-
-            # 执行每个步骤
-            for step in test_steps:
-                step_result = self.execute_step(step, test_steps.index(step) + 1)
-                test_case_result['step_results'].append(step_result)
+            dataset, test_steps = self.load_case(json_file_path)
 
-                # 统计成功/失败的步骤
-                if step_result['action_success'] and all(assertion for assertion in step_result['assertions']):
-                    test_case_result['passed_steps'] += 1
-                else:
-                    test_case_result['failed_steps'] += 1
+            if dataset:
+                # 数据驱动用例：数据集每一行执行一遍所有步骤
+                self.execute_dataset(case_name, dataset, test_steps, context, test_case_result)
+            else:
+                test_case_result['total_steps'] = len(test_steps)
+                step_results = self.execute_steps(test_steps, context)
+                test_case_result['step_results'] = step_results
+                self._tally(test_case_result, test_steps, step_results)
+                if self.history is not None:
+                    self.history.record_steps(self.run_id, json_file_path, step_outcomes(test_steps, step_results))
 
             # 判断整体测试结果
             test_case_result['overall_success'] = test_case_result['failed_steps'] == 0
 
+            with self._timing_lock:
+                merge_histograms(self.timing_summary, test_case_result['timings'])
+
             # 记录测试结果
             if test_case_result['overall_success']:
                 logger.info(f"测试用例【{case_name}】执行成功.")
@@ -285,54 +478,179 @@ class TestCaseExecutor:
             logger.error(traceback.format_exc())
             test_case_result['overall_success'] = False
             test_case_result['error'] = str(e)
+        # 用例耗时（秒），异步模式下用例在夹具中统一执行，以此作为各用例的耗时
+        test_case_result['duration'] = time.perf_counter() - started
         # logger.debug(f'测试用例 {case_name} 执行结果: {test_case_result}')
 
         return test_case_result
 
+    def use_bundle(self, bundle):
+        """
+        使用测试计划预编译包中的用例，包中没有的用例仍按原方式加载
+        :param bundle: core.plan_bundle.PlanBundle
+        """
+        self._bundled_cases.update(bundle.cases)
+
+    def use_history(self, history, run_id):
+        """
+        执行后将各步骤的耗时与结果写入执行历史
+        :param history: core.run_history.RunHistory
+        :param run_id: 执行标识
+        """
+        self.history = history
+        self.run_id = run_id
+
+    def execute_steps(self, test_steps: List[Dict[str, Any]], context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        执行用例的所有步骤
+        :param test_steps: 测试步骤列表
+        :param context: 变量上下文
+        :return: 与test_steps顺序一致的step_result列表
+        """
+        if self.step_concurrency > 1 and len(test_steps) > 1:
+            return self.execute_steps_parallel(test_steps, context)
+        unavailable = {}  # 变量名 -> 不可用的根因
+        return [
+            self.execute_step(step, step_number, context, unavailable)
+            for step_number, step in enumerate(test_steps, start=1)
+        ]
+
+    @staticmethod
+    def _tally(test_case_result, test_steps, step_results) -> bool:
+        """
+        统计步骤结果并按接口汇总耗时直方图
+        :return: 所有步骤是否都成功
+        """
+        all_passed = True
+        for step, step_result in zip(test_steps, step_results):
+            # 按接口汇总耗时直方图
+            if step_result.get('timing'):
+                histogram = test_case_result['timings'].setdefault(step.get('_interface_name'), new_histogram())
+                add_timing(histogram, step_result['timing'])
+
+            # 统计成功/失败的步骤，阻塞的步骤计入失败
+            if step_result['action_success'] and all(assertion for assertion in step_result['assertions']):
+                test_case_result['passed_steps'] += 1
+            else:
+                test_case_result['failed_steps'] += 1
+                if step_result.get('blocked_by'):
+                    test_case_result['blocked_steps'] += 1
+                all_passed = False
+        return all_passed
+
+    def execute_dataset(self, case_name: str, dataset: Dict[str, Any], test_steps: List[Dict[str, Any]],
+                        context: Dict[str, Any], test_case_result: Dict[str, Any]):
+        """
+        执行数据驱动用例：数据集按行惰性读取、按批分发，每行使用独立的上下文（行数据覆盖用例上下文），
+        只保留汇总结果与前MAX_ROW_FAILURES个失败行，每行的结果逐行写入reports/datasets（分片执行时为分片目录下的datasets）下的jsonl文件
+        :param case_name: 用例名
+        :param dataset: 数据集配置 {'file': 数据集路径, 'batch_size': 每批行数, 'concurrency': 每批并发数}
+        :param test_steps: 测试步骤列表
+        :param context: 用例的变量上下文
+        :param test_case_result: 用例结果，写入rows汇总
+        """
+        path = dataset_path(dataset['file'])
+        batch_size = dataset.get('batch_size', DEFAULT_BATCH_SIZE)
+        concurrency = max(1, int(dataset.get('concurrency', self.dataset_concurrency)))
+
+        outcome_dir = report_path('datasets')
+        os.makedirs(outcome_dir, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        outcome_file = f"{outcome_dir}/{case_name.replace('/', '_')}_{timestamp}.jsonl"
+        rows_summary = {'dataset': dataset['file'], 'total': 0, 'passed': 0, 'failed': 0,
+                        'failures': [], 'outcome_file': outcome_file}
+        test_case_result['rows'] = rows_summary
+        logger.info(f"数据驱动用例【{case_name}】数据集: {path}，每批{batch_size}行，并发数{concurrency}")
+
+        def run_row(row):
+            return self.execute_steps(test_steps, {**context, **row})
+
+        with open(outcome_file, 'w', encoding='utf-8') as outcome, \
+                ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for batch in batched(iter_rows(path), batch_size):
+                for row, step_results in zip(batch, pool.map(run_row, batch)):
+                    rows_summary['total'] += 1
+                    row_number = rows_summary['total']
+                    test_case_result['total_steps'] += len(test_steps)
+                    passed = self._tally(test_case_result, test_steps, step_results)
+                    failed_steps = [result['step_number'] for result in step_results
+                                    if not (result['action_success'] and all(result['assertions']))]
+                    outcome.write(json.dumps({'row': row_number, 'passed': passed, 'failed_steps': failed_steps},
+                                             ensure_ascii=False) + '\n')
+                    if passed:
+                        rows_summary['passed'] += 1
+                        continue
+                    rows_summary['failed'] += 1
+                    if len(rows_summary['failures']) < MAX_ROW_FAILURES:
+                        rows_summary['failures'].append({
+                            'row': row_number,
+                            'data': row,
+                            'failed_steps': failed_steps,
+                            'errors': [result['error'] for result in step_results if result.get('error')],
+                        })
+
+        logger.info(f"数据驱动用例【{case_name}】共{rows_summary['total']}行，"
+                    f"通过{rows_summary['passed']}行，失败{rows_summary['failed']}行，逐行结果: {outcome_file}")
+
+    def execute_test_cases(self, case_files: List[str], max_workers: int = 10) -> List[Dict[str, Any]]:
+        """
+        使用线程池并发执行多个测试用例，所有线程共用self.test_client，每个用例使用独立的上下文
+        :param case_files: 测试用例文件名列表
+        :param max_workers: 最大线程数
+        :return: 与case_files顺序一致的test_case_result列表
+        """
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            return list(pool.map(lambda case: self.execute_test_case(case, {}), case_files))
+
+    def warm_up(self, connections=None):
+        """预先建立长连接，见APITestClient.warm_up"""
+        return self.test_client.warm_up(connections)
+
+    def pool_stats(self):
+        """连接池复用统计，见APITestClient.pool_stats"""
+        return self.test_client.pool_stats()
+
+    def timing_stats(self):
+        """
+        已执行用例按接口汇总的耗时直方图
+        :return: 接口名 -> 直方图，见core.request_timing.new_histogram
+        """
+        with self._timing_lock:
+            return {
+                interface: {**histogram, 'buckets': list(histogram['buckets'])}
+                for interface, histogram in self.timing_summary.items()
+            }
+
     def close(self):
         """关闭HTTP客户端"""
         self.test_client.close()
 
 
-def extract_value(data, path):
-    """递归地从嵌套结构中提取值"""
-    if not path:
-        return data
-
-    parts = path.split('.')
-    current = data
-
-    for part in parts:
-        # 处理数组索引，如 list[0]
-        if '[' in part and ']' in part:
-            key = part.split('[')[0]
-            if key and key in current:
-                current = current[key]
-
-            # 处理多个数组索引，如 list[0][1]
-            while '[' in part:
-                start = part.find('[')
-                end = part.find(']')
-                if start != -1 and end != -1:
-                    index_str = part[start + 1:end]
-                    try:
-                        index = int(index_str)
-                        if isinstance(current, list) and 0 <= index < len(current):
-                            current = current[index]
-                        else:
-                            return None
-                    except (ValueError, TypeError):
-                        return None
-                    part = part[end + 1:]
-                else:
-                    break
-        else:
-            if isinstance(current, dict) and part in current:
-                current = current[part]
-            else:
-                return None
+class _TimingText:
+    """耗时分解的日志文本，写入日志时才格式化"""
+    __slots__ = ('timing',)
+
+    def __init__(self, timing):
+        self.timing = timing
+
+    def __str__(self):
+        return _format_timing(self.timing)
+
 
-    return current
+def _format_timing(timing):
+    """耗时分解的日志文本"""
+    parts = [f"{'新建连接' if timing['new_connection'] else '复用连接'}"]
+    if timing['new_connection']:
+        parts.append(f"建连{timing['connect_ms']:.1f}ms")
+    if timing['ttfb_ms'] is not None:
+        parts.append(f"首字节{timing['ttfb_ms']:.1f}ms，传输{timing['transfer_ms']:.1f}ms")
+    parts.append(f"总计{timing['total_ms']:.1f}ms，请求{timing['request_bytes']}字节，响应{timing['response_bytes']}字节")
+    return '，'.join(parts)
+
+
+def extract_value(data, path):
+    """从嵌套结构中提取值，路径支持 data[0].items[3].id、通配 data[*].orderId 与切片 data[0:3].id"""
+    return extract_path(data, path)
 
 
 def convert_value(value, convert_type):
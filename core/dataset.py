@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+数据驱动用例的数据集读取
+用例中以 {"_dataset": "datasets/login_users.csv"} 声明数据集，数据集每一行绑定到步骤中的 ${变量}；
+CSV/JSONL按行惰性读取，内存占用与数据集行数无关
+"""
+import os
+import csv
+import json
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from utils.path_util import get_path
+
+DEFAULT_BATCH_SIZE = 100
+
+
+def split_dataset(test_case: List[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    从用例中分离数据集声明
+    :param test_case: 处理引用后的用例步骤列表
+    :return: (数据集配置或None, 测试步骤列表)；数据集配置为 {'file': 路径, 'batch_size': 每批行数}
+    """
+    dataset = None
+    steps = []
+    for item in test_case:
+        if isinstance(item, dict) and '_dataset' in item:
+            if dataset is None:
+                declared = item['_dataset']
+                dataset = dict(declared) if isinstance(declared, dict) else {'file': declared}
+            continue
+        steps.append(item)
+    if dataset is not None and not dataset.get('file'):
+        raise ValueError("_dataset缺少数据集文件路径")
+    return dataset, steps
+
+
+def dataset_path(file: str) -> str:
+    """数据集文件的完整路径，相对路径以tests_data/API为根目录"""
+    return file if os.path.isabs(file) else get_path('tests_data', 'API', file)
+
+
+def iter_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    逐行读取数据集，文件在生成器结束或关闭时关闭
+    .csv 首行为表头，值均为字符串；.jsonl 每行一个JSON对象，空行跳过
+    :param path: 数据集文件路径
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        with open(path, 'r', encoding='utf-8-sig', newline='') as file:
+            yield from csv.DictReader(file)
+    elif extension in ('.jsonl', '.ndjson'):
+        with open(path, 'r', encoding='utf-8') as file:
+            for line_number, line in enumerate(file, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError(f"数据集{path}第{line_number}行不是JSON对象")
+                yield row
+    else:
+        raise ValueError(f"不支持的数据集格式: {path}，仅支持.csv与.jsonl")
+
+
+def batched(rows: Iterator[Any], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Any]]:
+    """
+    将行按批次分组，每次只持有一批
+    :param rows: 行迭代器
+    :param batch_size: 每批行数
+    """
+    rows = iter(rows)
+    batch_size = max(1, int(batch_size))
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def describe_row_failures(case_result: Dict[str, Any]) -> str:
+    """
+    数据驱动用例的逐行结果描述，用于pytest断言信息
+    :param case_result: execute_test_case返回的test_case_result
+    """
+    rows = case_result.get('rows')
+    if not rows:
+        return case_result.get('error', '')
+    lines = [f"数据集{rows['dataset']}共{rows['total']}行，通过{rows['passed']}行，失败{rows['failed']}行"]
+    for failure in rows['failures']:
+        lines.append(f"第{failure['row']}行失败，失败步骤{failure['failed_steps']}，数据: {failure['data']}")
+    if rows['failed'] > len(rows['failures']):
+        lines.append(f"其余{rows['failed'] - len(rows['failures'])}个失败行见逐行结果文件")
+    lines.append(f"逐行结果: {rows['outcome_file']}")
+    return '\n'.join(lines)
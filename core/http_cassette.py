@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP请求录制/回放
+录制模式下真实发送请求，并将请求/响应保存到sqlite文件；回放模式下按
+（请求方法、规范化URL、规范化请求体哈希）查找已录制的响应直接返回，不产生任何网络请求
+"""
+import io
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.exceptions import ConnectionError
+from urllib3.response import HTTPResponse
+from urllib3._collections import HTTPHeaderDict
+
+# 录制：每个请求都真实发送并保存，同键的记录保存最后一次的响应
+RECORD = 'record'
+# 回放：只从录制文件返回响应，未录制的请求视为连接失败
+REPLAY = 'replay'
+# 自动：已录制的请求回放，未录制的请求真实发送并保存
+AUTO = 'auto'
+
+MODES = (RECORD, REPLAY, AUTO)
+
+
+class CassetteMiss(ConnectionError):
+    """回放模式下请求未录制"""
+
+
+def normalize_url(url: str) -> str:
+    """规范化URL：scheme与host小写，查询参数按键排序，去掉片段"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', query, ''))
+
+
+def body_hash(body, content_type='') -> str:
+    """
+    规范化请求体并计算哈希：JSON按键排序后序列化，表单按键排序，其余按原始字节
+    :param body: PreparedRequest.body
+    :param content_type: 请求的Content-Type
+    """
+    if body is None:
+        return ''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    if not isinstance(body, bytes):
+        # 文件或生成器请求体无法重复读取，不参与匹配
+        return 'stream'
+    if 'json' in content_type:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        except ValueError:
+            pass
+    elif 'x-www-form-urlencoded' in content_type:
+        body = urlencode(sorted(parse_qsl(body.decode('utf-8', errors='replace'), keep_blank_values=True))).encode()
+    return hashlib.sha1(body).hexdigest()
+
+
+def request_key(request) -> str:
+    """请求在录制文件中的键"""
+    content_type = request.headers.get('Content-Type', '') or ''
+    return f"{request.method.upper()} {normalize_url(request.url)} {body_hash(request.body, content_type)}"
+
+
+class Cassette:
+    def __init__(self, path):
+        """
+        sqlite录制文件，响应体以zlib压缩保存
+        :param path: 录制文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS interactions ('
+            'key TEXT PRIMARY KEY, method TEXT, url TEXT, status INTEGER, reason TEXT, '
+            'headers TEXT, body BLOB, recorded_at REAL)'
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        """
+        查找已录制的响应
+        :param key: request_key生成的键
+        :return: (状态码, 原因短语, 响应头列表, 响应体) 或 None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status, reason, headers, body FROM interactions WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, reason, headers, body = row
+        return status, reason, json.loads(headers), zlib.decompress(body)
+
+    def put(self, key, method, url, status, reason, headers, body):
+        """保存一次请求/响应，headers为[(键, 值), ...]"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO interactions VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, method, url, status, reason, json.dumps(headers, ensure_ascii=False),
+                 zlib.compress(body), time.time())
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM interactions').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CassetteAdapter(BaseAdapter):
+    def __init__(self, cassette: Cassette, mode: str, adapter: HTTPAdapter):
+        """
+        录制/回放传输适配器，包装实际发送请求的适配器
+        :param cassette: 录制文件
+        :param mode: record、replay或auto
+        :param adapter: 实际发送请求的适配器
+        """
+        super().__init__()
+        if mode not in MODES:
+            raise ValueError(f"不支持的录制模式: {mode}，可选值: {MODES}")
+        self.cassette = cassette
+        self.mode = mode
+        self.adapter = adapter
+        # auto模式下请求键 -> 锁，未录制的相同请求并发时只有一个线程发送
+        self._recorded = {}
+        self._recorded_lock = threading.Lock()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        key = request_key(request)
+        if self.mode == REPLAY:
+            recorded = self.cassette.get(key)
+            if recorded is None:
+                raise CassetteMiss(f"请求未录制: {key}", request=request)
+            return self._build_response(request, *recorded)
+
+        if self.mode == RECORD:
+            # 录制模式下不从录制文件返回响应，重复的请求（如轮询、非幂等请求）也真实发送
+            return self._record(key, request, timeout, verify, cert, proxies)
+
+        with self._recorded_lock:
+            key_lock = self._recorded.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # auto模式下已有记录即回放
+            recorded = self.cassette.get(key)
+            if recorded is not None:
+                return self._build_response(request, *recorded)
+            return self._record(key, request, timeout, verify, cert, proxies)
+
+    def _record(self, key, request, timeout, verify, cert, proxies):
+        """真实发送请求并保存"""
+        # 以流式读取原始（未解压）响应体保存，回放时由urllib3按Content-Encoding解压
+        response = self.adapter.send(request, stream=True, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        body = response.raw.read(decode_content=False)
+        response.close()
+        headers = list(response.raw.headers.items())
+        self.cassette.put(key, request.method, request.url, response.status_code, response.reason, headers, body)
+        return self._build_response(request, response.status_code, response.reason, headers, body)
+
+    def _build_response(self, request, status, reason, headers, body):
+        """由录制内容构造requests.Response，流式与非流式读取均可用"""
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=HTTPHeaderDict(headers),
+            status=status,
+            reason=reason,
+            preload_content=False,
+            decode_content=True,
+            request_url=request.url,
+        )
+        return self.adapter.build_response(request, raw)
+
+    def __getattr__(self, name):
+        # 连接池统计等方法由被包装的适配器提供
+        return getattr(self.adapter, name)
+
+    def close(self):
+        self.adapter.close()
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+import time
+import socket
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests import Request
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from core.request_timing import record_connect, record_first_byte
+
+logger = logging.getLogger('http_client')
+
+# 默认连接池配置
+DEFAULT_POOL_CONFIG = {
+    'pool_connections': 10,  # 缓存的连接池（host）个数
+    'pool_maxsize': 10,  # 每个连接池保留的最大连接数
+    'pool_block': False,  # 连接数达到上限时是否阻塞等待空闲连接
+    'keep_alive': True,  # 是否保持长连接（HTTP keep-alive与TCP keepalive）
+}
+
+
+class _TimedConnectionMixin:
+    """记录建连耗时与首字节时间点，建连成功后通知所属连接池计数"""
+    on_connect = None
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            # 建连失败（超时、拒绝连接）时同样记录为新建连接及其耗时，请求计时中可以看到失败前等待的时间
+            record_connect(time.perf_counter() - started)
+        if self.on_connect is not None:
+            self.on_connect()
+
+    def getresponse(self, *args, **kwargs):
+        response = super().getresponse(*args, **kwargs)
+        record_first_byte()
+        return response
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _SocketCountingMixin:
+    """
+    统计实际建立的socket连接数：服务端关闭连接后，http.client会用同一个连接对象自动重连，
+    urllib3的num_connections只统计连接对象个数，无法反映这类重连
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.num_socket_connections = 0
+        self._socket_count_lock = threading.Lock()
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        conn.on_connect = self._count_socket_connection
+        return conn
+
+    def _count_socket_connection(self):
+        # 各请求线程并发建连
+        with self._socket_count_lock:
+            self.num_socket_connections += 1
+
+
+class TimedHTTPConnectionPool(_SocketCountingMixin, HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(_SocketCountingMixin, HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True, **kwargs):
+        """
+        可配置连接池的HTTPAdapter
+        :param pool_connections: 缓存的连接池（host）个数
+        :param pool_maxsize: 每个连接池保留的最大连接数
+        :param pool_block: 连接数达到上限时是否阻塞等待空闲连接
+        :param keep_alive: 是否保持长连接，False时每个请求发送 Connection: close
+        """
+        self.keep_alive = keep_alive
+        self.warmed_connections = {}  # 连接池地址 -> 预建连接数
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block, **kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        if self.keep_alive:
+            # 开启TCP keepalive，避免空闲连接被中间设备静默断开
+            pool_kwargs.setdefault(
+                'socket_options', HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+            )
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        # 使用计时连接，记录每个请求的建连与首字节耗时
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        if not self.keep_alive:
+            request.headers['Connection'] = 'close'
+        return super().send(request, **kwargs)
+
+    def warm_up(self, url, connections=None, timeout=10, verify=True):
+        """
+        预先建立连接并放入连接池，使首个请求不再承担TCP/TLS建连耗时
+        :param url: 目标地址
+        :param connections: 预建连接数，默认为pool_maxsize
+        :param timeout: 建连超时时间（秒）
+        :param verify: 证书校验设置，需与发送请求时一致（参与连接池的区分）
+        :return: 成功建立的连接数
+        """
+        if not self.keep_alive:
+            return 0
+        pool = self._request_pool(url, verify)
+        count = min(connections or self._pool_maxsize, self._pool_maxsize)
+
+        def open_connection(_):
+            conn = pool._new_conn()
+            conn.timeout = timeout
+            try:
+                conn.connect()
+            except Exception as e:
+                logger.warning(f"预建连接失败: {url} - {str(e)}")
+                conn.close()
+                return None
+            return conn
+
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            opened = [conn for conn in executor.map(open_connection, range(count)) if conn is not None]
+        for conn in opened:
+            pool._put_conn(conn)
+
+        address = self._pool_address(pool)
+        self.warmed_connections[address] = self.warmed_connections.get(address, 0) + len(opened)
+        return len(opened)
+
+    def _request_pool(self, url, verify=True):
+        """获取发送请求时实际使用的连接池（连接池按TLS等参数区分，需与send的取法一致）"""
+        request = Request('GET', url).prepare()
+        if hasattr(self, 'get_connection_with_tls_context'):
+            return self.get_connection_with_tls_context(request, verify=verify)
+        return self.get_connection(request.url)
+
+    @staticmethod
+    def _pool_address(pool):
+        return f"{pool.scheme}://{pool.host}:{pool.port}"
+
+    def pool_stats(self):
+        """
+        连接池统计
+        :return: {host: {'requests': 请求数, 'new_connections': 新建连接数, 'warmed_connections': 预建连接数,
+                         'reused_connections': 复用连接的请求数, 'idle_connections': 空闲连接数}}
+        """
+        stats = {}
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            # 同一地址可能因TLS等参数不同存在多个连接池，按地址合并
+            address = self._pool_address(pool)
+            item = stats.setdefault(address, {'requests': 0, 'connections': 0, 'idle_connections': 0})
+            item['requests'] += pool.num_requests
+            item['connections'] += getattr(pool, 'num_socket_connections', pool.num_connections)
+            item['idle_connections'] += pool.pool.qsize() if pool.pool is not None else 0
+
+        for address, item in stats.items():
+            warmed = self.warmed_connections.get(address, 0)
+            # 建连数包含预建连接，请求时新建的连接数需扣除预建部分
+            new_connections = max(0, item.pop('connections') - warmed)
+            item.update({
+                'new_connections': new_connections,
+                'warmed_connections': warmed,
+                'reused_connections': max(0, item['requests'] - new_connections),
+            })
+        return stats
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import logging
+import threading
+from types import MappingProxyType
+from collections.abc import Mapping
+from utils.path_util import get_path
+from utils.file_utils import file_stamp, content_hash
+
+logger = logging.getLogger('api_test_executor')
+
+
+def freeze(data):
+    """将接口定义转换为不可变视图：字典转为MappingProxyType，列表转为元组"""
+    if isinstance(data, dict):
+        return MappingProxyType({key: freeze(value) for key, value in data.items()})
+    if isinstance(data, list):
+        return tuple(freeze(item) for item in data)
+    return data
+
+
+def thaw(data):
+    """将不可变视图还原为可修改的字典与列表"""
+    if isinstance(data, Mapping):
+        return {key: thaw(value) for key, value in data.items()}
+    if isinstance(data, tuple):
+        return [thaw(item) for item in data]
+    return data
+
+
+class InterfaceRegistry:
+    def __init__(self, root_dir=None):
+        """
+        进程级接口定义注册表，每个接口定义文件只解析一次
+        文件修改时间或大小变化时重新读取，内容哈希也变化时才重新解析
+        :param root_dir: 接口定义根目录，默认为resources/api_interface
+        """
+        self.root_dir = root_dir or get_path('resources', 'api_interface')
+        self._entries = {}  # 接口路径 -> (文件标识, 内容哈希, 不可变视图)
+        self._lock = threading.Lock()
+        self.disk_reads = 0
+
+    def get(self, interface: str):
+        """
+        获取接口定义的不可变视图
+        :param interface: resources/api_interface下的接口路径，如 order_service/orderCreate.json
+        :return: MappingProxyType
+        """
+        path = os.path.join(self.root_dir, interface)
+        stamp = file_stamp(path)
+        entry = self._entries.get(interface)
+        if entry is not None and entry[0] == stamp:
+            return entry[2]
+
+        with self._lock:
+            entry = self._entries.get(interface)
+            if entry is not None and entry[0] == stamp:
+                return entry[2]
+
+            with open(path, 'rb') as f:
+                content = f.read()
+            self.disk_reads += 1
+            digest = content_hash(content)
+
+            if entry is not None and entry[1] == digest:
+                view = entry[2]
+            else:
+                view = freeze(json.loads(content.decode('utf-8')))
+                logger.debug(f"加载接口定义: {interface}")
+
+            self._entries[interface] = (stamp, digest, view)
+            return view
+
+    def source(self, interface: str):
+        """
+        获取接口定义文件的路径、文件标识与内容哈希，接口未加载时先加载
+        :param interface: 接口路径
+        :return: (文件路径, 文件标识, 内容哈希)
+        """
+        self.get(interface)
+        stamp, digest, _ = self._entries[interface]
+        return os.path.abspath(os.path.join(self.root_dir, interface)), stamp, digest
+
+    def invalidate(self, interface: str = None):
+        """
+        清除缓存的接口定义
+        :param interface: 接口路径，为空时清除全部
+        """
+        with self._lock:
+            if interface is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(interface, None)
+
+
+# 进程内共享的接口定义注册表
+interface_registry = InterfaceRegistry()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+响应数据提取路径
+路径如 data[0].items[3].id 预编译为访问器元组并缓存；支持通配 data[*].orderId 与切片 data[0:3].id，
+多条路径在一次遍历中同时求值
+"""
+import re
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+KEY = 'key'
+INDEX = 'index'
+SLICE = 'slice'
+WILDCARD = 'wildcard'
+
+# 路径中不存在的值
+MISSING = object()
+
+_BRACKET_PATTERN = re.compile(r'\[([^\]]*)\]')
+
+
+def _compile_bracket(content: str):
+    """编译[]中的内容为访问器"""
+    content = content.strip()
+    if content == '*':
+        return WILDCARD, None
+    if ':' in content:
+        parts = [int(part) if part.strip() else None for part in content.split(':')]
+        if len(parts) > 3:
+            raise ValueError(content)
+        # 切片参数以元组保存，使访问器可哈希
+        return SLICE, tuple(parts)
+    return INDEX, int(content)
+
+
+@lru_cache(maxsize=1024)
+def compile_path(path: str) -> Tuple[tuple, ...]:
+    """
+    将提取路径编译为访问器元组，相同路径只编译一次
+    :param path: 提取路径，如 data[0].items[*].id，也兼容 list_data.0 形式的列表下标
+    :return: ((类型, 参数), ...)
+    """
+    accessors = []
+    if not path:
+        return ()
+
+    for part in path.split('.'):
+        bracket_start = part.find('[')
+        key = part if bracket_start == -1 else part[:bracket_start]
+        if key:
+            accessors.append((KEY, key))
+        if bracket_start != -1:
+            for content in _BRACKET_PATTERN.findall(part[bracket_start:]):
+                try:
+                    accessors.append(_compile_bracket(content))
+                except ValueError:
+                    raise ValueError(f"提取路径格式错误: {path}")
+
+    return tuple(accessors)
+
+
+def _is_fan_out(accessor) -> bool:
+    return accessor[0] in (WILDCARD, SLICE)
+
+
+def _step(current, accessor):
+    """执行单个非展开访问器，不存在时返回MISSING"""
+    kind, arg = accessor
+    if kind == KEY:
+        if isinstance(current, dict):
+            return current.get(arg, MISSING)
+        # 兼容 list_data.0 形式的列表下标
+        if isinstance(current, list) and arg.lstrip('-').isdigit():
+            kind, arg = INDEX, int(arg)
+        else:
+            return MISSING
+    if kind == INDEX:
+        if isinstance(current, list) and -len(current) <= arg < len(current):
+            return current[arg]
+        return MISSING
+    return MISSING
+
+
+def _fan_out(current, accessor):
+    """执行通配或切片访问器，返回元素列表"""
+    if isinstance(current, list):
+        return current if accessor[0] == WILDCARD else current[slice(*accessor[1])]
+    if accessor[0] == WILDCARD and isinstance(current, dict):
+        return list(current.values())
+    return []
+
+
+class _TrieNode:
+    __slots__ = ('children', 'targets')
+
+    def __init__(self):
+        self.children = {}  # 访问器 -> _TrieNode
+        self.targets = []  # 路径在此结束的目标名
+
+
+def _walk(node: _TrieNode, current, results: Dict[str, Any], collecting: bool):
+    """一次遍历求出trie中所有路径的值，展开访问器之后的路径结果收集为列表"""
+    for target in node.targets:
+        if collecting:
+            results[target].append(current)
+        else:
+            results[target] = current
+
+    for accessor, child in node.children.items():
+        if _is_fan_out(accessor):
+            for item in _fan_out(current, accessor):
+                _walk(child, item, results, True)
+        else:
+            value = _step(current, accessor)
+            if value is not MISSING:
+                _walk(child, value, results, collecting)
+
+
+def extract_values(data, paths: Dict[str, str], default=None) -> Dict[str, Any]:
+    """
+    在一次遍历中求出多条路径的值
+    :param data: 已解析的响应数据
+    :param paths: 目标名 -> 提取路径
+    :param default: 路径不存在时的值，可传入MISSING区分“值为None”与“不存在”
+    :return: 目标名 -> 值；含通配或切片的路径返回匹配值列表
+    """
+    root = _TrieNode()
+    results = {}
+    for target, path in paths.items():
+        accessors = compile_path(path)
+        node = root
+        for accessor in accessors:
+            node = node.children.setdefault(accessor, _TrieNode())
+        node.targets.append(target)
+        results[target] = [] if any(_is_fan_out(accessor) for accessor in accessors) else MISSING
+
+    _walk(root, data, results, False)
+    return {target: default if value is MISSING else value for target, value in results.items()}
+
+
+def extract_path(data, path: str, default=None):
+    """
+    按单条路径提取值
+    :param data: 已解析的响应数据
+    :param path: 提取路径
+    :param default: 路径不存在时的值
+    :return: 提取到的值
+    """
+    return extract_values(data, {path: path}, default)[path]
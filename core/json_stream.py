@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+大响应体的增量JSON解析
+基于ijson事件流，只构建断言/提取需要的部分数据（裁剪树），其余子树跳过或以同类型空值占位，
+内存占用与需要保留的数据量相关，而与响应体大小无关
+"""
+from typing import Iterable
+from core.json_path import compile_path, KEY, INDEX
+
+try:
+    import ijson
+except ImportError:  # 已列入requirements.txt；未安装时流式模式退化为受内存上限约束的整体解析
+    ijson = None
+
+# 保留整个子树
+FULL = 'full'
+# 只保留值的类型：容器保留为空容器，字符串保留为空串
+STUB = 'stub'
+# 完全跳过（超出需要范围的列表元素）
+SKIP = 'skip'
+# 以None占位并跳过子树（所需下标之前的列表元素，保持下标不变）
+HOLE = 'hole'
+
+
+def paths_spec(paths: Iterable[str]):
+    """
+    由提取路径生成裁剪规则：只保留路径上的节点，路径终点保留整个子树
+    列表下标以字符串键表示；含通配、切片或负下标的位置保留整个子树
+    :param paths: 提取路径列表
+    """
+    spec = {}
+    for path in paths:
+        accessors = compile_path(path)
+        if not accessors:
+            return FULL
+        node = spec
+        for position, (kind, arg) in enumerate(accessors):
+            if kind == KEY:
+                key = arg
+            elif kind == INDEX and arg >= 0:
+                key = str(arg)
+            else:
+                key = None
+            last = position == len(accessors) - 1
+            if key is None:
+                # 通配、切片、负下标需要完整的列表
+                node['*'] = FULL
+                break
+            if last or node.get(key) == FULL:
+                node[key] = FULL
+                break
+            node = node.setdefault(key, {})
+    return spec
+
+
+def _child_spec(frame, key):
+    """计算子节点的裁剪规则"""
+    spec = frame.spec
+    if spec == FULL:
+        return FULL
+    if isinstance(spec, dict):
+        if spec.get('*') == FULL:
+            return FULL
+        if isinstance(frame.container, list):
+            if key >= frame.limit:
+                return SKIP
+            return spec.get(str(key), HOLE)
+        return spec.get(key, STUB)
+    if isinstance(spec, list):
+        if isinstance(frame.container, list):
+            return spec[key] if key < frame.limit else SKIP
+        return STUB
+    return STUB
+
+
+class _Frame:
+    __slots__ = ('container', 'spec', 'key', 'count', 'limit')
+
+    def __init__(self, container, spec):
+        self.container = container
+        self.spec = spec
+        self.key = None
+        self.count = 0
+        # 列表中需要保留的元素个数
+        self.limit = None
+        if isinstance(container, list):
+            if isinstance(spec, list):
+                self.limit = len(spec)
+            elif isinstance(spec, dict):
+                self.limit = max((int(key) + 1 for key in spec if key.isdigit()), default=0)
+
+
+def build_pruned(events, spec):
+    """
+    根据ijson.parse事件流构建裁剪后的数据，迭代实现，不受嵌套深度限制
+    :param events: (prefix, event, value) 事件流
+    :param spec: 裁剪规则，由paths_spec或StructureValidator.spec生成
+    :return: 裁剪后的数据
+    """
+    root = []
+    stack = []
+    skip_depth = 0
+
+    for _, event, value in events:
+        if skip_depth:
+            if event in ('start_map', 'start_array'):
+                skip_depth += 1
+            elif event in ('end_map', 'end_array'):
+                skip_depth -= 1
+            continue
+
+        if event == 'map_key':
+            stack[-1].key = value
+            continue
+        if event in ('end_map', 'end_array'):
+            stack.pop()
+            continue
+
+        # 一个值开始，确定其裁剪规则及挂载位置
+        if stack:
+            frame = stack[-1]
+            if isinstance(frame.container, list):
+                child_spec = _child_spec(frame, frame.count)
+                frame.count += 1
+            else:
+                child_spec = _child_spec(frame, frame.key)
+        else:
+            frame = None
+            child_spec = spec
+
+        if child_spec == SKIP:
+            if event in ('start_map', 'start_array'):
+                skip_depth = 1
+            continue
+
+        if child_spec == HOLE:
+            node = None
+        elif event == 'start_map':
+            node = {}
+        elif event == 'start_array':
+            node = []
+        elif child_spec == STUB and isinstance(value, str):
+            node = ''
+        else:
+            node = value
+
+        if frame is None:
+            root.append(node)
+        elif isinstance(frame.container, list):
+            frame.container.append(node)
+        else:
+            frame.container[frame.key] = node
+
+        if event in ('start_map', 'start_array'):
+            if child_spec in (STUB, HOLE):
+                skip_depth = 1
+            else:
+                stack.append(_Frame(node, child_spec))
+
+    return root[0] if root else None
+
+
+def parse_pruned(file_obj, spec):
+    """
+    从文件对象增量解析JSON并裁剪
+    :param file_obj: 以二进制方式打开的文件对象
+    :param spec: 裁剪规则
+    """
+    if ijson is None:
+        raise RuntimeError("增量JSON解析需要安装ijson")
+    return build_pruned(ijson.parse(file_obj, use_float=True), spec)
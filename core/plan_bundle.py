@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+测试计划预编译包
+将一个测试计划的所有用例（已展开引用、嵌入接口定义、预编译变量模板）打包为单个文件，
+执行器启动时一次读取即可得到全部用例；包中的清单记录每个源文件的标识与内容哈希，
+源文件内容变化时自动重新编译
+"""
+import os
+import sys
+import time
+import pickle
+import logging
+import argparse
+import copyreg
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Any, Optional
+
+# 添加项目根目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.path_util import get_path
+from utils.file_utils import file_stamp, content_hash
+from core.reference_step import reference_sources
+from core.interface_registry import interface_registry
+
+logger = logging.getLogger('api_test_executor')
+
+# 包格式版本，用例加载或模板结构变化时递增，旧版本的包自动重新编译
+BUNDLE_VERSION = 2
+
+BUNDLE_DIR = get_path('.cache', 'plan_bundles')
+
+# 接口定义以MappingProxyType只读视图嵌入步骤，按字典序列化；同一接口的视图在包中只保存一份
+def _mapping_proxy(data):
+    return MappingProxyType(data)
+
+
+copyreg.pickle(MappingProxyType, lambda proxy: (_mapping_proxy, (dict(proxy),)))
+
+
+class PlanBundle:
+    def __init__(self, plan: str, cases: Dict[str, Any], manifest: Dict[str, Any], errors: Dict[str, str]):
+        """
+        :param plan: 测试计划名称
+        :param cases: 用例文件名 -> (数据集配置, 测试步骤列表)
+        :param manifest: 源文件路径 -> (文件标识, 内容哈希)，文件不存在时为(None, None)
+        :param errors: 编译失败的用例文件名 -> 错误信息，执行时这些用例按原方式加载
+        """
+        self.version = BUNDLE_VERSION
+        self.plan = plan
+        self.cases = cases
+        self.manifest = manifest
+        self.errors = errors
+
+
+def bundle_path(plan: str) -> str:
+    """测试计划预编译包的路径"""
+    return f"{BUNDLE_DIR}/{plan}.bundle"
+
+
+def _source_state(path: str):
+    """源文件当前的(文件标识, 内容哈希)，文件不存在时为(None, None)"""
+    try:
+        stamp = file_stamp(path)
+    except OSError:
+        return None, None
+    with open(path, 'rb') as f:
+        return stamp, content_hash(f.read())
+
+
+def compile_plan(plan: str, case_files: List[str]) -> PlanBundle:
+    """
+    编译测试计划
+    :param plan: 测试计划名称
+    :param case_files: 用例文件名列表
+    :return: PlanBundle
+    """
+    from core.api_test_executor import TestCaseExecutor
+
+    # 使用未加载预编译包的执行器，保证用例从源文件加载
+    executor = TestCaseExecutor()
+    cases, manifest, errors = {}, {}, {}
+    for case_file in dict.fromkeys(case_files):
+        case_path = os.path.abspath(get_path('tests_data', 'API', case_file))
+        try:
+            dataset, steps = executor.load_case(case_file)
+        except Exception as e:
+            # 不存在或格式错误的用例也记入清单，文件出现或修改后重新编译
+            errors[case_file] = str(e)
+            manifest.setdefault(case_path, _source_state(case_path))
+            continue
+
+        cases[case_file] = (dataset, steps)
+        manifest.update(reference_sources(case_path))
+        for step in steps:
+            path, stamp, digest = interface_registry.source(step['_interface_name'])
+            manifest[path] = (stamp, digest)
+
+    executor.close()
+    return PlanBundle(plan, cases, manifest, errors)
+
+
+def save_bundle(bundle: PlanBundle, path: str = None) -> str:
+    """
+    保存预编译包，先写临时文件再替换，避免并发读取到不完整的包
+    :return: 包文件路径
+    """
+    path = path or bundle_path(bundle.plan)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(pickle.dumps(bundle, protocol=pickle.HIGHEST_PROTOCOL))
+    os.replace(temp_path, path)
+    return path
+
+
+def read_bundle(path: str) -> Optional[PlanBundle]:
+    """一次读取预编译包，文件不存在、损坏或版本不一致时返回None"""
+    try:
+        with open(path, 'rb') as f:
+            bundle = pickle.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"预编译包读取失败，将重新编译: {path} - {str(e)}")
+        return None
+    if not isinstance(bundle, PlanBundle) or getattr(bundle, 'version', None) != BUNDLE_VERSION:
+        return None
+    return bundle
+
+
+def stale_sources(bundle: PlanBundle) -> List[str]:
+    """
+    检查清单中的源文件：文件标识未变的跳过，变化的再比较内容哈希
+    :return: 内容发生变化的源文件列表
+    """
+    changed = []
+    for path, (stamp, digest) in bundle.manifest.items():
+        try:
+            current_stamp = file_stamp(path)
+        except OSError:
+            current_stamp = None
+        if current_stamp == stamp:
+            continue
+        if _source_state(path)[1] != digest:
+            changed.append(path)
+    return changed
+
+
+def load_bundle(plan: str, case_files: List[str], rebuild: bool = True) -> Optional[PlanBundle]:
+    """
+    加载测试计划的预编译包，包不存在、用例列表或源文件内容变化时重新编译
+    :param plan: 测试计划名称
+    :param case_files: 用例文件名列表
+    :param rebuild: 包失效时是否重新编译，False时返回None
+    :return: PlanBundle或None
+    """
+    path = bundle_path(plan)
+    bundle = read_bundle(path)
+    if bundle is not None:
+        if sorted(list(bundle.cases) + list(bundle.errors)) != sorted(set(case_files)):
+            logger.info(f"测试计划{plan}的用例列表变化，重新编译")
+        else:
+            changed = stale_sources(bundle)
+            if not changed:
+                return bundle
+            logger.info(f"测试计划{plan}的源文件变化，重新编译: {changed}")
+    if not rebuild:
+        return None
+
+    bundle = compile_plan(plan, case_files)
+    save_bundle(bundle, path)
+    return bundle
+
+
+def main():
+    from config.api_test_plan import test_plan
+
+    parser = argparse.ArgumentParser(description='将接口测试计划编译为预编译包')
+    parser.add_argument('plans', nargs='*', help='测试计划名称（config/api_test_plan.py中test_plan的键），为空时编译全部')
+    parser.add_argument('--check', action='store_true', help='只检查预编译包是否有效，不编译')
+
+    args = parser.parse_args()
+    plans = args.plans or list(test_plan)
+    unknown = [plan for plan in plans if plan not in test_plan]
+    if unknown:
+        print(f"✗ 测试计划不存在: {unknown}")
+        sys.exit(1)
+
+    for plan in plans:
+        if args.check:
+            valid = load_bundle(plan, test_plan[plan], rebuild=False) is not None
+            print(f"{'✓' if valid else '✗'} {plan}: {'有效' if valid else '需要重新编译'}")
+            continue
+        started = time.perf_counter()
+        bundle = compile_plan(plan, test_plan[plan])
+        path = save_bundle(bundle)
+        print(f"✓ {plan}: {len(bundle.cases)}个用例，{len(bundle.manifest)}个源文件，"
+              f"耗时{time.perf_counter() - started:.3f}秒 -> {path}")
+        for case_file, error in bundle.errors.items():
+            print(f"  ✗ {case_file}: {error}")
+
+
+if __name__ == '__main__':
+    # 从包路径导入，保证序列化的类路径为core.plan_bundle而不是__main__
+    from core.plan_bundle import main as compile_main
+    compile_main()
@@ -1,79 +1,193 @@
 # -*- coding: utf-8 -*-
 import os
 import json
+import threading
 from typing import List, Dict, Any
+from utils.file_utils import file_stamp, content_hash
 
 
-def handel_references(file_path: str, visited_files: set = None) -> List[Dict[str, Any]]:
+class _ResolvedFile:
+    """已解析文件的缓存项"""
+    __slots__ = ('stamp', 'digest', 'content', 'references')
+
+    def __init__(self, stamp, digest, content, references):
+        self.stamp = stamp  # 文件(修改时间, 大小)
+        self.digest = digest  # 文件内容哈希
+        self.content = content  # 展开引用后的内容
+        self.references = references  # 直接引用的文件路径集合
+
+
+# 标准化路径 -> _ResolvedFile
+_resolved_cache = {}
+# 标准化路径 -> 直接引用该文件的文件路径集合
+_dependents = {}
+_cache_lock = threading.RLock()
+
+
+def _copy_content(data):
+    """复制JSON数据，读取缓存时使用，避免执行器修改缓存内容"""
+    if isinstance(data, dict):
+        return {key: _copy_content(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_copy_content(item) for item in data]
+    return data
+
+
+def invalidate_reference_cache(file_path: str = None):
     """
-    递归加载JSON文件并处理引用
-    :param file_path: JSON文件完整路径
-    :param visited_files: 已访问文件集合，用于检测循环引用
-    :return: 处理后的测试用例步骤列表
+    清除引用解析缓存，同时清除所有直接或间接引用该文件的缓存
+    :param file_path: 文件路径，为空时清除全部
     """
-    if visited_files is None:
-        visited_files = set()
+    with _cache_lock:
+        if file_path is None:
+            _resolved_cache.clear()
+            _dependents.clear()
+            return
 
-    # 标准化文件路径，避免重复处理同一文件
-    normalized_path = os.path.abspath(file_path)
+        pending = [os.path.abspath(file_path)]
+        while pending:
+            path = pending.pop()
+            entry = _resolved_cache.pop(path, None)
+            if entry is not None:
+                for ref_path in entry.references:
+                    _dependents.get(ref_path, set()).discard(path)
+            pending.extend(_dependents.pop(path, ()))
+
+
+def reference_dependents(file_path: str) -> set:
+    """
+    获取直接或间接引用了指定文件的已缓存文件路径
+    :param file_path: 文件路径
+    :return: 标准化路径集合
+    """
+    with _cache_lock:
+        result = set()
+        pending = [os.path.abspath(file_path)]
+        while pending:
+            for path in _dependents.get(pending.pop(), ()):
+                if path not in result:
+                    result.add(path)
+                    pending.append(path)
+        return result
+
+
+def reference_sources(file_path: str) -> Dict[str, tuple]:
+    """
+    获取已解析文件及其直接或间接引用的所有文件，需先调用handel_references
+    :param file_path: 文件路径
+    :return: 标准化路径 -> (文件标识, 内容哈希)
+    """
+    with _cache_lock:
+        result = {}
+        pending = [os.path.abspath(file_path)]
+        while pending:
+            path = pending.pop()
+            entry = _resolved_cache.get(path)
+            if entry is None or path in result:
+                continue
+            result[path] = (entry.stamp, entry.digest)
+            pending.extend(entry.references)
+        return result
+
+
+def _is_fresh(normalized_path: str) -> bool:
+    """检查缓存项及其引用的文件是否均未变化，变化的文件及其引用方缓存会被清除"""
+    entry = _resolved_cache.get(normalized_path)
+    if entry is None:
+        return False
 
+    try:
+        stamp = file_stamp(normalized_path)
+    except OSError:
+        invalidate_reference_cache(normalized_path)
+        return False
+
+    if stamp != entry.stamp:
+        # 修改时间变化但内容未变时只更新文件标识
+        with open(normalized_path, 'rb') as file:
+            digest = content_hash(file.read())
+        if digest != entry.digest:
+            invalidate_reference_cache(normalized_path)
+            return False
+        entry.stamp = stamp
+
+    return all(_is_fresh(ref_path) for ref_path in entry.references) and normalized_path in _resolved_cache
+
+
+def _resolve(normalized_path: str, visited_files: set):
+    """加载文件并展开引用，返回缓存中的内容（调用方负责复制）"""
     # 检测循环引用
     if normalized_path in visited_files:
         raise ValueError(f"检测到循环引用: {normalized_path}")
 
-    visited_files.add(normalized_path)
+    if _is_fresh(normalized_path):
+        return _resolved_cache[normalized_path].content
 
+    visited_files.add(normalized_path)
     try:
         # 读取文件内容
-        with open(normalized_path, 'r', encoding='utf-8') as file:
-            test_case = json.load(file)
+        stamp = file_stamp(normalized_path)
+        with open(normalized_path, 'rb') as file:
+            raw = file.read()
+        test_case = json.loads(raw.decode('utf-8'))
 
+        references = set()
         # 如果文件内容不是列表，直接返回
         if not isinstance(test_case, list):
-            return test_case
-
-        # 处理引用
-        processed_case = []
-        for item in test_case:
-            # 检查是否是引用
-            if isinstance(item, dict) and "_reference" in item:
-                # 获取引用的文件名
-                ref_file_name = item["_reference"]
-
-                # 构建引用文件的完整路径（与当前文件同级目录）
-                current_dir = os.path.dirname(normalized_path)
-                ref_file_path = os.path.join(current_dir, ref_file_name)
-
-                # 验证引用文件是否存在
-                if not os.path.exists(ref_file_path):
-                    raise FileNotFoundError(f"引用文件不存在: {ref_file_path}")
-
-                # 递归加载引用文件内容
-                ref_content = handel_references(ref_file_path, visited_files.copy())
-
-                # 确保引用内容是一个列表
-                if isinstance(ref_content, list):
-                    # 将引用内容添加到处理后的列表中
-                    processed_case.extend(ref_content)
+            processed_case = test_case
+        else:
+            # 处理引用
+            processed_case = []
+            for item in test_case:
+                # 检查是否是引用
+                if isinstance(item, dict) and "_reference" in item:
+                    # 构建引用文件的完整路径（与当前文件同级目录）
+                    current_dir = os.path.dirname(normalized_path)
+                    ref_file_path = os.path.abspath(os.path.join(current_dir, item["_reference"]))
+
+                    # 验证引用文件是否存在
+                    if not os.path.exists(ref_file_path):
+                        raise FileNotFoundError(f"引用文件不存在: {ref_file_path}")
+
+                    # 递归加载引用文件内容
+                    ref_content = _resolve(ref_file_path, visited_files)
+                    references.add(ref_file_path)
+
+                    # 确保引用内容是一个列表
+                    if isinstance(ref_content, list):
+                        # 将引用内容添加到处理后的列表中
+                        processed_case.extend(ref_content)
+                    else:
+                        # 如果引用内容不是列表，将其作为单个元素添加
+                        processed_case.append(ref_content)
                 else:
-                    # 如果引用内容不是列表，将其作为单个元素添加
-                    processed_case.append(ref_content)
-            else:
-                # 非引用元素，直接添加到列表
-                processed_case.append(item)
+                    # 非引用元素，直接添加到列表
+                    processed_case.append(item)
 
+        _resolved_cache[normalized_path] = _ResolvedFile(stamp, content_hash(raw), processed_case, references)
+        for ref_path in references:
+            _dependents.setdefault(ref_path, set()).add(normalized_path)
+        return processed_case
+    finally:
         # 移除已访问记录，以便其他分支可以重新引用
-        visited_files.remove(normalized_path)
+        visited_files.discard(normalized_path)
 
-        return processed_case
 
-    except (json.JSONDecodeError, FileNotFoundError, ValueError) as e:
-        # 移除已访问记录，然后重新抛出异常
-        if normalized_path in visited_files:
-            visited_files.remove(normalized_path)
-        raise
-    except Exception as e:
-        # 移除已访问记录，然后重新抛出异常
-        if normalized_path in visited_files:
-            visited_files.remove(normalized_path)
-        raise
+def handel_references(file_path: str, visited_files: set = None) -> List[Dict[str, Any]]:
+    """
+    递归加载JSON文件并处理引用
+    解析结果按文件路径缓存，文件内容哈希变化时只重新解析该文件及引用它的文件；
+    返回缓存内容的副本，调用方可以随意修改
+    :param file_path: JSON文件完整路径
+    :param visited_files: 已访问文件集合，用于检测循环引用
+    :return: 处理后的测试用例步骤列表
+    """
+    if visited_files is None:
+        visited_files = set()
+
+    # 标准化文件路径，避免重复处理同一文件
+    normalized_path = os.path.abspath(file_path)
+
+    with _cache_lock:
+        content = _resolve(normalized_path, visited_files)
+        return _copy_content(content)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+单个请求的耗时分解与按接口汇总的耗时直方图
+连接层（core.http_pool中的计时连接）在当前线程的计时记录中写入建连与首字节时间点，
+APITestClient在请求结束后补充总耗时与字节数
+"""
+import time
+import threading
+from typing import Dict, Any, Optional
+
+# 直方图分桶上限（毫秒），最后一个桶收集超出所有上限的请求
+HISTOGRAM_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+_local = threading.local()
+
+
+def start_timing() -> Dict[str, Any]:
+    """开始记录当前线程的请求计时"""
+    _local.timing = {
+        'started': time.perf_counter(),
+        'new_connection': False,
+        'connect_ms': 0.0,
+        'first_byte': None,
+    }
+    return _local.timing
+
+
+def current_timing() -> Optional[Dict[str, Any]]:
+    """当前线程正在记录的计时，未开始记录时返回None"""
+    return getattr(_local, 'timing', None)
+
+
+def record_connect(elapsed: float):
+    """记录一次新建连接的耗时（秒），重试或重定向建立多个连接时累加"""
+    timing = current_timing()
+    if timing is not None:
+        timing['new_connection'] = True
+        timing['connect_ms'] += elapsed * 1000
+
+
+def record_first_byte():
+    """记录收到响应头的时间点"""
+    timing = current_timing()
+    if timing is not None:
+        timing['first_byte'] = time.perf_counter()
+
+
+def finish_timing(request_bytes=0, response_bytes=0) -> Dict[str, Any]:
+    """
+    结束当前线程的请求计时
+    :param request_bytes: 请求大小（字节，含请求行与请求头）
+    :param response_bytes: 响应体大小（字节，按传输的原始字节计）
+    :return: {'new_connection': 是否新建连接, 'connect_ms': 建连耗时, 'ttfb_ms': 首字节耗时,
+              'transfer_ms': 响应体传输耗时, 'total_ms': 总耗时, 'request_bytes', 'response_bytes'}
+    """
+    timing = current_timing() or start_timing()
+    _local.timing = None
+    finished = time.perf_counter()
+    first_byte = timing['first_byte']
+    return {
+        'new_connection': timing['new_connection'],
+        'connect_ms': timing['connect_ms'],
+        'ttfb_ms': (first_byte - timing['started']) * 1000 if first_byte is not None else None,
+        'transfer_ms': (finished - first_byte) * 1000 if first_byte is not None else None,
+        'total_ms': (finished - timing['started']) * 1000,
+        'request_bytes': request_bytes,
+        'response_bytes': response_bytes,
+    }
+
+
+def new_histogram() -> Dict[str, Any]:
+    """空的耗时直方图"""
+    return {
+        'count': 0,
+        'new_connections': 0,
+        'total_ms': 0.0,
+        'max_ms': 0.0,
+        'connect_ms': 0.0,
+        'ttfb_ms': 0.0,
+        'transfer_ms': 0.0,
+        'request_bytes': 0,
+        'response_bytes': 0,
+        'buckets': [0] * len(HISTOGRAM_BUCKETS),
+    }
+
+
+def add_timing(histogram: Dict[str, Any], timing: Dict[str, Any]):
+    """将一次请求的计时计入直方图"""
+    total_ms = timing['total_ms']
+    histogram['count'] += 1
+    histogram['new_connections'] += 1 if timing['new_connection'] else 0
+    histogram['total_ms'] += total_ms
+    histogram['max_ms'] = max(histogram['max_ms'], total_ms)
+    histogram['connect_ms'] += timing['connect_ms']
+    histogram['ttfb_ms'] += timing['ttfb_ms'] or 0.0
+    histogram['transfer_ms'] += timing['transfer_ms'] or 0.0
+    histogram['request_bytes'] += timing['request_bytes']
+    histogram['response_bytes'] += timing['response_bytes']
+    for index, upper in enumerate(HISTOGRAM_BUCKETS):
+        if total_ms <= upper:
+            histogram['buckets'][index] += 1
+            break
+
+
+def merge_histograms(target: Dict[str, Dict[str, Any]], source: Dict[str, Dict[str, Any]]):
+    """
+    将source中各接口的直方图合并到target
+    :param target: 接口名 -> 直方图
+    :param source: 接口名 -> 直方图
+    """
+    for interface, histogram in source.items():
+        merged = target.setdefault(interface, new_histogram())
+        for key, value in histogram.items():
+            if key == 'buckets':
+                merged[key] = [a + b for a, b in zip(merged[key], value)]
+            elif key == 'max_ms':
+                merged[key] = max(merged[key], value)
+            else:
+                merged[key] += value
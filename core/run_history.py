@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+用例执行历史
+每次执行后将用例与步骤的耗时、结果写入本地sqlite文件，用于：
+1. 分片执行时按历史耗时均衡分配用例
+2. 按历史耗时从长到短排序（longest），或将最近失败的用例排在最前（fail-fast）
+"""
+import os
+import sys
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 添加项目根目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.path_util import get_path
+
+HISTORY_FILE = get_path('.cache', 'run_history.sqlite')
+
+# 按历史平均耗时从长到短执行，耗时长的用例先开始，整体结束时间更早
+LONGEST_FIRST = 'longest'
+# 最近执行中失败过的用例优先执行（失败次数多、失败时间近的在前），其余按耗时从长到短
+FAIL_FAST = 'fail-fast'
+
+ORDERS = (LONGEST_FIRST, FAIL_FAST)
+
+# 计算平均耗时与失败次数时参考的最近执行次数
+HISTORY_WINDOW = 5
+
+
+class RunHistory:
+    def __init__(self, path=HISTORY_FILE):
+        """
+        sqlite执行历史，多个进程可同时写入
+        :param path: 历史文件路径
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(
+            'CREATE TABLE IF NOT EXISTS case_runs ('
+            'run_id TEXT, case_id TEXT, outcome TEXT, duration REAL, finished_at REAL);'
+            'CREATE INDEX IF NOT EXISTS idx_case_runs ON case_runs (case_id, finished_at);'
+            'CREATE TABLE IF NOT EXISTS step_runs ('
+            'run_id TEXT, case_id TEXT, step_number INTEGER, interface TEXT, outcome TEXT, '
+            'duration REAL, finished_at REAL);'
+            'CREATE INDEX IF NOT EXISTS idx_step_runs ON step_runs (case_id, step_number, finished_at);'
+        )
+        self._conn.commit()
+
+    def record_cases(self, run_id: str, cases: Iterable[Tuple[str, str, float]]):
+        """
+        记录一次执行中各用例的结果
+        :param run_id: 执行标识（执行时间戳）
+        :param cases: [(用例标识, 结果passed/failed/skipped, 耗时秒), ...]，pytest中用例标识为nodeid
+        """
+        finished_at = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO case_runs VALUES (?, ?, ?, ?, ?)',
+                [(run_id, case_id, outcome, duration, finished_at) for case_id, outcome, duration in cases]
+            )
+            self._conn.commit()
+
+    def record_steps(self, run_id: str, case_id: str, steps: Iterable[Tuple[int, str, str, Optional[float]]]):
+        """
+        记录一个用例中各步骤的结果
+        :param run_id: 执行标识
+        :param case_id: 用例标识，接口测试中为用例文件名
+        :param steps: [(步骤序号, 接口名称, 结果, 请求耗时毫秒), ...]
+        """
+        finished_at = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO step_runs VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(run_id, case_id, step_number, interface, outcome, duration, finished_at)
+                 for step_number, interface, outcome, duration in steps]
+            )
+            self._conn.commit()
+
+    def _recent_case_runs(self, window: int):
+        """各用例最近window次执行的(用例标识, 结果, 耗时, 结束时间)"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT case_id, outcome, duration, finished_at FROM ('
+                'SELECT *, ROW_NUMBER() OVER (PARTITION BY case_id ORDER BY finished_at DESC) AS recent '
+                'FROM case_runs) WHERE recent <= ?', (window,)
+            ).fetchall()
+
+    def durations(self, window: int = HISTORY_WINDOW) -> Dict[str, float]:
+        """
+        各用例最近window次执行的平均耗时
+        :return: 用例标识 -> 平均耗时（秒）
+        """
+        totals = {}
+        for case_id, _, duration, _ in self._recent_case_runs(window):
+            total, count = totals.get(case_id, (0.0, 0))
+            totals[case_id] = (total + (duration or 0.0), count + 1)
+        return {case_id: total / count for case_id, (total, count) in totals.items()}
+
+    def recent_failures(self, window: int = HISTORY_WINDOW) -> Dict[str, Tuple[int, float]]:
+        """
+        各用例最近window次执行中的失败情况，没有失败的用例不返回
+        :return: 用例标识 -> (失败次数, 最近一次失败的时间)
+        """
+        failures = {}
+        for case_id, outcome, _, finished_at in self._recent_case_runs(window):
+            if outcome != 'failed':
+                continue
+            count, last_failed = failures.get(case_id, (0, 0.0))
+            failures[case_id] = (count + 1, max(last_failed, finished_at))
+        return failures
+
+    def order_cases(self, case_ids: List[str], order: str, window: int = HISTORY_WINDOW) -> List[str]:
+        """
+        按执行历史排序用例，没有历史的用例排在有历史的用例之后并保持原顺序
+        :param case_ids: 用例标识列表
+        :param order: longest或fail-fast
+        :param window: 参考的最近执行次数
+        :return: 排序后的用例标识列表
+        """
+        if order not in ORDERS:
+            raise ValueError(f"不支持的排序方式: {order}，可选值: {ORDERS}")
+        durations = self.durations(window)
+        failures = self.recent_failures(window) if order == FAIL_FAST else {}
+        position = {case_id: index for index, case_id in enumerate(case_ids)}
+
+        def sort_key(case_id):
+            failed_count, last_failed = failures.get(case_id, (0, 0.0))
+            duration = durations.get(case_id)
+            return -failed_count, -last_failed, duration is None, -(duration or 0.0), position[case_id]
+
+        return sorted(case_ids, key=sort_key)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def step_outcomes(test_steps: List[Dict], step_results: List[Dict]) -> List[Tuple[int, str, str, Optional[float]]]:
+    """
+    将用例的步骤与execute_test_case返回的step_results转为record_steps的参数
+    :param test_steps: 测试步骤列表
+    :param step_results: 与test_steps顺序一致的步骤结果列表
+    """
+    steps = []
+    for step, step_result in zip(test_steps, step_results):
+        passed = step_result['action_success'] and all(step_result['assertions'])
+        timing = step_result.get('timing')
+        steps.append((
+            step_result['step_number'],
+            step.get('_interface_name'),
+            'passed' if passed else ('blocked' if step_result.get('blocked_by') else 'failed'),
+            timing['total_ms'] if timing else None,
+        ))
+    return steps
+
+
+if __name__ == '__main__':
+    history = RunHistory()
+    for case_id, duration in sorted(history.durations().items(), key=lambda item: -item[1]):
+        failed = history.recent_failures().get(case_id, (0, 0))[0]
+        print(f"{duration:8.3f}s  最近失败{failed}次  {case_id}")
+    history.close()
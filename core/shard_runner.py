@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+测试计划多进程分片执行
+主进程收集用例后按历史耗时将用例均衡分配到多个工作进程（pytest子进程），各工作进程只执行分配给自己的用例，
+日志、截图与报告写入各自的分片目录，执行结果逐条序列化到分片目录；主进程等待全部工作进程结束后回放执行结果，
+统一生成统计、日志与report_{timestamp}.html报告
+用法: pytest tests/API/test_api_entrance.py --shards 8
+"""
+import os
+import sys
+import json
+import heapq
+import shutil
+import logging
+import subprocess
+from typing import Dict, List, Tuple
+import pytest
+from utils.path_util import get_path, report_path, SHARD_DIR_ENV
+from core.request_timing import merge_histograms
+from core.run_history import RunHistory
+
+logger = logging.getLogger('shard_runner')
+
+# 工作进程的分片序号与本次执行的时间戳（所有分片与主进程使用同一时间戳）
+SHARD_INDEX_ENV = 'AUTOTEST_SHARD_INDEX'
+RUN_TIMESTAMP_ENV = 'AUTOTEST_RUN_TIMESTAMP'
+
+# 没有任何历史耗时时每个用例的预估耗时（秒），有历史耗时时未记录的用例按已记录耗时的中位数预估
+DEFAULT_DURATION = 1.0
+
+# 分片目录下的文件
+NODEIDS_FILE = 'nodeids.txt'
+REPORTS_FILE = 'reports.jsonl'
+SUMMARY_FILE = 'summary.json'
+OUTPUT_FILE = 'output.txt'
+
+
+def is_shard_worker() -> bool:
+    """当前进程是否为分片工作进程"""
+    return bool(os.getenv(SHARD_DIR_ENV))
+
+
+def balance_shards(nodeids: List[str], durations: Dict[str, float], shard_count: int) -> Tuple[List[List[str]], List[float]]:
+    """
+    按历史耗时将用例分配到各分片：耗时最长的用例优先分配给当前预计耗时最短的分片
+    :param nodeids: 收集到的用例nodeid，按收集顺序
+    :param durations: nodeid -> 历史平均耗时（秒），见RunHistory.durations
+    :param shard_count: 分片数
+    :return: (各分片的用例列表（保持收集顺序）, 各分片的预计耗时)
+    """
+    known = sorted(durations[nodeid] for nodeid in nodeids if nodeid in durations)
+    default = known[len(known) // 2] if known else DEFAULT_DURATION
+    order = {nodeid: index for index, nodeid in enumerate(nodeids)}
+
+    shards = [[] for _ in range(shard_count)]
+    loads = [0.0] * shard_count
+    heap = [(0.0, index) for index in range(shard_count)]
+    for nodeid in sorted(order, key=lambda n: (-durations.get(n, default), order[n])):
+        load, index = heapq.heappop(heap)
+        shards[index].append(nodeid)
+        loads[index] = load + durations.get(nodeid, default)
+        heapq.heappush(heap, (loads[index], index))
+    return [sorted(shard, key=order.get) for shard in shards], loads
+
+
+def merge_run_summary(target: Dict, source: Dict):
+    """将一个分片的运行概述（连接池统计、接口耗时直方图）合并到target"""
+    for address, stats in (source.get('pool_stats') or {}).items():
+        merged = target.setdefault('pool_stats', {}).setdefault(address, dict.fromkeys(stats, 0))
+        for key, value in stats.items():
+            merged[key] = merged.get(key, 0) + value
+    if source.get('timings'):
+        merge_histograms(target.setdefault('timings', {}), source['timings'])
+
+
+class ShardWorker:
+    """分片工作进程插件：只执行分配给本分片的用例，执行结果逐条写入分片目录"""
+
+    def __init__(self, config):
+        self.config = config
+        self.shard_dir = os.getenv(SHARD_DIR_ENV)
+        self._reports = open(os.path.join(self.shard_dir, REPORTS_FILE), 'w', encoding='utf-8')
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, config, items):
+        with open(os.path.join(self.shard_dir, NODEIDS_FILE), 'r', encoding='utf-8') as f:
+            assigned = set(f.read().splitlines())
+        selected = [item for item in items if item.nodeid in assigned]
+        deselected = [item for item in items if item.nodeid not in assigned]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+    def pytest_runtest_logreport(self, report):
+        data = self.config.hook.pytest_report_to_serializable(config=self.config, report=report)
+        self._reports.write(json.dumps(data, ensure_ascii=False) + '\n')
+        self._reports.flush()
+
+    def pytest_sessionfinish(self, session):
+        self._reports.close()
+        # 各测试入口夹具写入的运行概述在会话级夹具销毁时已写入
+        with open(os.path.join(self.shard_dir, SUMMARY_FILE), 'w', encoding='utf-8') as f:
+            json.dump(getattr(pytest, 'run_summary', {}), f, ensure_ascii=False)
+
+
+class ShardController:
+    """分片主进程插件：收集用例后分配给工作进程执行，替代pytest默认的执行循环，并回放各分片的执行结果"""
+
+    def __init__(self, config, shard_count: int, timestamp: str):
+        """
+        :param config: pytest配置
+        :param shard_count: 工作进程数
+        :param timestamp: 本次执行的时间戳，各分片的日志与报告使用同一时间戳
+        """
+        self.config = config
+        self.shard_count = shard_count
+        self.timestamp = timestamp
+        self.run_dir = get_path('reports', 'shards', timestamp)
+
+    def _worker_args(self) -> List[str]:
+        """工作进程的pytest参数：原始参数去掉--shards，并关闭缓存插件避免多进程同时写入缓存"""
+        args = []
+        skip_next = False
+        for arg in self.config.invocation_params.args:
+            if skip_next:
+                skip_next = False
+            elif arg == '--shards':
+                skip_next = True
+            elif not arg.startswith('--shards='):
+                args.append(arg)
+        return [sys.executable, '-m', 'pytest', *args, '-p', 'no:cacheprovider']
+
+    def _start_workers(self, shards: List[List[str]]) -> List[Tuple[str, subprocess.Popen]]:
+        workers = []
+        for index, nodeids in enumerate(shards):
+            shard_dir = f"{self.run_dir}/shard_{index}"
+            os.makedirs(shard_dir, exist_ok=True)
+            with open(os.path.join(shard_dir, NODEIDS_FILE), 'w', encoding='utf-8') as f:
+                f.write('\n'.join(nodeids))
+            env = dict(os.environ)
+            env.update({
+                SHARD_DIR_ENV: shard_dir,
+                SHARD_INDEX_ENV: str(index),
+                RUN_TIMESTAMP_ENV: self.timestamp,
+            })
+            # 工作进程的输出写入分片目录，避免多个进程的输出在终端交错
+            with open(os.path.join(shard_dir, OUTPUT_FILE), 'w', encoding='utf-8') as output:
+                process = subprocess.Popen(
+                    self._worker_args(), cwd=str(self.config.invocation_params.dir), env=env,
+                    stdout=output, stderr=subprocess.STDOUT
+                )
+            workers.append((shard_dir, process))
+        return workers
+
+    def _replay_reports(self, shard_dir: str, exit_code: int, items: Dict[str, pytest.Item]):
+        """回放一个分片的执行结果；工作进程异常退出时未执行完成的用例记为失败"""
+        hook = self.config.hook
+        finished = set()
+        current = None
+        reports_file = os.path.join(shard_dir, REPORTS_FILE)
+        if os.path.exists(reports_file):
+            with open(reports_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    report = hook.pytest_report_from_serializable(config=self.config, data=json.loads(line))
+                    if report.nodeid != current:
+                        current = report.nodeid
+                        hook.pytest_runtest_logstart(nodeid=report.nodeid, location=report.location)
+                    hook.pytest_runtest_logreport(report=report)
+                    if report.when == 'teardown':
+                        finished.add(report.nodeid)
+                        hook.pytest_runtest_logfinish(nodeid=report.nodeid, location=report.location)
+                        current = None
+
+        with open(os.path.join(shard_dir, NODEIDS_FILE), 'r', encoding='utf-8') as f:
+            unfinished = [nodeid for nodeid in f.read().splitlines() if nodeid and nodeid not in finished]
+        for nodeid in unfinished:
+            item = items[nodeid]
+            report = pytest.TestReport(
+                nodeid, item.location, {}, 'failed',
+                f"分片工作进程异常退出（退出码{exit_code}），用例未执行完成，"
+                f"详见{os.path.join(shard_dir, OUTPUT_FILE)}",
+                'call'
+            )
+            if nodeid != current:
+                hook.pytest_runtest_logstart(nodeid=nodeid, location=item.location)
+            hook.pytest_runtest_logreport(report=report)
+            hook.pytest_runtest_logfinish(nodeid=nodeid, location=item.location)
+            current = None
+
+    def _merge_logs(self, shard_dirs: List[str]):
+        """将各分片的日志按分片顺序追加到主进程的日志文件，平台按时间戳查找日志时可得到完整日志"""
+        log_file = f"{report_path('logs')}/test_{self.timestamp}.log"
+        with open(log_file, 'a', encoding='utf-8') as merged:
+            for index, shard_dir in enumerate(shard_dirs):
+                shard_log = f"{shard_dir}/logs/test_{self.timestamp}.log"
+                if not os.path.exists(shard_log):
+                    continue
+                merged.write(f"========== 分片{index}: {shard_log} ==========\n")
+                with open(shard_log, 'r', encoding='utf-8') as f:
+                    shutil.copyfileobj(f, merged)
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtestloop(self, session):
+        if session.testsfailed and not session.config.option.continue_on_collection_errors:
+            raise session.Interrupted(f"{session.testsfailed}个收集错误，执行中止")
+        if session.config.option.collectonly or not session.items:
+            return True
+
+        items = {item.nodeid: item for item in session.items}
+        history = RunHistory()
+        shards, loads = balance_shards(list(items), history.durations(), self.shard_count)
+        history.close()
+        # 去掉空分片，预计耗时与分片一起过滤（非空分片的预计耗时也可能为0）
+        non_empty = [(shard, load) for shard, load in zip(shards, loads) if shard]
+        shards = [shard for shard, _ in non_empty]
+        loads = [load for _, load in non_empty]
+        logger.info(
+            f"分片执行: {len(items)}个用例分配到{len(shards)}个工作进程，"
+            f"预计耗时(秒): {', '.join(f'{load:.2f}' for load in loads)}，分片目录: {self.run_dir}"
+        )
+
+        workers = self._start_workers(shards)
+        exit_codes = [process.wait() for _, process in workers]
+
+        run_summary = {}
+        for index, ((shard_dir, _), exit_code) in enumerate(zip(workers, exit_codes)):
+            # 0: 全部通过 1: 存在失败用例 5: 未收集到用例，其余退出码为工作进程异常
+            if exit_code not in (0, 1, 5):
+                logger.warning(f"分片{index}的工作进程异常退出，退出码{exit_code}，输出见{shard_dir}/{OUTPUT_FILE}")
+            self._replay_reports(shard_dir, exit_code, items)
+            try:
+                with open(os.path.join(shard_dir, SUMMARY_FILE), 'r', encoding='utf-8') as f:
+                    merge_run_summary(run_summary, json.load(f))
+            except (OSError, ValueError):
+                pass
+        pytest.run_summary.update(run_summary)
+        self._merge_logs([shard_dir for shard_dir, _ in workers])
+        return True
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from typing import Dict, List, Set, Any
+from collections.abc import Mapping
+from core.template import PLACEHOLDER_PATTERN
+
+
+def _collect_placeholders(data, found: Set[str]):
+    """收集数据（字典、列表、字符串）中引用的所有变量名"""
+    if isinstance(data, str):
+        if '$' in data:
+            found.update(PLACEHOLDER_PATTERN.findall(data))
+    elif isinstance(data, Mapping):
+        for value in data.values():
+            _collect_placeholders(value, found)
+    elif isinstance(data, (list, tuple)):
+        for item in data:
+            _collect_placeholders(item, found)
+
+
+def consumed_variables(step: Dict[str, Any]) -> Set[str]:
+    """
+    获取测试步骤消费的上下文变量
+    :param step: 测试步骤，_interface可以是接口路径或已加载的接口定义
+    :return: 变量名集合
+    """
+    found = set()
+    actions = step.get('actions', {}) or {}
+    for key in ('data', 'params', 'headers'):
+        _collect_placeholders(actions.get(key), found)
+
+    interface = actions.get('_interface')
+    if isinstance(interface, Mapping):
+        _collect_placeholders(interface.get('headers'), found)
+        _collect_placeholders(interface.get('url_path'), found)
+
+    # 期望结果中的变量（数据驱动用例按行绑定），响应体结构一致断言不做替换
+    expected_results = step.get('expected_results', {}) or {}
+    if expected_results.get('assert_form') != '响应体结构一致':
+        _collect_placeholders(expected_results.get('assert_data'), found)
+    return found
+
+
+def produced_variables(step: Dict[str, Any]) -> Set[str]:
+    """
+    获取测试步骤通过extract规则写入上下文的变量
+    :param step: 测试步骤
+    :return: 变量名集合，$$key形式直接设置的变量去掉$$前缀
+    """
+    extract_rules = (step.get('actions', {}) or {}).get('extract') or {}
+    return {key[2:] if key.startswith('$$') else key for key in extract_rules}
+
+
+def build_step_graph(steps: List[Dict[str, Any]]) -> List[Set[int]]:
+    """
+    根据extract→消费关系构建步骤依赖图
+    步骤依赖于在它之前最近一次写入其所用变量的步骤；重新写入某变量的步骤，
+    还需等待之前所有读取或写入该变量的步骤完成，保证并发执行时上下文取值与顺序执行一致
+    :param steps: 测试步骤列表
+    :return: 每个步骤依赖的步骤下标集合
+    """
+    dependencies = [set() for _ in steps]
+    last_writer = {}  # 变量名 -> 最近写入该变量的步骤下标
+    readers = {}  # 变量名 -> 最近一次写入之后读取该变量的步骤下标列表
+
+    for index, step in enumerate(steps):
+        for var_name in consumed_variables(step):
+            if var_name in last_writer:
+                dependencies[index].add(last_writer[var_name])
+            readers.setdefault(var_name, []).append(index)
+
+        for var_name in produced_variables(step):
+            if var_name in last_writer:
+                dependencies[index].add(last_writer[var_name])
+            dependencies[index].update(reader for reader in readers.get(var_name, []) if reader != index)
+            last_writer[var_name] = index
+            readers[var_name] = []
+
+    return dependencies
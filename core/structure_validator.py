@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+响应体结构校验
+期望结构预编译为校验节点树（键集合、类型、路径字符串均在编译时生成），校验时迭代遍历，不受嵌套深度限制
+"""
+from core.json_stream import STUB
+
+DICT = 'dict'
+LIST = 'list'
+SCALAR = 'scalar'
+
+
+class _Node:
+    __slots__ = ('kind', 'type', 'path', 'keys', 'order', 'children')
+
+    def __init__(self, expectation, path):
+        self.type = type(expectation)
+        self.path = path
+        self.keys = None
+        self.order = None
+        self.children = None
+        if isinstance(expectation, dict):
+            self.kind = DICT
+        elif isinstance(expectation, list):
+            self.kind = LIST
+        else:
+            self.kind = SCALAR
+
+
+class StructureValidator:
+    def __init__(self, expectation, collect_all=False, max_list_items=None, root_path=''):
+        """
+        预编译期望结构
+        :param expectation: 期望的JSON结构
+        :param collect_all: 是否一次收集所有差异，False时遇到第一个差异即返回
+        :param max_list_items: 为空时只校验与期望列表元素一一对应的实际元素；
+                               为整数K时校验实际列表的前K个元素，超出期望列表长度的元素以期望列表最后一个元素为模板
+        :param root_path: 根节点路径
+        """
+        self.collect_all = collect_all
+        self.max_list_items = max_list_items
+        self.root = self._compile(expectation, root_path)
+        self._spec = None
+
+    @staticmethod
+    def _compile(expectation, root_path):
+        root = _Node(expectation, root_path)
+        pending = [(root, expectation)]
+        while pending:
+            node, value = pending.pop()
+            if node.kind == DICT:
+                node.keys = frozenset(value.keys())
+                node.order = tuple(value.keys())
+                node.children = {}
+                for key, item in value.items():
+                    child = _Node(item, f"{node.path}['{key}']")
+                    node.children[key] = child
+                    pending.append((child, item))
+            elif node.kind == LIST:
+                node.children = []
+                for index, item in enumerate(value):
+                    child = _Node(item, f"{node.path}[{index}]")
+                    node.children.append(child)
+                    pending.append((child, item))
+        return root
+
+    @property
+    def spec(self):
+        """流式响应增量解析的裁剪规则，只保留校验需要的部分"""
+        if self._spec is None:
+            self._spec = self._build_spec()
+        return self._spec
+
+    def _build_spec(self):
+        pending = [(self.root, None)]
+        result = None
+        while pending:
+            node, setter = pending.pop()
+            if node.kind == DICT:
+                spec = {}
+                for key, child in node.children.items():
+                    pending.append((child, (spec, key)))
+            elif node.kind == LIST:
+                count = len(node.children)
+                if self.max_list_items is not None and count:
+                    count = max(count, self.max_list_items)
+                spec = [STUB] * count
+                for index in range(count):
+                    child = node.children[min(index, len(node.children) - 1)]
+                    pending.append((child, (spec, index)))
+            else:
+                spec = STUB
+            if setter is None:
+                result = spec
+            else:
+                container, key = setter
+                container[key] = spec
+        return result
+
+    @staticmethod
+    def _actual_path(node, remap):
+        """以期望列表元素为模板校验其他元素时，将模板路径替换为实际元素路径"""
+        if remap is None:
+            return node.path
+        template_path, actual_path = remap
+        return actual_path + node.path[len(template_path):]
+
+    def validate(self, actuality, collect_all=None, max_list_items=None):
+        """
+        校验实际数据的结构
+        :param actuality: 实际的JSON数据
+        :param collect_all: 覆盖编译时的collect_all
+        :param max_list_items: 覆盖编译时的max_list_items
+        :return: (是否一致, 差异描述列表)
+        """
+        collect_all = self.collect_all if collect_all is None else collect_all
+        limit = self.max_list_items if max_list_items is None else max_list_items
+        differences = []
+        stack = [(self.root, actuality, None)]
+
+        while stack:
+            node, actual, remap = stack.pop()
+            error = None
+
+            # 检查类型是否一致
+            if type(actual) is not node.type:
+                error = (f"在 {self._actual_path(node, remap)} 处类型不一致。"
+                         f"期望类型 {node.type.__name__}，实际类型 {type(actual).__name__}")
+
+            elif node.kind == DICT:
+                # 检查字典的键集合是否一致
+                if node.keys != actual.keys():
+                    actual_keys = set(actual.keys())
+                    missing = node.keys - actual_keys
+                    extra = actual_keys - node.keys
+                    error = f"在 {self._actual_path(node, remap)} 处键不一致。"
+                    if missing:
+                        error += f"缺失键: {set(missing)}"
+                    if extra:
+                        error += f"多余键: {extra}"
+                else:
+                    for key in reversed(node.order):
+                        stack.append((node.children[key], actual[key], remap))
+
+            elif node.kind == LIST:
+                children = node.children
+                if children and not actual:
+                    # 标准列表非空但比较列表为空
+                    error = f"在 {self._actual_path(node, remap)} 处：期望非空列表，但实际为空"
+                elif children:
+                    count = min(len(children), len(actual)) if limit is None else min(len(actual), limit)
+                    for index in range(count - 1, -1, -1):
+                        if index < len(children):
+                            stack.append((children[index], actual[index], remap))
+                        else:
+                            template = children[-1]
+                            actual_path = f"{self._actual_path(node, remap)}[{index}]"
+                            stack.append((template, actual[index], (template.path, actual_path)))
+
+            if error is not None:
+                differences.append(error)
+                if not collect_all:
+                    break
+
+        return not differences, differences
+
+
+def compare_structure(actuality, expectation, path="", collect_all=False, max_list_items=None):
+    """
+    比较两个JSON结构是否一致
+    expectation: 标准JSON
+    actuality: 要比较的JSON
+    path: 当前路径（用于定位差异）
+    返回: (是否一致, 差异描述)
+    """
+    validator = StructureValidator(expectation, collect_all, max_list_items, root_path=path)
+    match, differences = validator.validate(actuality)
+    return match, "结构一致" if match else '；'.join(differences)
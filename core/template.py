@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+变量模板引擎
+测试步骤中的 ${variable} 占位符在加载时预编译为“字面量/占位符”片段，执行时一次拼接完成替换
+"""
+import re
+from functools import lru_cache
+from typing import Any, Dict
+
+# ${variable} 格式的变量占位符
+PLACEHOLDER_PATTERN = re.compile(r'\$\{([^}]+)\}')
+
+
+class Template:
+    """预编译的字符串模板：literals与names交替拼接，names[i]位于literals[i]与literals[i+1]之间"""
+    __slots__ = ('source', 'literals', 'names')
+
+    def __init__(self, source: str):
+        parts = PLACEHOLDER_PATTERN.split(source)
+        self.source = source
+        self.literals = tuple(parts[0::2])
+        self.names = tuple(parts[1::2])
+
+    @property
+    def variables(self):
+        """模板引用的变量名集合"""
+        return set(self.names)
+
+    def render(self, context: Dict[str, Any]) -> str:
+        """
+        一次拼接完成变量替换，上下文中不存在的变量保留原始占位符
+        :param context: 变量上下文
+        :return: 替换后的字符串
+        """
+        literals = self.literals
+        if len(self.names) == 1:
+            # 最常见的单占位符场景直接拼接
+            name = self.names[0]
+            value = str(context[name]) if name in context else '${' + name + '}'
+            return literals[0] + value + literals[1]
+        pieces = [literals[0]]
+        for i, name in enumerate(self.names):
+            if name in context:
+                pieces.append(str(context[name]))
+            else:
+                pieces.append('${' + name + '}')
+            pieces.append(literals[i + 1])
+        return ''.join(pieces)
+
+    def __repr__(self):
+        return f'Template({self.source!r})'
+
+
+class Constant:
+    """不含占位符的数据，渲染时原样返回"""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    @property
+    def variables(self):
+        return set()
+
+    def render(self, context: Dict[str, Any]):
+        return self.value
+
+
+class DictTemplate:
+    """含占位符的字典，items为(key, 渲染对象, 原值)，渲染对象为None的值原样保留"""
+    __slots__ = ('items',)
+
+    def __init__(self, items):
+        self.items = tuple(items)
+
+    @property
+    def variables(self):
+        found = set()
+        for _, compiled, _ in self.items:
+            if compiled is not None:
+                found |= compiled.variables
+        return found
+
+    def render(self, context: Dict[str, Any]) -> dict:
+        return {
+            key: value if compiled is None else compiled.render(context)
+            for key, compiled, value in self.items
+        }
+
+
+class ListTemplate:
+    """含占位符的列表，items为(渲染对象, 原值)"""
+    __slots__ = ('items',)
+
+    def __init__(self, items):
+        self.items = tuple(items)
+
+    @property
+    def variables(self):
+        found = set()
+        for compiled, _ in self.items:
+            if compiled is not None:
+                found |= compiled.variables
+        return found
+
+    def render(self, context: Dict[str, Any]) -> list:
+        return [item if compiled is None else compiled.render(context) for compiled, item in self.items]
+
+
+def _compile(data):
+    """编译数据，返回渲染对象；不含占位符时返回None"""
+    if isinstance(data, str):
+        if '${' in data and PLACEHOLDER_PATTERN.search(data):
+            return compile_string(data)
+        return None
+    if isinstance(data, dict):
+        items = [(key, _compile(value), value) for key, value in data.items()]
+        if all(compiled is None for _, compiled, _ in items):
+            return None
+        return DictTemplate(items)
+    if isinstance(data, (list, tuple)):
+        items = [(_compile(item), item) for item in data]
+        if all(compiled is None for compiled, _ in items):
+            return None
+        return ListTemplate(items)
+    return None
+
+
+def compile_template(data):
+    """
+    将字符串、嵌套字典或列表预编译为渲染对象
+    :param data: 需要编译的数据
+    :return: 带render(context)方法的渲染对象
+    """
+    compiled = _compile(data)
+    return Constant(data) if compiled is None else compiled
+
+
+@lru_cache(maxsize=4096)
+def compile_string(text: str) -> Template:
+    """编译单个字符串模板，相同字符串只编译一次"""
+    return Template(text)
+
+
+def render_string(text: str, context: Dict[str, Any]) -> str:
+    """替换字符串中的占位符 ${key}，未提供的变量保留原样"""
+    if not context or not text or '${' not in text:
+        return text
+    return compile_string(text).render(context)
+
+
+if __name__ == '__main__':
+    # 微基准：10k个步骤逐个渲染，对比逐次正则替换与预编译模板的每步耗时
+    import time
+
+    step_count = 10000
+    context = {'order_id': 200000, 'access_token': 'cn-8b894f1b-4f39', 'user_id': 253262}
+    steps = [
+        {
+            'headers': {'content-type': 'application/json', 'Authorization': 'Bearer ${access_token}'},
+            'data': {
+                'address': '西安市鱼化寨街道',
+                'orderId': '${order_id}',
+                'customerInfo': {'userId': '${user_id}', 'userName': '测试账户', 'mobile': '13700000000'},
+                'items': [{'id': '${order_id}-1'}, {'id': 'fixed'}],
+            },
+            'params': {'orderId': '${order_id}', 'step': str(i)},
+        }
+        for i in range(step_count)
+    ]
+
+    def legacy_replace(data):
+        if isinstance(data, dict):
+            return {key: legacy_replace(value) for key, value in data.items()}
+        elif isinstance(data, list):
+            return [legacy_replace(item) for item in data]
+        elif isinstance(data, str):
+            for var_name in re.findall(r'\$\{(\w+)\}', data):
+                if var_name in context:
+                    data = data.replace(f'${{{var_name}}}', str(context[var_name]))
+            return data
+        return data
+
+    start = time.perf_counter()
+    legacy_results = [{key: legacy_replace(value) for key, value in step.items()} for step in steps]
+    legacy_cost = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled_steps = [{key: compile_template(value) for key, value in step.items()} for step in steps]
+    compile_cost = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rendered_results = [{key: value.render(context) for key, value in step.items()} for step in compiled_steps]
+    render_cost = time.perf_counter() - start
+
+    assert rendered_results == legacy_results
+    print(f'步骤数: {step_count}')
+    print(f'逐次正则替换: {legacy_cost / step_count * 1e6:.2f} us/步')
+    print(f'预编译(加载时一次): {compile_cost / step_count * 1e6:.2f} us/步')
+    print(f'预编译模板渲染: {render_cost / step_count * 1e6:.2f} us/步')
@@ -1,5 +1,13 @@
 # -*- coding: utf-8 -*-
+import os
 from flask import Flask
+from services.platform import USE_RELOADER_ENV
+
+# 直接运行时以调试模式启动，修改代码后自动重载
+DEBUG = __name__ == '__main__'
+if DEBUG:
+    # 自动重载的监控进程不处理请求，不创建预热的pytest工作进程池，见services/platform.py
+    os.environ[USE_RELOADER_ENV] = '1'
 
 # 注册蓝图
 from routes import main_bp
@@ -18,4 +26,4 @@ app.register_blueprint(mock_order, url_prefix='')
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=5000, debug=DEBUG)
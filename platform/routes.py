@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 import os
-from services.platform import TestPlatform
-from flask import Blueprint, render_template, request, jsonify, send_from_directory, send_file
+import json
+from services.platform import TestPlatform, EXECUTION_ORDERS
+from services.log_tail import read_log, follow_log
+from services.case_search import FIELDS as SEARCH_FIELDS
+from flask import Blueprint, Response, render_template, request, jsonify, send_from_directory, send_file
 
 # 创建主蓝图
 main_bp = Blueprint('main', __name__)
@@ -16,8 +19,29 @@ def index():
 
 @main_bp.route('/test-cases')
 def test_case_management():
-    test_plans = platform.get_test_plans()
-    return render_template('test_case_management.html', test_plans=test_plans)
+    # 只渲染第一页测试计划，用例在展开时按页加载
+    test_plans, next_cursor = platform.plan_index.plans()
+    return render_template('test_case_management.html', test_plans=test_plans, next_cursor=next_cursor)
+
+
+# 分页获取测试计划：cursor为上一页返回的next_cursor
+@main_bp.route('/api/test-plans')
+def list_test_plans():
+    test_plans, next_cursor = platform.plan_index.plans(
+        request.args.get('cursor'), request.args.get('limit', type=int)
+    )
+    return jsonify({'success': True, 'data': test_plans, 'next_cursor': next_cursor})
+
+
+# 分页获取测试计划中的用例
+@main_bp.route('/api/test-plans/<test_project>/cases')
+def list_test_plan_cases(test_project):
+    cases, next_cursor = platform.plan_index.cases(
+        test_project, request.args.get('cursor'), request.args.get('limit', type=int)
+    )
+    if cases is None:
+        return jsonify({'success': False, 'message': f'测试计划不存在: {test_project}'})
+    return jsonify({'success': True, 'data': cases, 'next_cursor': next_cursor})
 
 
 @main_bp.route('/api/test-cases', methods=['POST'])
@@ -56,6 +80,8 @@ def delete_test_case(test_project, case_name):
         file_path = os.path.join(platform.tests_data_dir, test_project, f"{case_name}")
         if os.path.exists(file_path):
             os.remove(file_path)
+            platform.plan_index.remove_case(test_project, case_name)
+            platform.search_index.update_case(test_project, case_name)
             return jsonify({'success': True, 'message': '删除成功'})
         else:
             return jsonify({'success': False, 'message': '用例不存在'})
@@ -63,6 +89,30 @@ def delete_test_case(test_project, case_name):
         return jsonify({'success': False, 'message': f'删除失败: {str(e)}'})
 
 
+# 按接口、提取/使用的变量、断言方式查找用例，多个条件同时满足，如
+# /api/search/cases?interface=order_service/orderCreate.json&consumes=order_id
+@main_bp.route('/api/search/cases')
+def search_test_cases():
+    criteria = {field: request.args[field] for field in SEARCH_FIELDS if request.args.get(field)}
+    try:
+        cases, next_cursor = platform.search_index.search(
+            criteria, request.args.get('cursor'), request.args.get('limit', type=int)
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)})
+    return jsonify({'success': True, 'data': cases, 'next_cursor': next_cursor})
+
+
+# 字段下的全部索引词及用例数，如 /api/search/terms?field=interface
+@main_bp.route('/api/search/terms')
+def search_terms():
+    try:
+        terms = platform.search_index.terms(request.args.get('field'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)})
+    return jsonify({'success': True, 'data': terms})
+
+
 @main_bp.route('/test-execution')
 def test_execution():
     return render_template('test_execution.html')
@@ -97,52 +147,151 @@ def execute_test_plan():
     data = request.json
     test_project = data.get('test_project')
     test_plan = data.get('test_plan')
+    order = data.get('order') or None
 
     if not test_plan or not test_project:
         return jsonify({'success': False, 'message': '请选择测试项目及计划'})
+    if order and order not in EXECUTION_ORDERS:
+        return jsonify({'success': False, 'message': f'不支持的执行顺序: {order}'})
 
-    # 重置状态
-    platform.test_completed = False
-    platform.test_exit_code = None
-
-    success, message, timestamp = platform.execute_test_plan(test_project, test_plan)
-    platform.current_timestamp = timestamp
+    success, message, job = platform.execute_test_plan(test_project, test_plan, order)
+    if not success:
+        return jsonify({'success': False, 'message': message})
 
     return jsonify({
-        'success': success,
+        'success': True,
         'message': message,
-        'timestamp': timestamp
+        'run_id': job.run_id,
+        # 兼容按时间戳查询日志的调用方，与执行ID相同
+        'timestamp': job.run_id,
+        'status': job.status
     })
 
 
+def _relative_url(path):
+    """报告、日志文件路径转换为相对项目根目录的路径用于URL"""
+    if not path:
+        return None
+    return os.path.relpath(path, platform.base_dir).replace(os.sep, '/')
+
+
+def _file_size(path):
+    """文件大小，文件不存在时为0"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
 # 获取执行日志
 @main_bp.route('/api/execution-log')
 def get_execution_log():
-    timestamp = request.args.get('timestamp')
-    if not timestamp:
-        return jsonify({'success': False, 'message': '缺少时间戳参数'})
-
-    log_content = platform.get_log_content(timestamp)
-
-    if platform.current_timestamp == timestamp:
-        platform.test_completed = True
-        report_path = platform.get_report(timestamp)
-        if report_path:
-            # 转换为相对路径用于URL
-            report_url = report_path.replace(platform.base_dir, '').lstrip('/')
-        else:
-            report_url = None
-    else:
-        report_url = None
+    run_id = request.args.get('run_id') or request.args.get('timestamp')
+    if not run_id:
+        return jsonify({'success': False, 'message': '缺少执行ID参数'})
+
+    job = platform.job_queue.get(run_id)
+    if job is None:
+        return jsonify({'success': False, 'message': f'执行记录不存在: {run_id}'})
+
+    return jsonify({
+        'success': True,
+        'log_content': platform.get_log_content(job),
+        'status': job.status,
+        'completed': job.finished,
+        'exit_code': job.exit_code,
+        'queue_position': platform.job_queue.position(run_id),
+        'report_url': _relative_url(platform.get_report(job))
+    })
+
 
+# 增量获取执行日志：返回offset之后新增的完整行与下一次请求使用的offset
+@main_bp.route('/api/execution-log/tail')
+def tail_execution_log():
+    run_id = request.args.get('run_id')
+    job = platform.job_queue.get(run_id) if run_id else None
+    if job is None:
+        return jsonify({'success': False, 'message': f'执行记录不存在: {run_id}'})
+    offset = request.args.get('offset', default=0, type=int)
+
+    # 先判断是否结束再读取，保证结束前写入的内容都被读到
+    completed = job.finished
+    data, next_offset = read_log(job.log_path, max(0, offset), final=completed)
+    # 执行已结束且本次已读到末尾时，调用方可停止请求
+    eof = completed and next_offset >= _file_size(job.log_path)
     return jsonify({
         'success': True,
-        'log_content': log_content,
-        'completed': platform.test_completed,
-        'report_url': report_url
+        'content': data.decode('utf-8', errors='replace'),
+        'offset': next_offset,
+        'status': job.status,
+        'completed': eof,
+        'exit_code': job.exit_code,
+        'report_url': _relative_url(platform.get_report(job)) if eof else None
     })
 
 
+# 以Server-Sent Events推送执行日志的新增内容，事件id为偏移量，断线重连时从Last-Event-ID继续
+@main_bp.route('/api/execution-log/stream')
+def stream_execution_log():
+    run_id = request.args.get('run_id')
+    job = platform.job_queue.get(run_id) if run_id else None
+    if job is None:
+        return jsonify({'success': False, 'message': f'执行记录不存在: {run_id}'}), 404
+    offset = request.headers.get('Last-Event-ID', type=int)
+    if offset is None:
+        offset = request.args.get('offset', default=0, type=int)
+
+    def events(offset):
+        with follow_log(job.log_path, max(0, offset), lambda: job.finished) as follower:
+            while True:
+                data, offset, eof = follower.read(offset, timeout=15)
+                if data:
+                    content = json.dumps({'content': data.decode('utf-8', errors='replace'), 'offset': offset},
+                                         ensure_ascii=False)
+                    yield f"id: {offset}\nevent: log\ndata: {content}\n\n"
+                elif eof:
+                    result = json.dumps({
+                        'status': job.status,
+                        'exit_code': job.exit_code,
+                        'message': job.message,
+                        'report_url': _relative_url(platform.get_report(job))
+                    }, ensure_ascii=False)
+                    yield f"id: {offset}\nevent: end\ndata: {result}\n\n"
+                    return
+                else:
+                    # 保持连接，同时及时发现客户端断开
+                    yield ": keep-alive\n\n"
+
+    return Response(events(offset), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+# 执行记录
+@main_bp.route('/api/jobs')
+def list_jobs():
+    jobs = []
+    for job in platform.job_queue.jobs():
+        info = job.to_dict()
+        info['queue_position'] = platform.job_queue.position(job.run_id)
+        info['report_url'] = _relative_url(platform.get_report(job))
+        jobs.append(info)
+    return jsonify({'success': True, 'data': jobs})
+
+
+@main_bp.route('/api/jobs/<run_id>')
+def get_job(run_id):
+    job = platform.job_queue.get(run_id)
+    if job is None:
+        return jsonify({'success': False, 'message': f'执行记录不存在: {run_id}'})
+    info = job.to_dict()
+    info['queue_position'] = platform.job_queue.position(run_id)
+    info['log_url'] = _relative_url(job.log_path)
+    info['report_url'] = _relative_url(platform.get_report(job))
+    return jsonify({'success': True, 'data': info})
+
+
 # 提供测试报告访问
 @main_bp.route('/reports/<path:filename>')
 def serve_report(filename):
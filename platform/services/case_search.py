@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+测试用例倒排索引
+对tests_data下的用例（展开_reference引用后）建立以下倒排索引，用于按接口、变量与断言方式查找用例：
+1. interface: 步骤的_interface接口路径 -> 用例
+2. extracts: 步骤extract写入的变量 -> 用例
+3. consumes: 步骤中${变量}引用的变量 -> 用例
+4. assert_form: 断言方式 -> 用例
+索引在首次查询时建立，之后按用例增量更新；被引用文件变化时同时更新引用它的用例。
+不经平台修改的用例内容及被引用文件（不在tests_data下或未收到变更通知），查询时按修改时间检查，
+检查间隔同用例列表索引，变化的文件重新索引引用了它的用例
+"""
+import os
+import sys
+import time
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+# 添加项目根目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from core.reference_step import handel_references, reference_sources
+from core.step_graph import consumed_variables, produced_variables
+from utils.file_utils import file_stamp
+from services.plan_index import paginate, DEFAULT_PAGE_SIZE, SCAN_INTERVAL
+
+FIELDS = ('interface', 'extracts', 'consumes', 'assert_form')
+
+
+def normalize_term(field: str, term: str) -> str:
+    """查询词标准化：变量可以写成${name}或name"""
+    term = (term or '').strip()
+    if field in ('extracts', 'consumes') and term.startswith('${') and term.endswith('}'):
+        term = term[2:-1]
+    if field == 'extracts' and term.startswith('$$'):
+        term = term[2:]
+    return term
+
+
+def case_terms(steps: List) -> Dict[str, Set[str]]:
+    """
+    提取用例中各字段的索引词
+    :param steps: 展开引用后的用例步骤列表
+    :return: 字段 -> 索引词集合
+    """
+    terms = {field: set() for field in FIELDS}
+    for step in steps:
+        # 只索引接口测试步骤，Android、Windows用例的步骤没有actions._interface
+        actions = step.get('actions') if isinstance(step, dict) else None
+        if not isinstance(actions, dict) or not isinstance(actions.get('_interface'), str):
+            continue
+        terms['interface'].add(actions['_interface'])
+        expected_results = step.get('expected_results') or {}
+        if not isinstance(expected_results, dict):
+            raise ValueError(f"expected_results格式错误: {step}")
+        if expected_results.get('assert_form'):
+            terms['assert_form'].add(str(expected_results['assert_form']))
+        terms['extracts'].update(produced_variables(step))
+        terms['consumes'].update(consumed_variables(step))
+    return terms
+
+
+def _file_stamp(path: str):
+    """文件的(修改时间, 大小)，文件不存在时返回None"""
+    try:
+        return file_stamp(path)
+    except OSError:
+        return None
+
+
+class CaseSearchIndex:
+    def __init__(self, root_dir: str, plan_index, scan_interval: float = SCAN_INTERVAL):
+        """
+        :param root_dir: 用例根目录（tests_data）
+        :param plan_index: PlanIndex，提供用例列表并通知用例增删改
+        :param scan_interval: 按修改时间检查已索引文件的最小间隔（秒）
+        """
+        self.root_dir = os.path.abspath(root_dir)
+        self.plan_index = plan_index
+        self.scan_interval = scan_interval
+        # 字段 -> 索引词 -> 用例标识（测试计划/用例文件名）集合
+        self._postings = {field: {} for field in FIELDS}
+        # 用例标识 -> 字段 -> 索引词集合，更新时据此从倒排表中移除
+        self._terms = {}
+        # 用例标识 -> 加载失败的原因
+        self._errors = {}
+        # 文件路径 -> 引用了该文件（含用例文件本身）的用例标识集合
+        self._dependents = {}
+        # 用例标识 -> 用例及其引用的文件路径集合
+        self._sources = {}
+        # 文件路径 -> 索引时读取的文件标识（修改时间, 大小）
+        self._stamps = {}
+        self._last_scan = 0.0
+        self._built = False
+        self._lock = threading.RLock()
+        plan_index.add_listener(self.update_case)
+
+    def _case_path(self, case_id: str) -> str:
+        return os.path.join(self.root_dir, *case_id.split('/', 1))
+
+    def _unindex(self, case_id: str):
+        for field, terms in self._terms.pop(case_id, {}).items():
+            postings = self._postings[field]
+            for term in terms:
+                case_ids = postings.get(term)
+                if case_ids is not None:
+                    case_ids.discard(case_id)
+                    if not case_ids:
+                        del postings[term]
+        for path in self._sources.pop(case_id, ()):
+            dependents = self._dependents.get(path)
+            if dependents is not None:
+                dependents.discard(case_id)
+                if not dependents:
+                    del self._dependents[path]
+                    self._stamps.pop(path, None)
+        self._errors.pop(case_id, None)
+
+    def _index(self, case_id: str):
+        """重新索引一个用例，用例文件不存在时只移除"""
+        self._unindex(case_id)
+        case_path = self._case_path(case_id)
+        if not os.path.isfile(case_path):
+            return
+        stamps = {}
+        try:
+            steps = handel_references(case_path)
+            # 使用解析引用时读取的文件标识，解析之后的修改在下次检查时发现
+            stamps = {path: stamp for path, (stamp, _) in reference_sources(case_path).items()}
+            terms = case_terms(steps if isinstance(steps, list) else [])
+        except Exception as e:
+            self._errors[case_id] = str(e)
+            terms = {field: set() for field in FIELDS}
+        # 加载失败的用例也记录自身路径，文件修改后随之更新
+        case_path = os.path.abspath(case_path)
+        if case_path not in stamps:
+            stamps[case_path] = _file_stamp(case_path)
+
+        self._terms[case_id] = terms
+        for field, field_terms in terms.items():
+            for term in field_terms:
+                self._postings[field].setdefault(term, set()).add(case_id)
+        self._sources[case_id] = set(stamps)
+        for path, stamp in stamps.items():
+            self._dependents.setdefault(path, set()).add(case_id)
+            self._stamps[path] = stamp
+
+    def build(self):
+        """全量建立索引"""
+        # 先取用例列表再加锁，避免与用例列表索引的锁交叉
+        test_plans = self.plan_index.as_dict()
+        with self._lock:
+            self._postings = {field: {} for field in FIELDS}
+            self._terms.clear()
+            self._errors.clear()
+            self._dependents.clear()
+            self._sources.clear()
+            self._stamps.clear()
+            for plan, case_files in test_plans.items():
+                for case_file in case_files:
+                    self._index(f"{plan}/{case_file}")
+            self._last_scan = time.monotonic()
+            self._built = True
+
+    def _ensure_built(self):
+        if not self._built:
+            self.build()
+
+    def refresh(self, force: bool = False):
+        """
+        刷新索引：刷新用例列表（增删的用例通过监听函数更新），并在达到检查间隔时按修改时间检查已索引的文件，
+        重新索引内容变化的用例及引用了变化文件的用例
+        :param force: 忽略检查间隔，立即检查
+        """
+        self.plan_index.refresh(force)
+        self._ensure_built()
+        with self._lock:
+            if not force and time.monotonic() - self._last_scan < self.scan_interval:
+                return
+            affected = set()
+            for path, stamp in list(self._stamps.items()):
+                if _file_stamp(path) != stamp:
+                    affected |= self._dependents.get(path, set())
+            for case_id in sorted(affected):
+                self._index(case_id)
+            self._last_scan = time.monotonic()
+
+    def update_case(self, test_project: str, case_file: str):
+        """
+        用例保存、删除或修改后增量更新：重新索引该用例及所有引用了它的用例
+        :param test_project: 测试计划
+        :param case_file: 用例文件名
+        """
+        with self._lock:
+            if not self._built:
+                return
+            case_id = f"{test_project}/{case_file}"
+            affected = {case_id} | self._dependents.get(os.path.abspath(self._case_path(case_id)), set())
+            for affected_id in sorted(affected):
+                self._index(affected_id)
+
+    def search(self, criteria: Dict[str, str], cursor: str = None,
+               limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[str], Optional[str]]:
+        """
+        查找同时满足全部条件的用例
+        :param criteria: 字段 -> 查询词，如 {'interface': 'order_service/orderCreate.json', 'consumes': 'order_id'}
+        :param cursor: 上一页最后一个用例标识
+        :param limit: 每页条数
+        :return: (用例标识列表（测试计划/用例文件名）, 下一页游标)
+        """
+        unknown = [field for field in criteria if field not in FIELDS]
+        if unknown:
+            raise ValueError(f"不支持的查询字段: {unknown}，可选值: {FIELDS}")
+        if not criteria:
+            raise ValueError(f"至少指定一个查询字段: {FIELDS}")
+
+        self.refresh()
+        with self._lock:
+            postings = [
+                self._postings[field].get(normalize_term(field, term), set()) for field, term in criteria.items()
+            ]
+            postings.sort(key=len)
+            matched = set(postings[0]).intersection(*postings[1:])
+        return paginate(sorted(matched), cursor, limit)
+
+    def terms(self, field: str) -> Dict[str, int]:
+        """
+        字段下的全部索引词及包含该词的用例数
+        :return: 索引词 -> 用例数
+        """
+        if field not in FIELDS:
+            raise ValueError(f"不支持的查询字段: {field}，可选值: {FIELDS}")
+        self.refresh()
+        with self._lock:
+            return {term: len(case_ids) for term, case_ids in sorted(self._postings[field].items())}
+
+    def errors(self) -> Dict[str, str]:
+        """加载失败、未能索引的用例"""
+        self._ensure_built()
+        with self._lock:
+            return dict(self._errors)
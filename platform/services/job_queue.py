@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+测试计划执行队列
+每次执行分配唯一的执行ID（时间戳加随机后缀），日志与报告按执行ID命名；
+同时执行的数量受max_running限制，超出的执行排队等待，排队数量受max_queued限制
+"""
+import os
+import sys
+import time
+import uuid
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 添加项目根目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+# 执行ID通过该环境变量传给pytest，与conftest.py中报告、日志文件名使用的时间戳一致
+from core.shard_runner import RUN_TIMESTAMP_ENV
+
+# 执行状态
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+ERROR = 'error'
+
+FINISHED_STATUSES = (COMPLETED, ERROR)
+
+
+class QueueFullError(RuntimeError):
+    """排队的执行数量已达上限"""
+
+
+def new_run_id() -> str:
+    """生成执行ID：秒级时间戳加随机后缀，同一秒内多次执行互不覆盖"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+class ExecutionJob:
+    def __init__(self, run_id: str, test_project: str, test_plan: str, pytest_args: List[str], reports_dir: str):
+        """
+        :param run_id: 执行ID
+        :param test_project: 测试项目
+        :param test_plan: 测试计划
+        :param pytest_args: pytest参数
+        :param reports_dir: 报告目录，日志位于其下的logs目录
+        """
+        self.run_id = run_id
+        self.test_project = test_project
+        self.test_plan = test_plan
+        self.pytest_args = pytest_args
+        self.log_path = os.path.join(reports_dir, 'logs', f'test_{run_id}.log')
+        self.report_path = os.path.join(reports_dir, f'report_{run_id}.html')
+        self.status = QUEUED
+        self.exit_code = None
+        self.message = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> Dict:
+        return {
+            'run_id': self.run_id,
+            'test_project': self.test_project,
+            'test_plan': self.test_plan,
+            'status': self.status,
+            'exit_code': self.exit_code,
+            'message': self.message,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobQueue:
+    def __init__(self, pool, max_running=2, max_queued=20, history_limit=200):
+        """
+        :param pool: 执行pytest的WorkerPool
+        :param max_running: 同时执行的最大数量
+        :param max_queued: 排队等待的最大数量
+        :param history_limit: 保留的已结束执行记录数，超出时丢弃最早的记录
+        """
+        self.pool = pool
+        self.max_running = max(1, int(max_running))
+        self.max_queued = max(0, int(max_queued))
+        self.history_limit = history_limit
+        self._jobs = OrderedDict()
+        self._pending = deque()
+        self._running = 0
+        # 执行很快结束时完成回调可能在_dispatch持有锁期间同步调用
+        self._lock = threading.RLock()
+
+    def submit(self, job: ExecutionJob) -> ExecutionJob:
+        """
+        提交执行，有空闲名额时立即开始，否则排队
+        :raises QueueFullError: 排队数量已达上限
+        """
+        with self._lock:
+            if self._running >= self.max_running and len(self._pending) >= self.max_queued:
+                raise QueueFullError(f"执行队列已满：{self._running}个执行中，{len(self._pending)}个排队中，请稍后再试")
+            self._jobs[job.run_id] = job
+            self._pending.append(job)
+            self._dispatch()
+            self._trim()
+        return job
+
+    def get(self, run_id: str) -> Optional[ExecutionJob]:
+        with self._lock:
+            return self._jobs.get(run_id)
+
+    def jobs(self) -> List[ExecutionJob]:
+        """全部执行记录，最新的在前"""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def position(self, run_id: str) -> int:
+        """排队中的执行在队列中的位置（从1开始），不在队列中时为0"""
+        with self._lock:
+            for index, job in enumerate(self._pending):
+                if job.run_id == run_id:
+                    return index + 1
+        return 0
+
+    def _dispatch(self):
+        """在名额内启动排队的执行，调用方持有锁"""
+        while self._pending and self._running < self.max_running:
+            job = self._pending.popleft()
+            try:
+                future = self.pool.submit(job.pytest_args, {RUN_TIMESTAMP_ENV: job.run_id})
+            except Exception as e:
+                job.status = ERROR
+                job.message = f"启动执行失败: {str(e)}"
+                job.finished_at = time.time()
+                continue
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._running += 1
+            future.add_done_callback(lambda f, finished_job=job: self._on_finished(finished_job, f))
+
+    def _on_finished(self, job: ExecutionJob, future):
+        with self._lock:
+            try:
+                job.exit_code = future.result()
+                job.status = COMPLETED
+            except Exception as e:
+                job.status = ERROR
+                job.message = f"执行异常: {str(e)}"
+            job.finished_at = time.time()
+            self._running -= 1
+            self._dispatch()
+
+    def _trim(self):
+        """丢弃超出保留数量的已结束执行记录，调用方持有锁"""
+        finished = [run_id for run_id, job in self._jobs.items() if job.finished]
+        for run_id in finished[:max(0, len(finished) - self.history_limit)]:
+            del self._jobs[run_id]
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+执行日志的增量读取
+1. read_log: 从字节偏移量开始读取新增的完整行，返回内容与下一次读取的偏移量
+2. follow_log: 同一日志文件的所有订阅者（SSE连接）共享一个读取线程，新写入的内容只从文件读取一次，
+   缓存最近的内容供各订阅者按自己的偏移量取用；落后于缓存的订阅者直接从文件分页读取追赶
+"""
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Tuple
+
+# 单次读取的最大字节数，大日志分页返回
+CHUNK_SIZE = 256 * 1024
+# 共享读取线程缓存的最近内容字节数
+BUFFER_LIMIT = 4 * 1024 * 1024
+# 检查日志文件新增内容的间隔（秒）
+POLL_INTERVAL = 0.5
+
+
+def read_log(path: str, offset: int = 0, limit: int = CHUNK_SIZE, final: bool = False) -> Tuple[bytes, int]:
+    """
+    从offset开始读取至多limit字节，只返回完整的行，避免截断多字节字符
+    :param path: 日志文件路径
+    :param offset: 字节偏移量
+    :param limit: 最大读取字节数
+    :param final: 日志已写完（执行已结束）时为True，返回末尾不以换行结束的内容
+    :return: (读取的字节, 下一次读取的偏移量)，文件不存在时返回(b'', offset)
+    """
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(limit)
+    except FileNotFoundError:
+        return b'', offset
+    if len(data) == limit or not final:
+        end = data.rfind(b'\n')
+        # 单行超过limit时按limit截断返回，否则只返回到最后一个换行
+        if end >= 0:
+            data = data[:end + 1]
+        elif len(data) < limit:
+            data = b''
+    return data, offset + len(data)
+
+
+class LogFollower:
+    def __init__(self, path: str, offset: int, is_finished: Callable[[], bool]):
+        """
+        :param path: 日志文件路径
+        :param offset: 开始读取的偏移量
+        :param is_finished: 返回执行是否已结束的函数，结束后读完剩余内容即停止
+        """
+        self.path = path
+        self.is_finished = is_finished
+        self.finished = False
+        self._chunks = deque()
+        self._start = offset
+        self._end = offset
+        self._buffered = 0
+        self._subscribers = 0
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._subscribers:
+                    return
+            # 先判断是否结束再读取，保证结束前写入的内容都被读到
+            finished = self.is_finished()
+            data, end = read_log(self.path, self._end, final=finished)
+            with self._cond:
+                if data:
+                    self._chunks.append((self._end, data))
+                    self._end = end
+                    self._buffered += len(data)
+                    while self._buffered > BUFFER_LIMIT and len(self._chunks) > 1:
+                        start, chunk = self._chunks.popleft()
+                        self._buffered -= len(chunk)
+                        self._start = start + len(chunk)
+                    self._cond.notify_all()
+                elif finished:
+                    self.finished = True
+                    self._cond.notify_all()
+                    return
+            if not data:
+                time.sleep(POLL_INTERVAL)
+
+    def read(self, offset: int, timeout: float) -> Tuple[bytes, int, bool]:
+        """
+        读取offset之后的新内容，没有新内容时最多等待timeout秒
+        :return: (读取的字节, 下一次读取的偏移量, 是否已读完全部日志)
+        """
+        with self._cond:
+            if offset >= self._start:
+                self._cond.wait_for(lambda: self._end > offset or self.finished, timeout)
+                data = b''.join(
+                    chunk[max(0, offset - start):] for start, chunk in self._chunks if start + len(chunk) > offset
+                )
+                return data, offset + len(data), self.finished and offset + len(data) >= self._end
+        # 落后于缓存的内容，直接从文件读取
+        data, offset = read_log(self.path, offset)
+        return data, offset, False
+
+    def subscribe(self):
+        with self._cond:
+            self._subscribers += 1
+            if self._thread is None or not self._thread.is_alive():
+                if self.finished:
+                    return
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self) -> bool:
+        """:return: 是否已没有订阅者"""
+        with self._cond:
+            self._subscribers -= 1
+            return self._subscribers <= 0
+
+
+_followers = {}
+_followers_lock = threading.Lock()
+
+
+@contextmanager
+def follow_log(path: str, offset: int, is_finished: Callable[[], bool]):
+    """
+    订阅日志文件的新增内容，同一文件的订阅者共享读取线程，最后一个订阅者退出后读取线程结束
+    :param path: 日志文件路径
+    :param offset: 开始读取的偏移量
+    :param is_finished: 返回执行是否已结束的函数
+    """
+    key = os.path.abspath(path)
+    with _followers_lock:
+        follower = _followers.get(key)
+        # 新订阅者的偏移量早于缓存时仍可共享，落后部分由read从文件读取
+        if follower is None:
+            follower = _followers[key] = LogFollower(path, offset, is_finished)
+        follower.subscribe()
+    try:
+        yield follower
+    finally:
+        with _followers_lock:
+            if follower.unsubscribe() and _followers.get(key) is follower:
+                del _followers[key]
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+测试计划与用例的内存索引
+tests_data下每个子目录为一个测试计划，目录中的json文件为用例；索引在启动时扫描一次，之后增量刷新：
+1. 安装了watchdog时由文件系统变更通知标记需要刷新的测试计划，访问时只重新列出这些目录
+2. 未安装watchdog时按目录修改时间检查（增删文件会改变目录的修改时间），只重新列出修改时间变化的目录
+平台保存、删除用例时直接更新索引；列表按游标分页，每次请求的耗时只与页大小有关
+刷新时发现的用例增删（及变更通知中的用例修改）通知给add_listener注册的监听函数
+"""
+import os
+import time
+import bisect
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # 可选依赖，未安装时按目录修改时间定期检查
+    Observer = None
+    FileSystemEventHandler = object
+
+CASE_SUFFIX = '.json'
+# 按修改时间检查的最小间隔（秒）
+SCAN_INTERVAL = 5
+# 使用变更通知时仍定期按修改时间检查，补充网络卷等场景下收不到的通知
+WATCH_SCAN_INTERVAL = 60
+# 分页默认与最大条数
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def paginate(items: List[str], cursor: Optional[str], limit: int) -> Tuple[List[str], Optional[str]]:
+    """
+    从有序列表中取cursor之后的一页
+    :return: (本页条目, 下一页游标)，没有下一页时游标为None
+    """
+    limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    start = bisect.bisect_right(items, cursor) if cursor else 0
+    page = items[start:start + limit]
+    next_cursor = page[-1] if start + limit < len(items) else None
+    return page, next_cursor
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+
+    def on_any_event(self, event):
+        for path in (event.src_path, getattr(event, 'dest_path', None)):
+            if path:
+                self.index.mark_dirty(path)
+
+
+class PlanIndex:
+    def __init__(self, root_dir: str, scan_interval: float = SCAN_INTERVAL, watch: bool = True):
+        """
+        :param root_dir: 用例根目录（tests_data）
+        :param scan_interval: 未使用变更通知时按修改时间检查的最小间隔（秒）
+        :param watch: 是否使用文件系统变更通知（需安装watchdog）
+        """
+        self.root_dir = os.path.abspath(root_dir)
+        self.scan_interval = scan_interval
+        self._plans = {}
+        # 有序的测试计划名称，随_plans增删同步更新，分页时无需排序
+        self._plan_names = []
+        self._mtimes = {}
+        self._root_mtime = None
+        self._dirty = set()
+        self._modified = set()
+        self._changes = []
+        self._listeners = []
+        self._last_scan = 0.0
+        self._lock = threading.RLock()
+        self._observer = None
+
+        self._scan()
+        self._changes.clear()
+        if watch and Observer is not None and os.path.isdir(self.root_dir):
+            self._observer = Observer()
+            self._observer.schedule(_ChangeHandler(self), self.root_dir, recursive=True)
+            self._observer.daemon = True
+            self._observer.start()
+
+    @property
+    def watching(self) -> bool:
+        return self._observer is not None
+
+    def add_listener(self, listener: Callable[[str, str], None]):
+        """
+        注册用例变化的监听函数，在refresh中（不持有索引锁时）调用
+        :param listener: listener(测试计划, 用例文件名)，用例新增、删除或修改时调用
+        """
+        self._listeners.append(listener)
+
+    def mark_dirty(self, path: str):
+        """标记路径所在的测试计划需要刷新，根目录下的变化同时标记根目录"""
+        relative = os.path.relpath(os.path.abspath(path), self.root_dir)
+        if relative.startswith(os.pardir):
+            return
+        parts = relative.split(os.sep)
+        with self._lock:
+            self._dirty.add(None)
+            if parts[0] != os.curdir:
+                self._dirty.add(parts[0])
+            # 用例内容修改不改变目录列表，单独记录
+            if len(parts) == 2 and parts[1].endswith(CASE_SUFFIX):
+                self._modified.add((parts[0], parts[1]))
+
+    def _stat_mtime(self, path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _add_plan(self, plan: str):
+        position = bisect.bisect_left(self._plan_names, plan)
+        if position == len(self._plan_names) or self._plan_names[position] != plan:
+            self._plan_names.insert(position, plan)
+
+    def _remove_plan(self, plan: str) -> List[str]:
+        """从索引中移除测试计划，返回其中的用例"""
+        self._mtimes.pop(plan, None)
+        position = bisect.bisect_left(self._plan_names, plan)
+        if position < len(self._plan_names) and self._plan_names[position] == plan:
+            del self._plan_names[position]
+        return self._plans.pop(plan, [])
+
+    def _list_plan(self, plan: str):
+        """重新列出一个测试计划目录中的用例，目录不存在时从索引中移除"""
+        plan_dir = os.path.join(self.root_dir, plan)
+        mtime = self._stat_mtime(plan_dir)
+        if mtime is None or not os.path.isdir(plan_dir):
+            self._changes.extend((plan, case_file) for case_file in self._remove_plan(plan))
+            return
+        previous = self._plans.get(plan, [])
+        if plan not in self._plans:
+            self._add_plan(plan)
+        # 先记录修改时间再列出，列出期间的变化在下次检查时发现
+        self._mtimes[plan] = mtime
+        with os.scandir(plan_dir) as entries:
+            self._plans[plan] = sorted(
+                entry.name for entry in entries if entry.name.endswith(CASE_SUFFIX) and entry.is_file()
+            )
+        self._changes.extend((plan, case_file) for case_file in set(previous) ^ set(self._plans[plan]))
+
+    def _list_root(self):
+        """重新列出根目录下的测试计划，新增的目录列出用例，删除的目录从索引中移除"""
+        self._root_mtime = self._stat_mtime(self.root_dir)
+        plans = set()
+        if self._root_mtime is not None:
+            with os.scandir(self.root_dir) as entries:
+                plans = {entry.name for entry in entries if entry.is_dir()}
+        for plan in set(self._plans) - plans:
+            self._changes.extend((plan, case_file) for case_file in self._remove_plan(plan))
+        for plan in plans - set(self._plans):
+            self._list_plan(plan)
+
+    def _scan(self):
+        """按修改时间检查：根目录变化时重新列出测试计划，各测试计划目录变化时重新列出用例"""
+        if self._stat_mtime(self.root_dir) != self._root_mtime:
+            self._list_root()
+        for plan in list(self._plans):
+            if self._stat_mtime(os.path.join(self.root_dir, plan)) != self._mtimes.get(plan):
+                self._list_plan(plan)
+        self._last_scan = time.monotonic()
+
+    def refresh(self, force: bool = False):
+        """
+        刷新索引：处理变更通知标记的测试计划，并在达到检查间隔时按修改时间检查
+        :param force: 忽略检查间隔，立即按修改时间检查
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            if None in dirty:
+                self._list_root()
+            for plan in dirty - {None}:
+                self._list_plan(plan)
+            interval = WATCH_SCAN_INTERVAL if self.watching else self.scan_interval
+            if force or time.monotonic() - self._last_scan >= interval:
+                self._scan()
+            changes = set(self._changes) | self._modified
+            self._changes.clear()
+            self._modified.clear()
+        for plan, case_file in sorted(changes):
+            for listener in self._listeners:
+                listener(plan, case_file)
+
+    def plans(self, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict], Optional[str]]:
+        """
+        分页列出测试计划
+        :param cursor: 上一页最后一个测试计划名称，为空时从第一页开始
+        :param limit: 每页条数
+        :return: ([{'name': 测试计划, 'case_count': 用例数}, ...], 下一页游标)
+        """
+        self.refresh()
+        with self._lock:
+            names, next_cursor = paginate(self._plan_names, cursor, limit)
+            return [{'name': name, 'case_count': len(self._plans[name])} for name in names], next_cursor
+
+    def cases(self, plan: str, cursor: str = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[Optional[List[str]], Optional[str]]:
+        """
+        分页列出测试计划中的用例文件名
+        :param plan: 测试计划
+        :param cursor: 上一页最后一个用例文件名，为空时从第一页开始
+        :param limit: 每页条数
+        :return: (用例文件名列表, 下一页游标)，测试计划不存在时用例列表为None
+        """
+        self.refresh()
+        with self._lock:
+            if plan not in self._plans:
+                return None, None
+            return paginate(self._plans[plan], cursor, limit)
+
+    def as_dict(self) -> Dict[str, List[str]]:
+        """全部测试计划与用例，格式同TestPlatform.get_test_plans"""
+        self.refresh()
+        with self._lock:
+            return {plan: list(cases) for plan, cases in self._plans.items()}
+
+    def add_case(self, plan: str, case_file: str):
+        """平台保存用例后更新索引"""
+        if not case_file.endswith(CASE_SUFFIX):
+            return
+        with self._lock:
+            if plan not in self._plans:
+                self._list_plan(plan)
+                return
+            cases = self._plans[plan]
+            position = bisect.bisect_left(cases, case_file)
+            if position == len(cases) or cases[position] != case_file:
+                cases.insert(position, case_file)
+
+    def remove_case(self, plan: str, case_file: str):
+        """平台删除用例后更新索引"""
+        with self._lock:
+            cases = self._plans.get(plan)
+            if cases is None:
+                return
+            position = bisect.bisect_left(cases, case_file)
+            if position < len(cases) and cases[position] == case_file:
+                del cases[position]
+
+    def close(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
@@ -1,11 +1,30 @@
 # -*- coding: utf-8 -*-
 import os
-import sys
 import json
-import glob
-import pytest
-import threading
-from datetime import datetime
+from services.worker_pool import create_pool
+from services.job_queue import JobQueue, ExecutionJob, new_run_id, QUEUED
+from services.plan_index import PlanIndex
+from services.case_search import CaseSearchIndex
+
+# 执行顺序，对应pytest的--order参数（见core/run_history.py）：longest耗时长的用例优先，fail-fast最近失败的用例优先
+EXECUTION_ORDERS = ('longest', 'fail-fast')
+
+# 预热的pytest工作进程数
+WORKER_POOL_SIZE = int(os.getenv('AUTOTEST_WORKER_POOL_SIZE', '2'))
+# 同时执行的测试计划数，超出时排队
+MAX_RUNNING = int(os.getenv('AUTOTEST_MAX_RUNNING', '2'))
+# 排队等待的最大执行数，队列满时拒绝新的执行
+MAX_QUEUED = int(os.getenv('AUTOTEST_MAX_QUEUED', '20'))
+# 开启自动重载时由app.py设置，见is_reloader_monitor
+USE_RELOADER_ENV = 'AUTOTEST_USE_RELOADER'
+
+
+def is_reloader_monitor():
+    """
+    是否为Flask自动重载的监控进程：该进程只监控代码变化并重启处理请求的子进程（子进程中WERKZEUG_RUN_MAIN为true），
+    不处理请求，无需创建工作进程池
+    """
+    return os.getenv(USE_RELOADER_ENV) == '1' and os.getenv('WERKZEUG_RUN_MAIN') != 'true'
 
 
 class TestPlatform:
@@ -13,24 +32,17 @@ class TestPlatform:
         self.base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         self.tests_data_dir = os.path.join(self.base_dir, 'tests_data')
         self.reports_dir = os.path.join(self.base_dir, 'reports')
-        self.test_completed = False
-        self.test_exit_code = None
-        self.current_timestamp = None
+        # 测试计划与用例的内存索引，增量刷新
+        self.plan_index = PlanIndex(self.tests_data_dir)
+        # 按接口、变量与断言方式查找用例的倒排索引，首次查询时建立
+        self.search_index = CaseSearchIndex(self.tests_data_dir, self.plan_index)
+        # 启动时创建预热的pytest工作进程池，首次执行前即完成预加载；自动重载的监控进程不创建
+        pool = None if is_reloader_monitor() else create_pool(WORKER_POOL_SIZE, self.base_dir)
+        self.job_queue = JobQueue(pool, MAX_RUNNING, MAX_QUEUED)
 
     def get_test_plans(self):
         """获取所有测试计划"""
-        test_plans = {}
-        if os.path.exists(self.tests_data_dir):
-            for item in os.listdir(self.tests_data_dir):
-                item_path = os.path.join(self.tests_data_dir, item)
-                if os.path.isdir(item_path):
-                    # 获取该测试计划下的所有JSON文件
-                    test_cases = []
-                    for file in os.listdir(item_path):
-                        if file.endswith('.json'):
-                            test_cases.append(file)
-                    test_plans[item] = sorted(test_cases)
-        return test_plans
+        return self.plan_index.as_dict()
 
     def save_test_case(self, test_project, case_name, case_data):
         """保存测试用例到指定测试计划"""
@@ -46,40 +58,23 @@ class TestPlatform:
             file_path = os.path.join(plan_dir, f"{case_name}.json")
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(case_data)
+            self.plan_index.add_case(test_project, f"{case_name}.json")
+            self.search_index.update_case(test_project, f"{case_name}.json")
             return True, "保存成功"
         except json.JSONDecodeError as e:
             return False, f"JSON格式错误: {str(e)}"
         except Exception as e:
             return False, f"保存失败: {str(e)}"
 
-    def cleanup_module_cache(self):
-        """清理模块缓存，避免模块导入冲突"""
-        modules_to_remove = []
-        for module_name in list(sys.modules.keys()):
-            if module_name and (
-                    'test_entrance' in module_name or 'tests.API' in module_name or 'tests.Android' in module_name
-            ):
-                modules_to_remove.append(module_name)
-
-        for module_name in modules_to_remove:
-            del sys.modules[module_name]
-
-        # 清理 pycache
-        for root, dirs, files in os.walk(os.path.join(self.base_dir, 'tests')):
-            if '__pycache__' in dirs:
-                import shutil
-                pycache_path = os.path.join(root, '__pycache__')
-                shutil.rmtree(pycache_path, ignore_errors=True)
-
-    def execute_test_plan(self, test_project, test_plan):
-        """执行指定的测试计划，并返回日志和报告信息"""
+    def execute_test_plan(self, test_project, test_plan, order=None):
+        """
+        提交测试计划的执行，有空闲名额时立即执行，否则排队
+        :param test_project: 测试项目
+        :param test_plan: 测试计划
+        :param order: 执行顺序，longest或fail-fast，为空时按测试计划中的顺序
+        :return: (是否成功, 提示信息, ExecutionJob)
+        """
         try:
-            # 清理模块缓存
-            self.cleanup_module_cache()
-
-            # 生成时间戳
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-
             project_name = None
             execute_test = None
             if test_project == 'API' and test_plan == 'smoke':
@@ -113,77 +108,34 @@ class TestPlatform:
             # 构建文件路径
             file_path = os.path.join(self.base_dir, 'tests', project_name, 'test_api_entrance.py')
             # 组合成 pytest 可识别的格式
-            test_command = f"pytest {file_path}::TestExecute::{execute_test}"
-
-            # test_target = f"{file_path}::TestExecute::{execute_test}"
-            # pytest_args = [test_target, '-v']
-
-            # 在后台线程中执行测试
-            def run_tests():
-                # exit_code = pytest.main(pytest_args)
-                exit_code = os.system(test_command)
-                self.test_completed = True
-                self.test_exit_code = exit_code
-
-            thread = threading.Thread(target=run_tests)
-            thread.daemon = True
-            thread.start()
-
-            # 返回时间戳用于查找日志和报告
-            return True, "测试已开始执行", timestamp
+            pytest_args = [f"{file_path}::TestExecute::{execute_test}"]
+            if order in EXECUTION_ORDERS:
+                pytest_args += ['--order', order]
+
+            # 交给预热的工作进程执行，日志与报告使用执行ID命名
+            job = ExecutionJob(new_run_id(), test_project, test_plan, pytest_args, self.reports_dir)
+            self.job_queue.submit(job)
+            if job.status == QUEUED:
+                return True, f"测试已加入执行队列，排在第{self.job_queue.position(job.run_id)}位", job
+            return True, "测试已开始执行", job
         except Exception as e:
             return False, f"执行失败: {str(e)}", None
 
-    def get_log_content(self, timestamp):
-        """根据时间戳获取最新的日志内容"""
+    def get_log_content(self, job):
+        """获取一次执行的日志内容"""
         try:
-            logs_dir = os.path.join(self.reports_dir, 'logs')
-            if not os.path.exists(logs_dir):
-                return "日志目录不存在"
-
-            # 查找匹配时间戳的日志文件
-            log_pattern = os.path.join(logs_dir, f'test_{timestamp}*.log')
-            log_files = glob.glob(log_pattern)
-
-            if not log_files:
-                # 如果没有找到精确匹配，尝试获取最新的日志文件
-                all_logs = glob.glob(os.path.join(logs_dir, 'test_*.log'))
-                if all_logs:
-                    latest_log = max(all_logs, key=os.path.getctime)
-                    with open(latest_log, 'r', encoding='utf-8') as f:
-                        return f.read()
-                return "未找到日志文件"
-
-            # 读取最新的匹配日志文件
-            latest_log = max(log_files, key=os.path.getctime)
-            with open(latest_log, 'r', encoding='utf-8') as f:
+            if not os.path.exists(job.log_path):
+                return "等待执行..." if job.status == QUEUED else ""
+            with open(job.log_path, 'r', encoding='utf-8') as f:
                 return f.read()
         except Exception as e:
             return f"读取日志失败: {str(e)}"
 
-    def get_report(self, timestamp):
-        """根据时间戳获取最新的测试报告"""
-        try:
-            reports_dir = self.reports_dir
-            if not os.path.exists(reports_dir):
-                return None
-
-            # 查找匹配时间戳的报告文件
-            report_pattern = os.path.join(reports_dir, f'report_{timestamp}*.html')
-            report_files = glob.glob(report_pattern)
-
-            if not report_files:
-                # 如果没有找到精确匹配，尝试获取最新的报告文件
-                all_reports = glob.glob(os.path.join(reports_dir, 'report_*.html'))
-                if all_reports:
-                    return max(all_reports, key=os.path.getctime)
-                return None
-
-            # 返回最新的匹配报告文件
-            return max(report_files, key=os.path.getctime)
-        except Exception as e:
-            print(f"查找报告失败: {e}")
-            return None
+    def get_report(self, job):
+        """获取一次执行的测试报告路径，执行未结束或报告未生成时返回None"""
+        if job.finished and os.path.exists(job.report_path):
+            return job.report_path
+        return None
 
 
 if __name__ == '__main__':
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+预热的pytest工作进程
+启动后预先导入pytest及其插件、conftest.py与各执行器，然后等待从标准输入读取一个执行任务（一行JSON: {"args": [...], "env": {...}}），
+执行完成后以pytest的退出码退出；每个进程只执行一个任务，任务之间互不影响，无需清理模块缓存
+"""
+import os
+import sys
+import gc
+import json
+import importlib
+import contextlib
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 脚本所在目录中的platform.py会遮蔽标准库的platform模块，导入路径中以项目根目录替换脚本目录
+sys.path[0] = BASE_DIR
+
+# 预先导入的模块：pytest、pytest-html的模板引擎、接口测试计划配置、接口测试执行器及其依赖
+PRELOAD_MODULES = (
+    'pytest',
+    'jinja2',
+    'requests',
+    'utils.logger',
+    'utils.path_util',
+    'config.api_test_plan',
+    'core.request_timing',
+    'core.api_test_executor',
+    'core.api_async_executor',
+    'core.plan_bundle',
+    'core.run_history',
+    'core.shard_runner',
+)
+
+# 可选依赖的模块（airtest、appium），未安装时跳过
+OPTIONAL_PRELOAD_MODULES = (
+    'core.airtest_client',
+    'core.airtest_executor',
+    'core.android_client',
+    'core.android_test_executor',
+)
+
+
+def preload_plugins():
+    """
+    以pytest --version --version加载插件（pytest-html等）与根目录的conftest.py，不执行pytest_configure；
+    插件在pytest的断言重写钩子下导入，执行任务时不会再提示模块已导入、无法重写。
+    conftest.py在每次执行时由pytest重新导入，预加载只导入其依赖并生成断言重写后的字节码缓存；
+    tests/API/conftest.py在收集用例时才加载，其依赖已在PRELOAD_MODULES中导入
+    """
+    import pytest
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        pytest.main(['--version', '--version'])
+
+
+def preload():
+    """预先导入执行所需的模块"""
+    # 镜像中设置了PYTHONDONTWRITEBYTECODE，pytest会在每次执行时重新断言重写用例、conftest.py与插件；
+    # 工作进程允许写入字节码缓存，之后的执行直接读取缓存
+    sys.dont_write_bytecode = False
+    for module_name in PRELOAD_MODULES:
+        importlib.import_module(module_name)
+    for module_name in OPTIONAL_PRELOAD_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            pass
+    preload_plugins()
+    # 预加载的对象移出垃圾回收跟踪，pytest结束时的gc.collect不再遍历这些对象
+    gc.freeze()
+
+
+def main():
+    os.chdir(BASE_DIR)
+    preload()
+
+    # 标准输入关闭（进程池关闭）时不执行任何任务
+    line = sys.stdin.readline()
+    if not line.strip():
+        return 0
+    job = json.loads(line)
+    os.environ.update(job.get('env') or {})
+
+    import pytest
+    return int(pytest.main(job['args']))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
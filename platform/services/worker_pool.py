@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+预热的pytest工作进程池
+池中始终保持若干个已完成模块导入的空闲工作进程（见pytest_worker.py），提交任务时直接交给空闲进程执行；
+仍有其他空闲进程时在任务结束后再补充（避免新进程的预加载与正在执行的任务争用CPU），否则立即补充；
+每个进程只执行一个任务，执行结束即退出
+"""
+import os
+import sys
+import json
+import atexit
+import threading
+import subprocess
+from concurrent.futures import Future
+from typing import Dict, List
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pytest_worker.py')
+
+
+class WorkerPool:
+    def __init__(self, size=2, base_dir=None):
+        """
+        :param size: 保持的空闲工作进程数
+        :param base_dir: 项目根目录，工作进程在此目录下执行pytest
+        """
+        self.size = max(1, int(size))
+        self.base_dir = base_dir or os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self._idle = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _spawn(self) -> subprocess.Popen:
+        """启动一个工作进程，进程启动后立即开始预加载模块"""
+        return subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT], cwd=self.base_dir,
+            stdin=subprocess.PIPE, text=True, encoding='utf-8'
+        )
+
+    def start(self):
+        """补足空闲工作进程"""
+        with self._lock:
+            self._fill()
+
+    def _fill(self):
+        # 丢弃意外退出的空闲进程
+        self._idle = [worker for worker in self._idle if worker.poll() is None]
+        while not self._closed and len(self._idle) < self.size:
+            self._idle.append(self._spawn())
+
+    def submit(self, args: List[str], env: Dict[str, str] = None) -> Future:
+        """
+        提交一次pytest执行
+        :param args: pytest参数
+        :param env: 执行时追加的环境变量
+        :return: Future，结果为pytest退出码
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('工作进程池已关闭')
+            self._fill()
+            worker = self._idle.pop(0)
+            # 没有空闲进程时立即补充，新进程在本次执行期间完成预加载
+            if not self._idle:
+                self._fill()
+
+        worker.stdin.write(json.dumps({'args': args, 'env': env or {}}, ensure_ascii=False) + '\n')
+        worker.stdin.close()
+
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def wait():
+            exit_code = worker.wait()
+            # 先补足空闲进程，完成回调中提交的下一个任务可以直接使用
+            self.start()
+            future.set_result(exit_code)
+
+        threading.Thread(target=wait, daemon=True).start()
+        return future
+
+    def shutdown(self):
+        """关闭空闲工作进程，正在执行的任务不受影响"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            # 关闭标准输入，空闲进程读到空行后退出
+            try:
+                worker.stdin.close()
+            except OSError:
+                pass
+        for worker in idle:
+            try:
+                worker.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+
+
+_pools = []
+
+
+@atexit.register
+def _shutdown_pools():
+    for pool in _pools:
+        pool.shutdown()
+
+
+def create_pool(size=2, base_dir=None) -> WorkerPool:
+    """创建并启动工作进程池，进程退出时自动关闭"""
+    pool = WorkerPool(size, base_dir)
+    pool.start()
+    _pools.append(pool)
+    return pool
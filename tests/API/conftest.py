@@ -1,13 +1,87 @@
 # -*- coding: utf-8 -*-
+import os
 import pytest
+from config.api_test_plan import test_plan, run_config
 from core.api_test_executor import TestCaseExecutor
+from core.api_async_executor import AsyncTestCaseExecutor
+from core.plan_bundle import load_bundle
+from core.run_history import RunHistory
+
+
+def collect_case_files(session):
+    """收集本次会话中API测试入口选中的所有用例文件名"""
+    api_dir = os.path.dirname(os.path.abspath(__file__))
+    case_files = []
+    for item in session.items:
+        callspec = getattr(item, 'callspec', None)
+        if callspec is None or 'case_data' not in callspec.params:
+            continue
+        if os.path.dirname(str(item.fspath)) == api_dir:
+            case_files.append(callspec.params['case_data'])
+    return case_files
+
+
+def use_plan_bundles(client, case_files):
+    """为包含选中用例的测试计划加载预编译包"""
+    selected = set(case_files)
+    for plan, plan_cases in test_plan.items():
+        if plan_cases and selected & set(plan_cases):
+            client.use_bundle(load_bundle(plan, plan_cases))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """
+    异步模式下所有用例在test_client夹具中统一执行，pytest统计的耗时全部计入第一个用例的准备阶段；
+    改为记录执行器统计的各用例耗时，写入执行历史（见conftest.py中的pytest_sessionfinish）
+    """
+    if call.when == 'call':
+        client = item.funcargs.get('test_client')
+        callspec = getattr(item, 'callspec', None)
+        if isinstance(client, AsyncTestCaseExecutor) and callspec is not None and 'case_data' in callspec.params:
+            result = client.test_results.get(callspec.params['case_data'])
+            if result is not None:
+                item.user_properties.append(('case_duration', result['duration']))
+    yield
 
 
 # 接口测试相关夹具
 @pytest.fixture(scope="session")
-def test_client():
-    client = TestCaseExecutor(base_url="http://127.0.0.1:5000")
+def test_client(request):
+    # 各步骤的耗时与结果写入执行历史
+    history = RunHistory()
+    if run_config.get('mode') == 'async':
+        client = AsyncTestCaseExecutor(
+            base_url="http://127.0.0.1:5000",
+            concurrency=run_config.get('concurrency', 10),
+            step_concurrency=run_config.get('step_concurrency', 1),
+            dataset_concurrency=run_config.get('dataset_concurrency', 1),
+            pool_config=run_config.get('pool'),
+            cassette_config=run_config.get('cassette')
+        )
+        if run_config.get('bundle'):
+            use_plan_bundles(client, collect_case_files(request.session))
+        client.use_history(history, pytest.run_timestamp)
+        if run_config.get('warm_up'):
+            client.warm_up(run_config['warm_up'])
+        # 异步模式下一次性并发执行所有选中的用例，各测试方法直接读取结果
+        client.execute_test_plan(collect_case_files(request.session))
+    else:
+        client = TestCaseExecutor(
+            base_url="http://127.0.0.1:5000",
+            step_concurrency=run_config.get('step_concurrency', 1),
+            dataset_concurrency=run_config.get('dataset_concurrency', 1),
+            pool_config=run_config.get('pool'),
+            cassette_config=run_config.get('cassette')
+        )
+        if run_config.get('bundle'):
+            use_plan_bundles(client, collect_case_files(request.session))
+        client.use_history(history, pytest.run_timestamp)
+        if run_config.get('warm_up'):
+            client.warm_up(run_config['warm_up'])
     yield client
+    # 关闭前记录连接池统计与接口耗时直方图，写入报告概述
+    pytest.run_summary['pool_stats'] = client.pool_stats()
+    pytest.run_summary['timings'] = client.timing_stats()
     client.close()
-
-
+    history.close()
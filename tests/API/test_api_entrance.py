@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import pytest
 from config.api_test_plan import test_plan
+from core.dataset import describe_row_failures
 
 
 class TestExecute:
@@ -23,5 +24,11 @@ class TestExecute:
         # 断言测试结果
         assert case_result.get('failed_steps') == 0
 
+    @pytest.mark.usefixtures("test_client")
+    @pytest.mark.parametrize("case_data", test_plan.get('data_driven'))
+    def test_execute_plan_data_driven(self, test_client, case_data):
+        # 执行数据驱动用例，数据集逐行执行，不按行生成参数化用例
+        case_result = test_client.execute_test_case(case_data)
 
-
+        # 断言测试结果，失败时输出失败行
+        assert case_result.get('failed_steps') == 0, describe_row_failures(case_result)
@@ -3,7 +3,9 @@ import os
 import time
 import logging
 import pytest
+from pathlib import Path
 from pytest_html import extras
+from utils.path_util import PROJECT_ROOT
 from appium.webdriver.webdriver import AppiumBy
 from config.android_config import test_app_config
 from core.android_client import AndroidAutomationTool
@@ -113,9 +115,11 @@ def pytest_runtest_makereport(item, call):
 
                         # 以URL形式嵌入截图
                         screenshot_name = screenshot_info.split('/')[-1]
+                        # 分片执行时截图位于分片目录下，按相对项目根目录的路径生成URL
+                        screenshot_url = Path(os.path.relpath(screenshot_info, PROJECT_ROOT)).as_posix()
                         report_extras.append(
                             extras.url(
-                                content=f'http://localhost:63342/autotest/reports/screenshots/{screenshot_name}',
+                                content=f'http://localhost:63342/autotest/{screenshot_url}',
                                 name=f'<br>{screenshot_name}<br>'
                             )
                         )
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 import os
 import pytest
+from pathlib import Path
 from pytest_html import extras
+from utils.path_util import PROJECT_ROOT
 from core.airtest_client import AirtestClient
 from core.airtest_executor import AirtestTestExecutor
 
@@ -69,9 +71,11 @@ def pytest_runtest_makereport(item, call):
 
                         # 以URL形式嵌入截图
                         screenshot_name = screenshot_info.split('/')[-1]
+                        # 分片执行时截图位于分片目录下，按相对项目根目录的路径生成URL
+                        screenshot_url = Path(os.path.relpath(screenshot_info, PROJECT_ROOT)).as_posix()
                         report_extras.append(
                             extras.url(
-                                content=f'http://localhost:63342/autotest/reports/screenshots/{screenshot_name}',
+                                content=f'http://localhost:63342/autotest/{screenshot_url}',
                                 name=f'<br>{screenshot_name}<br>'
                             )
                         )
@@ -2,6 +2,7 @@
 import os
 import time
 import json
+import hashlib
 
 
 def writing_json_file(path, text):
@@ -79,4 +80,15 @@ def update_testlink(text, file_path):
     file = open(file_path, "a", encoding='UTF-8')
     file.write(text + '\n')
 
-    file.close()
\ No newline at end of file
+    file.close()
+
+
+def file_stamp(path):
+    """返回文件的(修改时间纳秒, 文件大小)，用于低成本判断文件是否可能发生变化"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def content_hash(content: bytes):
+    """返回文件内容的哈希值"""
+    return hashlib.sha1(content).hexdigest()
@@ -1,73 +1,151 @@
 # -*- coding: utf-8 -*-
 import os
+import queue
+import atexit
 import logging
+import logging.handlers
+
+# 写入日志文件的logger名称
+ALLOWED_LOGGERS = frozenset({
+    'root',
+    'airtest.services.api',
+    'airtest.aircv.multiscale_template_matching',
+    'airtest_client',
+    'airtest_executor',
+    'http_client',
+    'api_test_executor',
+    'api_load_runner',
+    'shard_runner',
+    'android_client',
+    'android_test_executor',
+    'interface_parser',
+    'testcase_generator',
+})
+
+# 日志中请求/响应内容的默认长度上限（字符），超出部分截断
+DEFAULT_PAYLOAD_LIMIT = 2000
+
+_payload_limit = DEFAULT_PAYLOAD_LIMIT
+_listener = None
 
 
 class ConditionalFormatter(logging.Formatter):
-    """根据日志级别动态切换格式的Formatter"""
+    """根据日志级别切换格式的Formatter，两种格式在初始化时预编译，格式化时不修改共享状态，线程安全"""
 
     def __init__(self, fmt_default, fmt_info_debug, datefmt=None):
         super().__init__(fmt_default, datefmt)
         self.fmt_default = fmt_default
         self.fmt_info_debug = fmt_info_debug
-        self.datefmt = datefmt
+        self._formatter_default = logging.Formatter(fmt_default, datefmt)
+        self._formatter_info_debug = logging.Formatter(fmt_info_debug, datefmt)
 
     def format(self, record):
         # 根据日志级别选择格式
         if record.levelno in (logging.INFO, logging.DEBUG):
-            self._style._fmt = self.fmt_info_debug
-        else:
-            self._style._fmt = self.fmt_default
+            return self._formatter_info_debug.format(record)
+        return self._formatter_default.format(record)
 
-        # 保持日期格式一致性
-        if self.datefmt:
-            self.datefmt = self.datefmt
-        return super().format(record)
 
+class NameFilter(logging.Filter):
+    """按logger名称过滤日志，名称判断结果按名称缓存"""
 
-def log_record(timestamp):
-    # 获取项目根目录
-    root_dir = os.path.dirname(os.path.dirname(__file__))
-    # 文件日志处理器
-    log_dir = root_dir + r"/reports/logs"
-    os.makedirs(log_dir, exist_ok=True)
+    def __init__(self, allowed_names=ALLOWED_LOGGERS):
+        super().__init__()
+        self.allowed_names = frozenset(allowed_names)
+        self._cache = {}
 
-    log_file = f"{log_dir}/test_{timestamp}.log"
-    with open(log_file, 'a'):
-        pass
+    def filter(self, record):
+        name = record.name
+        allowed = self._cache.get(name)
+        if allowed is None:
+            allowed = self._cache[name] = name in self.allowed_names
 
-    def custom_filter(record):
-        allowed_names = {
-            'root',
-            'airtest.services.api',
-            'airtest.aircv.multiscale_template_matching',
-            'airtest_client',
-            'airtest_executor',
-            'http_client',
-            'api_test_executor',
-            'android_client',
-            'android_test_executor',
-            'interface_parser',
-            'testcase_generator',
-        }
-        if record.name not in allowed_names:
+        if not allowed:
             return False
-
-        if record.name == 'airtest.services.api':
+        if name == 'airtest.services.api':
             message = record.getMessage()
             return "Try finding" in message or "match result" in message
         return True
 
+
+class LazyPayload:
+    """
+    日志中的请求/响应内容：只在日志真正被格式化时转为字符串，超过长度上限时截断
+    用法: logger.info("响应内容为: %s", LazyPayload(response.text))
+    """
+    __slots__ = ('value', 'limit')
+
+    def __init__(self, value, limit=None):
+        """
+        :param value: 需要记录的内容
+        :param limit: 长度上限（字符），为空时使用log_record配置的上限，小于等于0时不截断
+        """
+        self.value = value
+        self.limit = limit
+
+    def __str__(self):
+        limit = _payload_limit if self.limit is None else self.limit
+        text = self.value if isinstance(self.value, str) else str(self.value)
+        if 0 < limit < len(text):
+            return f"{text[:limit]}...（共{len(text)}字符，已截断）"
+        return text
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    将日志记录放入队列，消息的格式化（含LazyPayload的字符串转换）推迟到后台线程执行
+    异常堆栈在当前线程格式化，避免traceback对象跨线程持有
+    """
+
+    def prepare(self, record):
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+def stop_log_record():
+    """停止后台日志线程，写完队列中剩余的日志"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def log_record(timestamp, payload_limit=DEFAULT_PAYLOAD_LIMIT, log_dir=None):
+    """
+    初始化日志系统：根logger的日志经名称过滤后放入队列，由后台线程写入日志文件
+    :param timestamp: 日志文件名中的时间戳
+    :param payload_limit: 请求/响应内容的长度上限（字符），小于等于0时不截断
+    :param log_dir: 日志目录，为空时为reports/logs
+    :return: 根logger
+    """
+    global _listener, _payload_limit
+    _payload_limit = payload_limit
+
+    # 文件日志处理器
+    if log_dir is None:
+        # 获取项目根目录
+        root_dir = os.path.dirname(os.path.dirname(__file__))
+        log_dir = root_dir + r"/reports/logs"
+    os.makedirs(log_dir, exist_ok=True)
+
+    log_file = f"{log_dir}/test_{timestamp}.log"
+    with open(log_file, 'a'):
+        pass
+
     logger = logging.getLogger()
     logger.setLevel(logging.DEBUG)
 
     # 清除现有处理器避免重复日志
     if logger.hasHandlers():
         logger.handlers.clear()
+    stop_log_record()
 
     file_handler = logging.FileHandler(log_file, encoding='utf-8')
     file_handler.setLevel(logging.DEBUG)
-    file_handler.addFilter(custom_filter)
 
     # 定义两种日志格式
     fmt_info_debug = '[%(asctime)s][%(levelname)s]<%(name)s> 内容:%(message)s'
@@ -83,6 +161,91 @@ def log_record(timestamp):
         datefmt='%H:%M:%S'
     )
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+
+    # 过滤在入队前执行，被过滤的日志不进入队列
+    queue_handler = _DeferredQueueHandler(queue.SimpleQueue())
+    queue_handler.setLevel(logging.DEBUG)
+    queue_handler.addFilter(NameFilter())
+    logger.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, file_handler)
+    _listener.start()
 
     return logger
+
+
+atexit.register(stop_log_record)
+
+
+if __name__ == '__main__':
+    # 对比每个步骤的日志开销（调用线程耗时）：同步FileHandler与逐条修改格式的旧实现 vs 队列异步写入
+    import json
+    import time
+    import tempfile
+
+    steps = 2000
+    payload = json.dumps({'data': [{'orderId': i, 'name': '商品' * 10} for i in range(300)]}, ensure_ascii=False)
+    step_logger = logging.getLogger('api_test_executor')
+
+    class LegacyFormatter(logging.Formatter):
+        def __init__(self, fmt_default, fmt_info_debug, datefmt=None):
+            super().__init__(fmt_default, datefmt)
+            self.fmt_default = fmt_default
+            self.fmt_info_debug = fmt_info_debug
+
+        def format(self, record):
+            self._style._fmt = self.fmt_info_debug if record.levelno in (logging.INFO, logging.DEBUG) \
+                else self.fmt_default
+            return super().format(record)
+
+    def legacy_filter(record):
+        allowed_names = set(ALLOWED_LOGGERS)
+        return record.name in allowed_names
+
+    def log_step_legacy():
+        step_logger.info(f"开始执行第1步")
+        step_logger.info(f"请求方法为POST，请求路径为/order/create")
+        step_logger.info(f"请求头headers为{{'Content-Type': 'application/json'}}，请求数据data为{{'a': 1}}")
+        step_logger.info(f"响应内容为: {payload}")
+        step_logger.info(f"断言方式: 响应状态码等于")
+        step_logger.info(f"期望结果: 200")
+
+    def log_step():
+        step_logger.info("开始执行第%s步", 1)
+        step_logger.info("请求方法为%s，请求路径为%s", 'POST', '/order/create')
+        step_logger.info("请求头headers为%s，请求数据data为%s",
+                         LazyPayload({'Content-Type': 'application/json'}), LazyPayload({'a': 1}))
+        step_logger.info("响应内容为: %s", LazyPayload(payload))
+        step_logger.info("断言方式: %s", '响应状态码等于')
+        step_logger.info("期望结果: %s", LazyPayload(200))
+
+    def measure(log_step_func):
+        started = time.perf_counter()
+        for _ in range(steps):
+            log_step_func()
+        return (time.perf_counter() - started) / steps * 1e6
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root_logger = logging.getLogger()
+        root_logger.setLevel(logging.DEBUG)
+        legacy_handler = logging.FileHandler(os.path.join(tmp, 'legacy.log'), encoding='utf-8')
+        legacy_handler.addFilter(legacy_filter)
+        legacy_handler.setFormatter(LegacyFormatter(
+            '[%(asctime)s][%(levelname)s]<%(name)s> 【文件名：%(filename)s, 行号：%(lineno)s】 内容:%(message)s',
+            '[%(asctime)s][%(levelname)s]<%(name)s> 内容:%(message)s', '%H:%M:%S'))
+        root_logger.addHandler(legacy_handler)
+        legacy = measure(log_step_legacy)
+        root_logger.removeHandler(legacy_handler)
+        legacy_handler.close()
+
+    timestamp = 'benchmark'
+    log_record(timestamp)
+    queued = measure(log_step)
+    started = time.perf_counter()
+    stop_log_record()
+    drain = (time.perf_counter() - started) / steps * 1e6
+    os.remove(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'reports', 'logs', f'test_{timestamp}.log'))
+
+    print(f"每步骤6条日志、响应体{len(payload)}字符，共{steps}步")
+    print(f"旧实现（同步写入）: {legacy:.1f} us/步骤")
+    print(f"队列异步写入: {queued:.1f} us/步骤（后台线程写入剩余日志 {drain:.1f} us/步骤）")
@@ -4,11 +4,22 @@ from pathlib import Path
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# 分片执行时工作进程的输出目录，由core.shard_runner为每个工作进程设置
+SHARD_DIR_ENV = 'AUTOTEST_SHARD_DIR'
+
 
 def get_path(*subpaths):
     return Path(os.path.join(PROJECT_ROOT, *subpaths)).as_posix()
 
 
+def report_path(*subpaths):
+    """测试输出（日志、截图、报告等）的路径，分片工作进程中位于各自的分片目录下"""
+    shard_dir = os.getenv(SHARD_DIR_ENV)
+    if shard_dir:
+        return Path(os.path.join(shard_dir, *subpaths)).as_posix()
+    return get_path('reports', *subpaths)
+
+
 if __name__ == '__main__':
     screenshots_dir = get_path('tests_data', 'user_center', 'login_test_data.json')
-    print(screenshots_dir)
\ No newline at end of file
+    print(screenshots_dir)